@@ -21,9 +21,14 @@ RUN_SCRIPT="${RUN_SCRIPT:-ww_check_in.py}"
 # PATH setup (adjust if your Python is installed elsewhere)
 export PATH="/usr/local/bin:/usr/bin:/bin:$PATH"
 
-# Logs
+# Logs: the app writes its own rotating LOG_FILE, so stdout is not duplicated here.
+# This file only gets the wrapper banners and anything printed outside logging.
 mkdir -p "$PROJECT_DIR/logs"
-LOG_FILE="$PROJECT_DIR/logs/cron_check_in_local_$(date +%Y%m%d_%H%M%S).log"
+LOG_FILE="$PROJECT_DIR/logs/cron_check_in_local.log"
+if [ -f "$LOG_FILE" ] && [ "$(wc -c <"$LOG_FILE")" -gt 1048576 ]; then
+  mv -f "$LOG_FILE" "$LOG_FILE.1"
+fi
+export LOG_STDOUT="${LOG_STDOUT:-false}"
 
 # Prefer .env values over inherited environment unless explicitly disabled
 export PREFER_DOTENV="${PREFER_DOTENV:-true}"
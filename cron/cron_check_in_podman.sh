@@ -26,7 +26,13 @@ PODMAN_CMD="${PODMAN_CMD:-podman}"
 
 LOG_DIR="$PROJECT_DIR/logs"
 mkdir -p "$LOG_DIR"
-LOG_FILE="$LOG_DIR/cron_check_in_wsl_podman_$(date +%Y%m%d_%H%M%S).log"
+# The app writes its own rotating logs/ww_check_in.log, so stdout is not duplicated here.
+# This file only gets the wrapper banners and anything printed outside logging.
+LOG_FILE="$LOG_DIR/cron_check_in_wsl_podman.log"
+if [ -f "$LOG_FILE" ] && [ "$(wc -c <"$LOG_FILE")" -gt 1048576 ]; then
+  mv -f "$LOG_FILE" "$LOG_FILE.1"
+fi
+LOG_STDOUT="${LOG_STDOUT:-false}"
 
 {
   echo "=== WSL Podman auto check-in started $(date) ==="
@@ -43,6 +49,7 @@ LOG_FILE="$LOG_DIR/cron_check_in_wsl_podman_$(date +%Y%m%d_%H%M%S).log"
       "$PODMAN_CMD" run --rm \
         --env-file ./.env \
         -e HEADLESS="$HEADLESS" \
+        -e LOG_STDOUT="$LOG_STDOUT" \
         -v "$PROJECT_DIR:/app" \
         -v "$PROJECT_DIR/logs:/app/logs" \
         "$IMAGE"
@@ -59,12 +66,12 @@ LOG_FILE="$LOG_DIR/cron_check_in_wsl_podman_$(date +%Y%m%d_%H%M%S).log"
           "$IMAGE" sleep infinity
       fi
       # Exec the job in the running container
-      "$PODMAN_CMD" exec "$NAME" bash -lc "python3 /app/$RUN_SCRIPT"
+      "$PODMAN_CMD" exec -e LOG_STDOUT="$LOG_STDOUT" "$NAME" bash -lc "python3 /app/$RUN_SCRIPT"
       rc=$?
       ;;
     exec)
       # Exec into existing container NAME
-      "$PODMAN_CMD" exec "$NAME" bash -lc "python3 /app/$RUN_SCRIPT"
+      "$PODMAN_CMD" exec -e LOG_STDOUT="$LOG_STDOUT" "$NAME" bash -lc "python3 /app/$RUN_SCRIPT"
       rc=$?
       ;;
     *)
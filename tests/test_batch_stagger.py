@@ -0,0 +1,93 @@
+"""Batch runs log in at their stagger offsets, not all at once."""
+
+import contextlib
+import dataclasses
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ww_check_in  # noqa: E402
+from utils.config import load_settings  # noqa: E402
+from utils.dispatch import Account, FleetDispatcher, stagger_offsets  # noqa: E402
+from utils.outcome import PunchOutcome, PunchResult  # noqa: E402
+from utils.preflight import PreflightResult  # noqa: E402
+
+
+class FakeHelper:
+    def __init__(self, settings, deadline):
+        self.deadline = deadline
+        self.driver_pid = None
+        self.last_popup_text = None
+
+    def warm_up(self, url=None):
+        pass
+
+    def start(self, initial_url=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class BatchStaggerTest(unittest.TestCase):
+    WINDOW = 0.9
+
+    def setUp(self):
+        with mock.patch.dict(os.environ, {"WW_USERNAME": "u", "WW_PASSWORD": "p"}):
+            settings = load_settings(dotenv_path=os.devnull)
+        self.settings = dataclasses.replace(
+            settings,
+            run_deadline=0,
+            resource_sampling=False,
+            artifacts_enabled=False,
+            stagger_window=self.WINDOW,
+            stagger_seed="test",
+            logins_per_second=0,
+            max_sessions=1,
+            admission_control=False,
+        )
+        self.accounts = [Account(name, "pw") for name in ("alice", "bob", "carol")]
+
+    def test_logins_follow_offsets(self):
+        logins = {}
+        holds = {}
+        lock = threading.Lock()
+
+        def fake_flow(helper, login_url, username, password, target_punch, delay_seconds=0, **kwargs):
+            with lock:
+                logins[username] = time.monotonic()
+                holds[username] = delay_seconds
+            return PunchResult(PunchOutcome.SUCCESS)
+
+        dispatcher = FleetDispatcher.from_config(self.settings)
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(
+                mock.patch.object(
+                    ww_check_in,
+                    "run_preflight",
+                    lambda *a, **k: PreflightResult(True, lock=contextlib.nullcontext()),
+                )
+            )
+            stack.enter_context(mock.patch.object(ww_check_in, "run_with_recovery", fake_flow))
+            stack.enter_context(mock.patch("utils.selenium_helper.SeleniumHelper", FakeHelper))
+            start = time.monotonic()
+            ok = ww_check_in.run_batch(
+                self.accounts, "check-in", "hold", "http://portal", dispatcher=dispatcher, settings=self.settings
+            )
+
+        self.assertTrue(ok)
+        offsets = stagger_offsets((a.username for a in self.accounts), self.WINDOW, "test")
+        for name, offset in offsets.items():
+            # Logged in at (not before, nor long after) the offset, and saved without a hold
+            self.assertGreaterEqual(logins[name] - start, offset - 0.05, name)
+            self.assertLess(logins[name] - start, offset + 0.25, name)
+            self.assertEqual(holds[name], 0, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
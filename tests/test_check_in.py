@@ -0,0 +1,54 @@
+"""check_in reports setup failures (ledger, helper) as a failed run instead of raising."""
+
+import contextlib
+import dataclasses
+import os
+import sqlite3
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ww_check_in  # noqa: E402
+from utils.config import load_settings  # noqa: E402
+from utils.preflight import PreflightResult  # noqa: E402
+
+
+class LockedLedger:
+    def start_run(self, username, punch_type):
+        raise sqlite3.OperationalError("database is locked")
+
+
+class FakeHelper:
+    def __init__(self, settings, deadline):
+        self.last_popup_text = None
+
+    def warm_up(self, url=None):
+        pass
+
+
+class CheckInSetupTest(unittest.TestCase):
+    def test_locked_ledger_fails_the_run(self):
+        with mock.patch.dict(os.environ, {"WW_USERNAME": "u", "WW_PASSWORD": "p"}):
+            settings = load_settings(dotenv_path=os.devnull)
+        settings = dataclasses.replace(settings, run_deadline=0, resource_sampling=False)
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(
+                mock.patch.object(
+                    ww_check_in,
+                    "run_preflight",
+                    lambda *a, **k: PreflightResult(True, lock=contextlib.nullcontext()),
+                )
+            )
+            stack.enter_context(mock.patch("utils.selenium_helper.SeleniumHelper", FakeHelper))
+            with self.assertLogs("ww_check_in", "ERROR") as logs:
+                ok = ww_check_in.check_in(
+                    "上班", "hold", "http://portal", "u", "p", delay_seconds=0, ledger=LockedLedger(), settings=settings
+                )
+        self.assertFalse(ok)
+        self.assertIn("database is locked", "\n".join(logs.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
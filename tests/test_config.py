@@ -0,0 +1,58 @@
+"""PREFER_DOTENV set in .env, and .env values exported to the environment across reloads."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import config  # noqa: E402
+
+ACCOUNT = "WW_USERNAME=u\nWW_PASSWORD=p\n"
+
+
+class DotenvTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, ".env")
+        env = {k: v for k, v in os.environ.items() if k not in ("PREFER_DOTENV", "HTTPS_PROXY", "LOG_LEVEL")}
+        env.update(DOTENV_PATH=self.path, LOG_LEVEL="WARNING")
+        patches = [
+            mock.patch.dict(os.environ, env, clear=True),
+            mock.patch.object(config, "_current", None),
+            mock.patch.dict(config._exported, {}, clear=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, text):
+        with open(self.path, "w") as fh:
+            fh.write(ACCOUNT + text)
+
+    def test_prefer_dotenv_in_dotenv(self):
+        self.write("LOG_LEVEL=DEBUG\n")
+        self.assertEqual(config.get_settings().log_level, "WARNING")
+        self.write("PREFER_DOTENV=true\nLOG_LEVEL=DEBUG\n")
+        self.assertEqual(config.reload_settings().log_level, "DEBUG")
+
+    def test_export_follows_reloads_without_overriding_the_environment(self):
+        self.write("HTTPS_PROXY=http://proxy-a:3128\nLOG_LEVEL=DEBUG\n")
+        config.get_settings()
+        self.assertEqual(os.environ["HTTPS_PROXY"], "http://proxy-a:3128")
+        self.assertEqual(os.environ["LOG_LEVEL"], "WARNING")
+
+        self.write("HTTPS_PROXY=http://proxy-b:3128\n")
+        config.reload_settings()
+        self.assertEqual(os.environ["HTTPS_PROXY"], "http://proxy-b:3128")
+
+        self.write("")
+        config.reload_settings()
+        self.assertNotIn("HTTPS_PROXY", os.environ)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Dispatcher sessions carry their admission priority: exports wait behind punches."""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.admission import BACKGROUND, AdmissionController  # noqa: E402
+from utils.dispatch import FleetDispatcher  # noqa: E402
+
+
+class SessionPriorityTest(unittest.TestCase):
+    def test_punch_is_admitted_before_earlier_background_waiter(self):
+        admission = AdmissionController(
+            session_mb=0, reserve_mb=0, max_load_per_cpu=1000, max_sessions=1, poll_interval=0.01
+        )
+        dispatcher = FleetDispatcher(logins_per_second=0, max_sessions=1, stagger_window=0, admission=admission)
+        order = []
+
+        def run(name, **kwargs):
+            with dispatcher.session(name, **kwargs):
+                order.append(name)
+
+        def queued(count):
+            end = time.monotonic() + 2
+            while len(admission._waiting) < count and time.monotonic() < end:
+                time.sleep(0.005)
+            self.assertEqual(len(admission._waiting), count)
+
+        with dispatcher.session("holder"):
+            export = threading.Thread(target=run, args=("export",), kwargs={"priority": BACKGROUND})
+            export.start()
+            queued(1)
+            punch = threading.Thread(target=run, args=("punch",))
+            punch.start()
+            queued(2)
+        export.join(2)
+        punch.join(2)
+        self.assertEqual(order, ["punch", "export"])
+
+
+if __name__ == "__main__":
+    unittest.main()
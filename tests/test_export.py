@@ -0,0 +1,86 @@
+"""Parsing of reported-time grid pages for the export."""
+
+import datetime
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.export import column_map, format_like, parse_page, parse_time  # noqa: E402
+
+HEADER = ["日期", "打卡類型", "時間", "狀態"]
+DAY = datetime.date(2026, 10, 19)
+
+
+class ParseTimeTest(unittest.TestCase):
+    def test_24_hour(self):
+        self.assertEqual(parse_time("08:05"), "08:05:00")
+        self.assertEqual(parse_time("17:31:09"), "17:31:09")
+
+    def test_meridiem_after_or_before(self):
+        self.assertEqual(parse_time("5:31PM"), "17:31:00")
+        self.assertEqual(parse_time("12:10 AM"), "00:10:00")
+        self.assertEqual(parse_time("下午 05:31"), "17:31:00")
+        self.assertEqual(parse_time("上午 12:00"), "00:00:00")
+        self.assertEqual(parse_time("下午 12:15"), "12:15:00")
+
+    def test_no_time(self):
+        self.assertIsNone(parse_time(""))
+        self.assertIsNone(parse_time("休假"))
+
+
+class FormatLikeTest(unittest.TestCase):
+    def test_iso_separators(self):
+        self.assertEqual(format_like("2026/09/01", DAY), "2026/10/19")
+        self.assertEqual(format_like("2026-09-01", DAY), "2026-10-19")
+
+    def test_us_order(self):
+        self.assertEqual(format_like("09/01/2026", DAY), "10/19/2026")
+
+    def test_unknown_sample(self):
+        self.assertEqual(format_like("", DAY), "2026/10/19")
+
+
+class ColumnMapTest(unittest.TestCase):
+    def test_chinese_header(self):
+        self.assertEqual(column_map(HEADER), {"date": 0, "punch_type": 1, "time": 2, "status": 3})
+
+    def test_english_header_takes_first_match(self):
+        header = ["Date", "Punch Type", "Time", "Time Zone", "Status"]
+        self.assertEqual(column_map(header), {"date": 0, "punch_type": 1, "time": 2, "status": 4})
+
+    def test_missing_columns(self):
+        self.assertEqual(column_map(["備註"]), {})
+
+
+class ParsePageTest(unittest.TestCase):
+    def test_rows_inherit_the_date_across_pages(self):
+        rows, last = parse_page(
+            "alice", HEADER, [["2026/10/19", "上班", "08:55", "已核准"], ["", "下班", "下午 06:02", "已核准"]]
+        )
+        expected = [(DAY, "上班", "08:55:00"), (DAY, "下班", "18:02:00")]
+        self.assertEqual([(day, r.punch_type, r.time) for day, r in rows], expected)
+        self.assertEqual(rows[0][1].account, "alice")
+        self.assertEqual(last, DAY)
+
+        rows, last = parse_page("alice", HEADER, [["", "上班", "09:01", ""]], last)
+        self.assertEqual(rows[0][1].date, "2026-10-19")
+
+    def test_dated_row_without_time_still_carries_its_date(self):
+        rows, last = parse_page("alice", HEADER, [["2026/10/20", "", "", ""], ["", "上班", "08:50", ""]], DAY)
+        self.assertEqual([r.date for _, r in rows], ["2026-10-20"])
+        self.assertEqual(last, datetime.date(2026, 10, 20))
+
+    def test_non_clock_time_text_is_kept(self):
+        rows, _ = parse_page("alice", HEADER, [["10/19/2026", "請假", "全天", ""]])
+        self.assertEqual(rows[0][1].time, "全天")
+
+    def test_undated_rows_are_skipped(self):
+        rows, last = parse_page("alice", HEADER, [["", "上班", "08:50", ""]])
+        self.assertEqual(rows, [])
+        self.assertIsNone(last)
+
+
+if __name__ == "__main__":
+    unittest.main()
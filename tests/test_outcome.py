@@ -0,0 +1,90 @@
+"""Post-save outcome detection: empty or unrecognized popups are not successes."""
+
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.async_selenium_helper import AsyncSeleniumHelper  # noqa: E402
+from utils.deadline import Deadline  # noqa: E402
+from utils.outcome import PunchOutcome, classify_message  # noqa: E402
+from utils.selenium_helper import SeleniumHelper  # noqa: E402
+
+DUPLICATE = "您最近的打卡也是上班，選取「確定」繼續"
+
+
+class FakeDriver:
+    """Answers each OUTCOME_PROBE call with the next scripted signal (the last one repeats)."""
+
+    def __init__(self, signals):
+        self.signals = list(signals)
+        self.switch_to = SimpleNamespace(default_content=lambda: None)
+
+    def execute_script(self, script, ignore_text=None):
+        signal = self.signals.pop(0) if len(self.signals) > 1 else self.signals[0]
+        if signal and ignore_text is not None and signal.get("text") == ignore_text:
+            return None
+        return signal
+
+
+def stub(helper, signals, confirm):
+    def confirm_popup_steps():
+        return confirm
+        yield
+
+    helper._driver = FakeDriver(signals)
+    helper.confirm_popup_steps = confirm_popup_steps
+    return helper
+
+
+def helper_for(signals, confirm=True):
+    return stub(SeleniumHelper(SimpleNamespace(step_macros=True, implicit_wait=10), Deadline(60)), signals, confirm)
+
+
+def modal(text):
+    return {"kind": "modal", "text": text}
+
+
+class OutcomeTest(unittest.TestCase):
+    def detect(self, signals, confirm=True, timeout=0.3):
+        return helper_for(signals, confirm).detect_punch_outcome(timeout=timeout, poll_interval=0.01)
+
+    def test_classify(self):
+        self.assertIs(classify_message(""), PunchOutcome.UNKNOWN)
+        self.assertIs(classify_message("請稍候"), PunchOutcome.UNKNOWN)
+        self.assertIs(classify_message("打卡成功"), PunchOutcome.SUCCESS)
+        self.assertIs(classify_message("打卡時間無效"), PunchOutcome.ERROR)
+        self.assertIs(classify_message(DUPLICATE), PunchOutcome.DUPLICATE_CONFIRMED)
+
+    def test_slow_duplicate_prompt_is_confirmed(self):
+        # The modal exists before its text renders
+        result = self.detect([modal(""), modal(""), modal(DUPLICATE), {"kind": "saved", "text": "Saved"}])
+        self.assertIs(result.outcome, PunchOutcome.DUPLICATE_CONFIRMED)
+        self.assertTrue(result.ok)
+
+    def test_saved_marker_is_success(self):
+        result = self.detect([None, {"kind": "saved", "text": ""}])
+        self.assertIs(result.outcome, PunchOutcome.SUCCESS)
+
+    def test_unrecognized_popup_times_out_unknown(self):
+        result = self.detect([modal("系統公告")])
+        self.assertIs(result.outcome, PunchOutcome.UNKNOWN)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.message, "系統公告")
+
+    def test_unconfirmable_prompt_is_error(self):
+        result = self.detect([modal(DUPLICATE)], confirm=False)
+        self.assertIs(result.outcome, PunchOutcome.ERROR)
+
+    def test_async_helper_runs_the_same_steps(self):
+        helper = AsyncSeleniumHelper(SimpleNamespace(step_macros=True, implicit_wait=10), Deadline(60))
+        stub(helper.sync, [modal(""), modal(DUPLICATE), {"kind": "saved", "text": "Saved"}], True)
+        result = asyncio.run(helper.detect_punch_outcome(timeout=0.3, poll_interval=0.01))
+        self.assertIs(result.outcome, PunchOutcome.DUPLICATE_CONFIRMED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Orphan detection: a detached crashpad handler of a live session is left alone."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reaper import ProcInfo, find_orphans  # noqa: E402
+
+UID = os.getuid()
+PROFILE_A = "/tmp/.com.google.Chrome.aaaa"
+PROFILE_B = "/tmp/.com.google.Chrome.bbbb"
+
+
+def proc(pid, ppid, name, cmdline=""):
+    return ProcInfo(pid, ppid, UID, name, cmdline)
+
+
+def chrome(pid, ppid, profile):
+    return proc(pid, ppid, "chrome", f"chrome --enable-automation --user-data-dir={profile}")
+
+
+def crashpad(pid, profile):
+    # Detached from its browser by design: parent is init
+    return proc(pid, 1, "chrome_crashpad_handler", f"chrome_crashpad_handler --database={profile}/Crash Reports")
+
+
+def table(*infos):
+    return {info.pid: info for info in infos}
+
+
+class FindOrphansTest(unittest.TestCase):
+    def test_crashpad_of_a_live_session_is_kept(self):
+        procs = table(
+            proc(100, 1, "python3", "python3 ww_check_in.py"),
+            proc(101, 100, "chromedriver", "chromedriver --port=9515"),
+            chrome(102, 101, PROFILE_A),
+            crashpad(103, PROFILE_A),
+        )
+        self.assertEqual(find_orphans(procs), [])
+
+    def test_crashpad_goes_with_its_orphaned_browser(self):
+        procs = table(
+            proc(201, 1, "chromedriver", "chromedriver --port=9515"),
+            chrome(202, 201, PROFILE_B),
+            crashpad(203, PROFILE_B),
+        )
+        self.assertEqual(sorted(find_orphans(procs)), [201, 203])
+
+    def test_crashpad_without_a_browser_is_orphaned(self):
+        procs = table(
+            proc(300, 1, "python3", "python3 ww_check_in.py"),
+            # A live browser whose profile name only shares a prefix
+            chrome(302, 300, PROFILE_A + "x"),
+            crashpad(301, PROFILE_A),
+            proc(303, 1, "chrome_crashpad_handler", "chrome_crashpad_handler --database=/tmp/ww-cdp-1234"),
+        )
+        self.assertEqual(sorted(find_orphans(procs)), [301, 303])
+
+    def test_crashpad_without_a_known_profile_is_kept(self):
+        procs = table(proc(401, 1, "chrome_crashpad_handler", "chrome_crashpad_handler --enable-automation"))
+        self.assertEqual(find_orphans(procs), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
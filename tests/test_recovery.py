@@ -0,0 +1,93 @@
+"""Crash recovery: the save checkpoint is taken at the save click, not before."""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ww_check_in  # noqa: E402
+from utils.deadline import Deadline  # noqa: E402
+from utils.outcome import PunchOutcome, PunchResult  # noqa: E402
+from utils.selenium_helper import PUNCH_DROPDOWN_SELECTORS, SeleniumHelper  # noqa: E402
+
+CRASH = ConnectionError("chrome not reachable")
+
+
+def no_steps(*args, **kwargs):
+    return None
+    yield
+
+
+class FakeHelper(SeleniumHelper):
+    """SeleniumHelper whose page steps succeed at once; failures are scripted per call."""
+
+    def __init__(self, dropdown_errors=(), click_errors=()):
+        super().__init__(SimpleNamespace(step_macros=False, implicit_wait=1), Deadline(60))
+        self.dropdown_errors = list(dropdown_errors)
+        self.click_errors = list(click_errors)
+        self.clicks = 0
+        self.restarts = 0
+        for name in (
+            "login_steps",
+            "ready_steps",
+            "click_by_id_steps",
+            "open_online_checkin_steps",
+            "clock_iframe_steps",
+            "restore_session_steps",
+        ):
+            setattr(self, name, no_steps)
+
+    def start(self, initial_url=None):
+        pass
+
+    def restart(self):
+        self.restarts += 1
+
+    def current_url(self):
+        return "https://portal/clock"
+
+    def session_cookies(self):
+        return []
+
+    def find_dynamic_steps(self, selectors, element_name, max_retries=3, condition=None):
+        if selectors is PUNCH_DROPDOWN_SELECTORS and self.dropdown_errors:
+            raise self.dropdown_errors.pop(0)
+        return object()
+        yield
+
+    def _select_option(self, dropdown, target_option):
+        pass
+
+    def robust_click(self, element):
+        if self.click_errors:
+            raise self.click_errors.pop(0)
+        self.clicks += 1
+        return True
+
+    def outcome_steps(self, timeout=10.0, poll_interval=0.2):
+        return PunchResult(PunchOutcome.SUCCESS)
+        yield
+
+
+class RecoveryTest(unittest.TestCase):
+    def run_flow(self, helper, delay_seconds=0):
+        return ww_check_in.run_with_recovery(helper, "https://portal", "u", "p", "上班", delay_seconds=delay_seconds)
+
+    def test_crash_before_save_click_is_retried(self):
+        for delay in (0, 0.01):
+            helper = FakeHelper(dropdown_errors=[CRASH])
+            result = self.run_flow(helper, delay)
+            self.assertIs(result.outcome, PunchOutcome.SUCCESS, delay)
+            self.assertEqual((helper.restarts, helper.clicks), (1, 1), delay)
+
+    def test_crash_during_save_click_is_not_repeated(self):
+        helper = FakeHelper(click_errors=[CRASH])
+        result = self.run_flow(helper)
+        self.assertIs(result.outcome, PunchOutcome.UNKNOWN)
+        self.assertEqual((helper.restarts, helper.clicks), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Startup import-time budget for the CLI entry point.
+
+Runs `python -X importtime -c "import ww_check_in"` several times in fresh interpreters,
+takes the best cumulative time of the target module, and fails (exit 1) when it exceeds
+the budget or when a module that must stay lazy (selenium, webdriver-manager, asyncio)
+is imported eagerly.
+
+Usage:
+    python3 tools/check_import_time.py [--budget-ms 60] [--runs 5] [--module ww_check_in]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported on the paths that actually drive a browser / daemon
+LAZY_MODULES = ("selenium", "webdriver_manager", "asyncio")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(module: str) -> Tuple[int, Dict[str, int], List[str]]:
+    """Import ``module`` in a fresh interpreter; return (cumulative_us, self_us per module, imported)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+
+    entries: List[Tuple[int, int, int, str]] = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            entries.append((int(m.group(1)), int(m.group(2)), len(m.group(3)), m.group(4)))
+
+    # importtime prints children before their parent, indented deeper; the target's
+    # subtree is the run of deeper-indented lines right above its own line.
+    for idx in range(len(entries) - 1, -1, -1):
+        if entries[idx][3] == module:
+            break
+    else:
+        return 0, {}, []
+    cumulative, depth = entries[idx][1], entries[idx][2]
+    start = idx
+    while start > 0 and entries[start - 1][2] > depth:
+        start -= 1
+    subtree = entries[start : idx + 1]
+    return cumulative, {name: self_us for self_us, _, _, name in subtree}, [name for *_, name in subtree]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fail if the CLI entry point's import time exceeds a budget")
+    parser.add_argument("--module", default="ww_check_in", help="Module to import (default: ww_check_in)")
+    parser.add_argument("--budget-ms", type=float, default=60.0, help="Allowed cumulative import time (default: 60)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to sample; the best run counts")
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest modules of the best run")
+    args = parser.parse_args(argv)
+
+    best = None
+    for _ in range(max(1, args.runs)):
+        sample = measure(args.module)
+        if best is None or sample[0] < best[0]:
+            best = sample
+    cumulative_us, self_times, imported = best
+
+    print(f"{args.module}: {cumulative_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    for name, us in sorted(self_times.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"  {us / 1000:7.2f} ms  {name}")
+
+    failures: List[str] = []
+    eager = sorted({name.split(".")[0] for name in imported if name.split(".")[0] in LAZY_MODULES})
+    if eager:
+        failures.append(f"modules that must be lazy were imported eagerly: {', '.join(eager)}")
+    if cumulative_us / 1000 > args.budget_ms:
+        failures.append(f"import time {cumulative_us / 1000:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Memory-aware admission control for browser sessions.
+
+A fixed session count either underuses a big host or gets Chrome OOM-killed in a
+small container. :class:`AdmissionController` instead starts a new session only when
+its estimated footprint fits in what the host can give right now:
+- memory: the tighter of the cgroup limit (v2 ``memory.max`` or v1
+  ``memory.limit_in_bytes``, minus reclaimable page cache) and ``MemAvailable``
+- CPU: 1-minute load average per usable CPU (cgroup CPU quota, affinity or count)
+
+Sessions admitted in the last few seconds have not allocated their memory yet, so
+their estimate is reserved on top of what the probe reports. The per-session
+estimate starts at ``session_mb`` and follows the peak RSS that finished sessions
+report (see ``utils.resources``).
+
+Waiting work is served earliest deadline first, punches before anything else; at
+least one session is always allowed so a tiny host still makes progress.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Priority classes: lower is served first
+PUNCH = 0
+BACKGROUND = 1
+
+_CGROUP_ROOT = "/sys/fs/cgroup"
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_V1_UNLIMITED = 1 << 60
+
+
+@dataclass(frozen=True)
+class HostResources:
+    available_mb: float
+    limit_mb: Optional[float]  # cgroup memory limit, if any
+    load_per_cpu: float
+    cpus: float
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def _stat_value(path: str, key: str) -> int:
+    text = _read(path) or ""
+    for line in text.splitlines():
+        name, _, value = line.partition(" ")
+        if name == key:
+            return int(value)
+    return 0
+
+
+def cgroup_memory(root: str = _CGROUP_ROOT) -> Tuple[Optional[int], Optional[int]]:
+    """(limit, usage) in bytes of this process's memory cgroup; None when unlimited/unknown.
+
+    Usage excludes inactive page cache, which the kernel reclaims before OOM-killing.
+    """
+    limit = _read(os.path.join(root, "memory.max"))
+    if limit is not None:  # cgroup v2
+        current = _read(os.path.join(root, "memory.current"))
+        usage = int(current) - _stat_value(os.path.join(root, "memory.stat"), "inactive_file") if current else None
+        return (None if limit == "max" else int(limit)), usage
+    limit = _read(os.path.join(root, "memory", "memory.limit_in_bytes"))
+    if limit is not None:  # cgroup v1
+        current = _read(os.path.join(root, "memory", "memory.usage_in_bytes"))
+        inactive = _stat_value(os.path.join(root, "memory", "memory.stat"), "total_inactive_file")
+        usage = int(current) - inactive if current else None
+        return (None if int(limit) >= _V1_UNLIMITED else int(limit)), usage
+    return None, None
+
+
+def mem_available() -> Optional[int]:
+    """``MemAvailable`` from /proc/meminfo, in bytes."""
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        if line.startswith("MemAvailable:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def usable_cpus(root: str = _CGROUP_ROOT) -> float:
+    """CPUs this process may use: cgroup quota, else affinity mask, else cpu_count."""
+    quota = _read(os.path.join(root, "cpu.max"))
+    if quota:  # cgroup v2: "<quota> <period>" or "max <period>"
+        value, _, period = quota.partition(" ")
+        if value != "max" and period:
+            return max(int(value) / int(period), 0.1)
+    v1_quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+    v1_period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    if v1_quota and v1_period and int(v1_quota) > 0:
+        return max(int(v1_quota) / int(v1_period), 0.1)
+    try:
+        return float(len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return float(os.cpu_count() or 1)
+
+
+def probe_host() -> HostResources:
+    """Current memory headroom and CPU load of the host or container."""
+    mb = 1024 * 1024
+    limit, usage = cgroup_memory()
+    candidates: List[float] = []
+    available = mem_available()
+    if available is not None:
+        candidates.append(available / mb)
+    if limit is not None and usage is not None:
+        candidates.append((limit - usage) / mb)
+    cpus = usable_cpus()
+    try:
+        load = os.getloadavg()[0] / cpus
+    except OSError:
+        load = 0.0
+    return HostResources(
+        available_mb=max(min(candidates), 0.0) if candidates else float("inf"),
+        limit_mb=limit / mb if limit is not None else None,
+        load_per_cpu=load,
+        cpus=cpus,
+    )
+
+
+class Ticket:
+    """One admitted session; ``observe`` feeds its measured peak RSS back to the estimate."""
+
+    def __init__(self, controller: "AdmissionController", name: str) -> None:
+        self._controller = controller
+        self.name = name
+        self.admitted_at = time.monotonic()
+
+    def observe(self, peak_rss_mb: float) -> None:
+        self._controller.observe(peak_rss_mb)
+
+
+class AdmissionController:
+    """Admit browser sessions while their estimated memory fits and the CPU is not saturated."""
+
+    def __init__(
+        self,
+        session_mb: float = 350.0,
+        reserve_mb: float = 256.0,
+        max_load_per_cpu: float = 1.5,
+        max_sessions: int = 0,
+        warmup_seconds: float = 20.0,
+        poll_interval: float = 1.0,
+        probe=probe_host,
+    ) -> None:
+        self.session_mb = session_mb
+        self.reserve_mb = reserve_mb
+        self.max_load_per_cpu = max_load_per_cpu
+        self.max_sessions = max_sessions  # 0: no fixed cap
+        self.warmup_seconds = warmup_seconds
+        self.poll_interval = poll_interval
+        self._probe = probe
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, float, int]] = []
+        self._seq = itertools.count()
+        self._active: List[Ticket] = []
+
+    # ------------------------- Estimate ------------------------- #
+    def observe(self, peak_rss_mb: float) -> None:
+        """Blend a finished session's peak RSS into the per-session estimate (biased up)."""
+        if peak_rss_mb <= 0:
+            return
+        with self._cond:
+            if peak_rss_mb > self.session_mb:
+                self.session_mb = 0.5 * self.session_mb + 0.5 * peak_rss_mb
+            else:
+                self.session_mb = 0.9 * self.session_mb + 0.1 * peak_rss_mb
+        logger.debug(f"Session footprint estimate now {self.session_mb:.0f} MB")
+
+    # ------------------------- Admission ------------------------- #
+    def _blocked_by(self, host: HostResources) -> Optional[str]:
+        """Why one more session cannot start now (None: it can). Caller holds the lock."""
+        active = len(self._active)
+        if active == 0:
+            return None
+        if self.max_sessions and active >= self.max_sessions:
+            return f"{active} sessions running (cap {self.max_sessions})"
+        now = time.monotonic()
+        warming = sum(1 for t in self._active if now - t.admitted_at < self.warmup_seconds)
+        headroom = host.available_mb - self.reserve_mb - warming * self.session_mb
+        if headroom < self.session_mb:
+            return f"{headroom:.0f} MB headroom, a session needs ~{self.session_mb:.0f} MB"
+        if host.load_per_cpu > self.max_load_per_cpu:
+            return f"load {host.load_per_cpu:.2f}/CPU above {self.max_load_per_cpu:g}"
+        return None
+
+    @contextlib.contextmanager
+    def admit(self, name: str, deadline: Optional[float] = None, priority: int = PUNCH) -> Iterator[Ticket]:
+        """Block until a session may start, then hold it for the duration of the block.
+
+        ``deadline`` (``time.monotonic()``) orders waiters of the same ``priority``: the
+        earliest deadline is admitted first.
+        """
+        entry = (priority, deadline if deadline is not None else float("inf"), next(self._seq))
+        start = time.monotonic()
+        blocked: Optional[str] = None
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    if self._waiting[0] == entry:
+                        reason = self._blocked_by(self._probe())
+                        if reason is None:
+                            break
+                        if blocked is None:
+                            logger.info(f"[{name}] waiting to start a browser: {reason}")
+                        blocked = reason
+                    self._cond.wait(self.poll_interval)
+            finally:
+                # Leaving (admitted or interrupted) lets the next waiter re-check
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            ticket = Ticket(self, name)
+            self._active.append(ticket)
+            active = len(self._active)
+        waited = time.monotonic() - start
+        if blocked is not None:
+            logger.info(f"[{name}] admitted after {waited:.1f}s ({active} sessions active)")
+        try:
+            yield ticket
+        finally:
+            with self._cond:
+                self._active.remove(ticket)
+                self._cond.notify_all()
+
+    @property
+    def active(self) -> int:
+        with self._cond:
+            return len(self._active)
@@ -0,0 +1,171 @@
+"""
+Failure artifacts for WW check-in.
+
+When a run fails, :func:`capture_failure` saves what the browser still shows: a
+screenshot, the page source of the top document and of the TL_WEB_CLOCK iframe, and
+the browser console log. Collection runs on a background thread and the failing run
+waits for it at most ``timeout`` seconds before closing the browser (a hung browser
+cannot stall the failure path). Text artifacts are gzip-compressed.
+
+All failures share one directory (``ARTIFACT_DIR``) with a total size cap: the oldest
+failure directories are evicted first, so a host running many accounts cannot fill
+its disk with diagnostics.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from utils.selenium_helper import SeleniumHelper
+
+
+logger = logging.getLogger(__name__)
+
+# Raw size above which a single text artifact is cut (page sources can be huge)
+MAX_TEXT_BYTES = 5 * 1024 * 1024
+# How long interpreter exit waits for captures still being written
+EXIT_FLUSH_SECONDS = 10.0
+
+_pending: List[threading.Thread] = []
+_pending_lock = threading.Lock()
+# Concurrent failures (batch runs) evict from the same directory
+_evict_lock = threading.Lock()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactStore:
+    """One subdirectory per failure under ``root``; total size kept under ``max_bytes``."""
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def save(self, name: str, artifacts: Dict[str, bytes], meta: Dict) -> Optional[str]:
+        """Write ``artifacts`` (text ones gzipped) plus ``meta.json``; returns the directory."""
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        for filename, data in artifacts.items():
+            if filename.endswith(".png"):
+                if len(data) > MAX_TEXT_BYTES:
+                    meta.setdefault("skipped", []).append(filename)
+                    continue
+                with open(os.path.join(path, filename), "wb") as fh:
+                    fh.write(data)
+                continue
+            if len(data) > MAX_TEXT_BYTES:
+                data = data[:MAX_TEXT_BYTES]
+                meta.setdefault("truncated", []).append(filename)
+            with gzip.open(os.path.join(path, filename + ".gz"), "wb", compresslevel=6) as fh:
+                fh.write(data)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False, indent=2)
+        self.evict(keep=path)
+        return path if os.path.isdir(path) else None
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete the oldest failure directories until the store fits ``max_bytes``; returns bytes freed."""
+        if not self.max_bytes:
+            return 0
+        with _evict_lock:
+            try:
+                entries = [os.path.join(self.root, entry) for entry in os.listdir(self.root)]
+            except OSError:
+                return 0
+            dirs = sorted((p for p in entries if os.path.isdir(p)), key=os.path.getmtime)
+            sizes = {p: _dir_size(p) for p in dirs}
+            total = sum(sizes.values())
+            freed = 0
+            for path in dirs:
+                if total <= self.max_bytes:
+                    break
+                # The capture just written goes only if it alone exceeds the cap
+                if path == keep and sizes[path] <= self.max_bytes:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= sizes[path]
+                freed += sizes[path]
+            if freed:
+                cap_mb = self.max_bytes / (1024 * 1024)
+                logger.info(f"Artifact store over {cap_mb:g} MB: evicted {freed / 1024:.0f} KB")
+            return freed
+
+
+def _safe(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text)[:40] or "run"
+
+
+def capture_failure(
+    helper: "SeleniumHelper",
+    store: ArtifactStore,
+    account: str,
+    reason: str,
+    run_id: Optional[str] = None,
+    step: Optional[str] = None,
+    timeout: float = 3.0,
+) -> None:
+    """Collect and save failure artifacts in the background, waiting at most ``timeout``
+    seconds for the browser part (the caller closes the browser afterwards)."""
+    now = datetime.datetime.now()
+    name = f"{now:%Y%m%d-%H%M%S}_{_safe(account)}" + (f"_{run_id}" if run_id else "")
+    meta = {"account": account, "run_id": run_id, "step": step, "reason": reason, "captured_at": now.isoformat()}
+    collected = threading.Event()
+
+    def work() -> None:
+        try:
+            artifacts = helper.collect_diagnostics()
+        except Exception as e:
+            logger.debug(f"Artifact collection failed: {e}")
+            artifacts = {}
+        finally:
+            collected.set()
+        try:
+            path = store.save(name, artifacts, meta)
+            size = _dir_size(path) if path else 0
+            saved = ", ".join(sorted(artifacts)) or "metadata only"
+            logger.info(f"Failure artifacts: {path} ({saved}; {size / 1024:.0f} KB)")
+        except OSError as e:
+            logger.warning(f"Could not save failure artifacts: {e}")
+        finally:
+            with _pending_lock:
+                _pending.remove(threading.current_thread())
+
+    # Copy the context so records from the thread keep the run's log tags
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(work,), name="artifacts", daemon=True)
+    with _pending_lock:
+        _pending.append(thread)
+    thread.start()
+    if not collected.wait(timeout):
+        logger.warning(f"Artifact collection still running after {timeout:g}s; closing the browser anyway")
+
+
+def flush(timeout: float = EXIT_FLUSH_SECONDS) -> None:
+    """Wait (up to ``timeout`` in total) for captures still being written."""
+    deadline = datetime.datetime.now() + datetime.timedelta(seconds=timeout)
+    with _pending_lock:
+        threads = list(_pending)
+    for thread in threads:
+        thread.join(max((deadline - datetime.datetime.now()).total_seconds(), 0.0))
+
+
+atexit.register(flush)
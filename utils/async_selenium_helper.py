@@ -0,0 +1,193 @@
+"""
+Awaitable counterpart of :class:`utils.selenium_helper.SeleniumHelper`.
+
+``AsyncSeleniumHelper`` lets one asyncio event loop drive many check-in sessions at
+once instead of one process (or thread) per account:
+- every WebDriver command runs in a worker thread (``asyncio.to_thread`` semantics,
+  optionally on a caller-supplied executor) and is awaited
+- fixed pauses, retry back-off and the hold before save are ``asyncio.sleep``; element
+  waits poll with single non-blocking lookups (the session's implicit wait is 0) and
+  sleep asynchronously in between, so a waiting session holds no thread
+- commands of one session are serialized (a WebDriver session must not receive
+  concurrent commands); different sessions proceed in parallel
+
+The page logic (locators, step macros, fallbacks, outcome classification, element
+cache, run deadline) and the order of the check-in steps are the step sequences of
+the wrapped ``SeleniumHelper`` and ``utils.flow``; only the waiting is done here.
+
+Example:
+    async def punch(account):
+        helper = AsyncSeleniumHelper(settings, Deadline(settings.run_deadline))
+        try:
+            return await run_check_in_flow(helper, login_url, account.username, account.password, "Time-In")
+        finally:
+            await helper.close()
+
+    results = await asyncio.gather(*(punch(a) for a in accounts))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, Optional
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+
+from utils.config import Settings
+from utils.deadline import Deadline
+from utils.flow import Sleep, Steps, T, advance, check_in_steps
+from utils.outcome import PunchResult
+from utils.selenium_helper import SeleniumHelper, Selector
+
+
+# Lookup errors that mean "not there yet" while polling
+_NOT_YET = (NoSuchElementException, StaleElementReferenceException)
+
+
+class AsyncSeleniumHelper:
+    """Awaitable SeleniumHelper: blocking driver calls in threads, waits as async sleeps."""
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        deadline: Optional[Deadline] = None,
+        executor: Optional[Executor] = None,
+        poll_interval: float = 0.25,
+    ) -> None:
+        self.sync = SeleniumHelper(settings, deadline)
+        self.settings = self.sync.settings
+        self.deadline = self.sync.deadline
+        self.poll_interval = poll_interval
+        self._executor = executor
+        self._lock = asyncio.Lock()
+
+    @property
+    def last_popup_text(self) -> Optional[str]:
+        return self.sync.last_popup_text
+
+    # ------------------------- Primitives ------------------------- #
+    async def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run one blocking driver call in a worker thread (one at a time per session)."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        async with self._lock:
+            return await loop.run_in_executor(self._executor, call)
+
+    async def sleep(self, seconds: float) -> None:
+        """``Deadline.sleep`` without blocking the loop."""
+        self.deadline.check()
+        await asyncio.sleep(self.deadline.clamp(seconds))
+        if seconds > 0:
+            self.deadline.check()
+
+    async def wait_until(self, condition: Callable[[Any], Any], timeout: float, message: str = "") -> Any:
+        """Async ``WebDriverWait.until``: poll ``condition(driver)`` until truthy, within the budget."""
+        self.deadline.check()
+        end = time.monotonic() + self.deadline.clamp(timeout)
+        while True:
+            try:
+                value = await self.call(condition, self.sync.driver)
+                if value:
+                    return value
+            except _NOT_YET:
+                pass
+            if time.monotonic() >= end:
+                raise TimeoutException(message or f"condition not met within {timeout:g}s")
+            await asyncio.sleep(min(self.poll_interval, max(end - time.monotonic(), 0.0)))
+
+    async def run_steps(self, steps: Steps[T]) -> T:
+        """Run a step sequence (see ``utils.flow``): driver work in a thread, waits awaited."""
+        value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            done, request = await self.call(advance, steps, value, error)
+            if done:
+                return request
+            value = error = None
+            try:
+                if isinstance(request, Sleep):
+                    if request.budget:
+                        await self.sleep(request.seconds)
+                    else:
+                        await asyncio.sleep(max(request.seconds, 0.0))
+                else:
+                    value = await self.wait_until(request.condition, request.timeout, request.message)
+            except Exception as e:
+                error = e
+
+    async def start(self, initial_url: Optional[str] = None) -> None:
+        await self.call(self.sync.start, initial_url)
+        # Lookups return at once; waiting happens here, between polls
+        await self.call(self.sync.driver.implicitly_wait, 0)
+
+    async def close(self) -> None:
+        # Not behind the session lock: closing must also end a command that hangs
+        await asyncio.to_thread(self.sync.close)
+
+    async def navigate_to(self, url: str, ready: Optional[Callable] = None, timeout: Optional[float] = None):
+        return await self.run_steps(self.sync.navigate_steps(url, ready, timeout))
+
+    async def wait_for_ajax_and_ready(self, timeout: float = 10) -> None:
+        await self.run_steps(self.sync.ready_steps(timeout))
+
+    async def find_dynamic_element(
+        self,
+        selectors: Iterable[Selector],
+        element_name: str,
+        max_retries: int = 3,
+        condition=EC.presence_of_element_located,
+    ):
+        return await self.run_steps(self.sync.find_dynamic_steps(selectors, element_name, max_retries, condition))
+
+    async def run_macro(self, name: str, script: str, *args) -> Optional[dict]:
+        return await self.call(self.sync.run_macro, name, script, *args)
+
+    # ------------------------- WW-specific Flows ------------------------- #
+    async def login(self, login_url: str, username: str, password: str) -> None:
+        await self.start(login_url)
+        await self.run_steps(self.sync.login_steps(login_url, username, password))
+
+    async def click_by_id(self, element_id: str, sleep_after: float = 2.0) -> None:
+        await self.run_steps(self.sync.click_by_id_steps(element_id, sleep_after))
+
+    async def open_online_checkin_step(self) -> None:
+        await self.run_steps(self.sync.open_online_checkin_steps())
+
+    async def switch_to_clock_iframe(self) -> None:
+        await self.run_steps(self.sync.clock_iframe_steps())
+
+    async def select_punch_type(self, target_option: str, save: bool = False) -> None:
+        await self.run_steps(self.sync.select_punch_steps(target_option, save))
+
+    async def select_punch_and_save(self, target_option: str) -> None:
+        await self.select_punch_type(target_option, save=True)
+
+    async def click_save(self) -> None:
+        await self.run_steps(self.sync.click_save_steps())
+
+    async def detect_punch_outcome(self, timeout: float = 10.0, poll_interval: float = 0.2) -> PunchResult:
+        return await self.run_steps(self.sync.outcome_steps(timeout, poll_interval))
+
+
+async def run_check_in_flow(
+    helper: AsyncSeleniumHelper,
+    login_url: str,
+    username: str,
+    password: str,
+    target_punch: str,
+    delay_seconds: float = 0,
+) -> PunchResult:
+    """``ww_check_in.run_check_in_flow`` (the same steps) on the async helper.
+
+    ``delay_seconds`` is the hold before save. Crash recovery and prestage mode stay
+    with the synchronous flow.
+    """
+    # Started here so the session gets the async helper's zero implicit wait
+    await helper.start(login_url)
+    steps = check_in_steps(helper.sync, login_url, username, password, target_punch, delay_seconds)
+    return await helper.run_steps(steps)
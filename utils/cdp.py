@@ -0,0 +1,879 @@
+"""
+Chrome DevTools Protocol backend for WW check-in (``DRIVER_BACKEND=cdp``).
+
+Chrome is launched directly with ``--remote-debugging-port=0`` and driven over its
+DevTools WebSocket: no chromedriver process, no chromedriver version matching, and one
+local WebSocket round trip per command instead of HTTP to chromedriver plus its own
+DevTools hop.
+
+:class:`CdpDriver` implements the part of Selenium's WebDriver API that
+``SeleniumHelper`` uses (navigation, element lookup, click/typing/select, frame
+switching, script evaluation, cookies, screenshots, console log), and
+:class:`CdpElement` the matching WebElement part. ``WebDriverWait``, expected
+conditions and ``Select`` therefore work unchanged, and errors are raised as the
+usual Selenium exceptions so retry and crash-recovery paths behave the same.
+
+The WebSocket client is built on ``wsproto``, which Selenium already depends on.
+Limitations compared to chromedriver: frames must be same-origin (the portal's
+TL_WEB_CLOCK iframe is), ``send_keys`` inserts text without synthesizing special
+keys, and JavaScript dialogs are accepted automatically.
+"""
+
+from __future__ import annotations
+
+import base64
+import collections
+import itertools
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import types
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    JavascriptException,
+    NoSuchElementException,
+    NoSuchFrameException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Temp profile prefix; the process reaper recognizes (and cleans up after) it
+PROFILE_PREFIX = "ww-cdp-"
+# Upper bound for a single protocol command (navigation and scripts use their own timeouts)
+COMMAND_TIMEOUT = 60.0
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+_MAC_CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+
+
+def find_chrome() -> str:
+    """Path of the Chrome/Chromium binary to launch."""
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    if os.path.exists(_MAC_CHROME):
+        return _MAC_CHROME
+    raise WebDriverException("Chrome not found. Install Chrome/Chromium or set CHROME_BINARY.")
+
+
+# ------------------------- WebSocket connection ------------------------- #
+class CdpConnection:
+    """One DevTools WebSocket: commands matched to replies by id, events to listeners.
+
+    A reader thread owns the socket's receive side; callers block on their reply.
+    Sessions (``sessionId``) are multiplexed over the browser-level socket.
+    """
+
+    def __init__(self, host: str, port: int, path: str, timeout: float = 10.0) -> None:
+        from wsproto import ConnectionType, WSConnection
+        from wsproto.events import Request
+
+        self._ws = WSConnection(ConnectionType.CLIENT)
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # The reader blocks in recv() for as long as the browser lives
+        self._sock.settimeout(None)
+        self._ws_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._listeners: Dict[str, List[Callable[[dict, Optional[str]], None]]] = {}
+        self._open = threading.Event()
+        self.closed = threading.Event()
+        self.close_reason = ""
+        with self._ws_lock:
+            self._sock.sendall(self._ws.send(Request(host=f"{host}:{port}", target=path)))
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._reader.start()
+        if not self._open.wait(timeout) or self.closed.is_set():
+            self.close()
+            raise WebDriverException(f"chrome not reachable: DevTools handshake failed {self.close_reason}".strip())
+
+    def on(self, method: str, callback: Callable[[dict, Optional[str]], None]) -> None:
+        """Call ``callback(params, session_id)`` for every ``method`` event (on the reader thread)."""
+        self._listeners.setdefault(method, []).append(callback)
+
+    def send(
+        self,
+        method: str,
+        params: Optional[dict] = None,
+        session_id: Optional[str] = None,
+        timeout: Optional[float] = COMMAND_TIMEOUT,
+        wait: bool = True,
+    ) -> dict:
+        """Send a command and return its ``result``; raises on protocol errors and timeouts."""
+        from wsproto.events import TextMessage
+
+        if self.closed.is_set():
+            raise WebDriverException(f"chrome not reachable: DevTools connection closed {self.close_reason}".strip())
+        message_id = next(self._ids)
+        message: Dict[str, Any] = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        slot: Dict[str, Any] = {"done": threading.Event()}
+        if wait:
+            with self._pending_lock:
+                self._pending[message_id] = slot
+        try:
+            with self._ws_lock:
+                self._sock.sendall(self._ws.send(TextMessage(data=json.dumps(message))))
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(message_id, None)
+            raise WebDriverException(f"chrome not reachable: {e}") from e
+        if not wait:
+            return {}
+        if not slot["done"].wait(timeout):
+            with self._pending_lock:
+                self._pending.pop(message_id, None)
+            raise TimeoutException(f"timeout: no DevTools reply to {method} within {timeout:g}s")
+        reply = slot.get("reply")
+        if reply is None:
+            raise WebDriverException(f"chrome not reachable: DevTools connection closed {self.close_reason}".strip())
+        if "error" in reply:
+            error = reply["error"]
+            raise WebDriverException(f"{method}: {error.get('message')} {error.get('data', '')}".strip())
+        return reply.get("result", {})
+
+    def _read_loop(self) -> None:
+        from wsproto.events import AcceptConnection, CloseConnection, Message, Ping, RejectConnection
+
+        buffer: List[str] = []
+        try:
+            while True:
+                data = self._sock.recv(1 << 16)
+                if not data:
+                    self.close_reason = "(socket closed)"
+                    break
+                with self._ws_lock:
+                    self._ws.receive_data(data)
+                    events = list(self._ws.events())
+                for event in events:
+                    if isinstance(event, AcceptConnection):
+                        self._open.set()
+                    elif isinstance(event, RejectConnection):
+                        self.close_reason = f"(rejected: HTTP {event.status_code})"
+                        return
+                    elif isinstance(event, Ping):
+                        with self._ws_lock:
+                            self._sock.sendall(self._ws.send(event.response()))
+                    elif isinstance(event, CloseConnection):
+                        self.close_reason = f"(close code {event.code})"
+                        return
+                    elif isinstance(event, Message):
+                        buffer.append(event.data if isinstance(event.data, str) else event.data.decode("utf-8"))
+                        if event.message_finished:
+                            self._dispatch(json.loads("".join(buffer)))
+                            buffer.clear()
+        except (OSError, ValueError) as e:
+            if not self.closed.is_set():
+                self.close_reason = f"({e})"
+        finally:
+            self.closed.set()
+            self._open.set()
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for slot in pending.values():
+                slot["done"].set()
+
+    def _dispatch(self, message: dict) -> None:
+        if "id" in message:
+            with self._pending_lock:
+                slot = self._pending.pop(message["id"], None)
+            if slot is not None:
+                slot["reply"] = message
+                slot["done"].set()
+            return
+        for callback in self._listeners.get(message.get("method", ""), ()):
+            try:
+                callback(message.get("params", {}), message.get("sessionId"))
+            except Exception as e:
+                logger.debug(f"CDP event handler for {message.get('method')} failed: {e}")
+
+    def close(self) -> None:
+        self.closed.set()
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+# ------------------------- In-page helpers ------------------------- #
+_FIND_JS = """
+function (by, value, all) {
+    var root = this && this.nodeType ? this : document;
+    if (root.nodeType === 1 && !root.isConnected) throw new Error("stale element reference");
+    var doc = root.ownerDocument || root;
+    var found = [];
+    if (by === "xpath") {
+        var result = doc.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < result.snapshotLength; i++) found.push(result.snapshotItem(i));
+    } else if (by === "link text" || by === "partial link text") {
+        var links = root.querySelectorAll("a");
+        for (var j = 0; j < links.length; j++) {
+            var text = (links[j].innerText || "").trim();
+            if (by === "link text" ? text === value : text.indexOf(value) !== -1) found.push(links[j]);
+        }
+    } else {
+        var selector = value;
+        if (by === "id") selector = "#" + CSS.escape(value);
+        else if (by === "name") selector = "[name=\\"" + CSS.escape(value) + "\\"]";
+        else if (by === "class name") selector = "." + CSS.escape(value);
+        found = Array.prototype.slice.call(root.querySelectorAll(selector));
+    }
+    found = found.filter(function (n) { return n.nodeType === 1; });
+    return all ? found : (found[0] || null);
+}
+"""
+
+# Where a real mouse click on this element would land (top-level viewport coordinates)
+_CLICK_POINT_JS = """
+function () {
+    if (!this.isConnected) throw new Error("stale element reference");
+    this.scrollIntoView({block: "center", inline: "center"});
+    var rects = this.getClientRects();
+    if (!rects.length || !rects[0].width || !rects[0].height) return {hidden: true};
+    var r = rects[0];
+    var x = r.left + r.width / 2, y = r.top + r.height / 2;
+    var hit = this.ownerDocument.elementFromPoint(x, y);
+    var covered = !(hit && (hit === this || this.contains(hit)));
+    var win = this.ownerDocument.defaultView;
+    while (win.frameElement) {
+        var frame = win.frameElement, fr = frame.getBoundingClientRect();
+        x += fr.left + frame.clientLeft;
+        y += fr.top + frame.clientTop;
+        win = win.parent;
+    }
+    return {x: x, y: y, covered: covered ? (hit ? hit.outerHTML.slice(0, 120) : "nothing") : null};
+}
+"""
+
+# Options are selected the way chromedriver does it: set, then fire input/change
+_SELECT_OPTION_JS = """
+function () {
+    if (!this.isConnected) throw new Error("stale element reference");
+    var select = this.closest("select");
+    if (select && select.multiple) this.selected = !this.selected;
+    else if (!this.selected) this.selected = true;
+    else return;
+    var target = select || this;
+    target.dispatchEvent(new Event("input", {bubbles: true}));
+    target.dispatchEvent(new Event("change", {bubbles: true}));
+}
+"""
+
+_ELEMENT_JS = {
+    "tag_name": "function () { return this.tagName.toLowerCase(); }",
+    "text": """function () {
+        if (!this.isConnected) throw new Error("stale element reference");
+        return (this.innerText !== undefined ? this.innerText : this.textContent || "").trim();
+    }""",
+    "attribute": """function (name) {
+        if (!this.isConnected) throw new Error("stale element reference");
+        var prop = this[name];
+        if (prop !== undefined && prop !== null && typeof prop !== "object" && typeof prop !== "function") {
+            return typeof prop === "boolean" ? (prop ? "true" : null) : String(prop);
+        }
+        return this.getAttribute(name);
+    }""",
+    "dom_attribute": "function (name) { return this.getAttribute(name); }",
+    "property": "function (name) { return this[name]; }",
+    "displayed": """function () {
+        if (!this.isConnected) throw new Error("stale element reference");
+        var style = getComputedStyle(this);
+        if (style.display === "none" || style.visibility === "hidden") return false;
+        if (this.tagName === "OPTION") return true;
+        return this.getClientRects().length > 0;
+    }""",
+    "enabled": "function () { return !this.disabled; }",
+    "selected": "function () { return !!(this.selected || this.checked); }",
+    "focus": """function () {
+        if (!this.isConnected) throw new Error("stale element reference");
+        this.focus();
+        if (typeof this.value === "string" && this.setSelectionRange) {
+            try { this.setSelectionRange(this.value.length, this.value.length); } catch (e) {}
+        }
+    }""",
+    "clear": """function () {
+        if (!this.isConnected) throw new Error("stale element reference");
+        if (this.readOnly || this.disabled) throw new Error("element not interactable");
+        this.focus();
+        this.value = "";
+        this.dispatchEvent(new Event("input", {bubbles: true}));
+        this.dispatchEvent(new Event("change", {bubbles: true}));
+    }""",
+    "submit": """function () {
+        var form = this.form || this.closest("form");
+        if (!form) throw new Error("element is not in a form");
+        form.requestSubmit ? form.requestSubmit() : form.submit();
+    }""",
+}
+
+_ASYNC_WRAPPER = """
+function () {
+    var args = Array.prototype.slice.call(arguments), self = this;
+    return new Promise(function (resolve) {
+        args.push(resolve);
+        (function () { %s }).apply(self, args);
+    });
+}
+"""
+
+
+def _stale_or(error: WebDriverException) -> WebDriverException:
+    """Map errors about vanished nodes/contexts onto StaleElementReferenceException."""
+    text = str(error)
+    markers = ("stale element reference", "Could not find object", "Cannot find context", "No node with given id")
+    if any(marker in text for marker in markers):
+        return StaleElementReferenceException(text)
+    return error
+
+
+class CdpElement:
+    """WebElement counterpart backed by a DevTools ``RemoteObject`` id."""
+
+    def __init__(self, driver: "CdpDriver", object_id: str) -> None:
+        self._driver = driver
+        self.object_id = object_id
+
+    def __repr__(self) -> str:
+        return f"<CdpElement {self.object_id}>"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CdpElement) and self.object_id == other.object_id
+
+    def __hash__(self) -> int:
+        return hash(self.object_id)
+
+    def _call(self, declaration: str, *args) -> Any:
+        return self._driver._call_on(self.object_id, declaration, args)
+
+    @property
+    def id(self) -> str:
+        return self.object_id
+
+    @property
+    def tag_name(self) -> str:
+        return self._call(_ELEMENT_JS["tag_name"])
+
+    @property
+    def text(self) -> str:
+        return self._call(_ELEMENT_JS["text"])
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        return self._call(_ELEMENT_JS["attribute"], name)
+
+    def get_dom_attribute(self, name: str) -> Optional[str]:
+        return self._call(_ELEMENT_JS["dom_attribute"], name)
+
+    def get_property(self, name: str) -> Any:
+        return self._call(_ELEMENT_JS["property"], name)
+
+    def is_displayed(self) -> bool:
+        return bool(self._call(_ELEMENT_JS["displayed"]))
+
+    def is_enabled(self) -> bool:
+        return bool(self._call(_ELEMENT_JS["enabled"]))
+
+    def is_selected(self) -> bool:
+        return bool(self._call(_ELEMENT_JS["selected"]))
+
+    def find_element(self, by: str, value: str) -> "CdpElement":
+        return self._driver._find(by, value, root=self)
+
+    def find_elements(self, by: str, value: str) -> List["CdpElement"]:
+        return self._driver._find_all(by, value, root=self)
+
+    def click(self) -> None:
+        """Real mouse click at the element's center, like chromedriver (options are selected via JS)."""
+        if self.tag_name == "option":
+            self._call(_SELECT_OPTION_JS)
+            return
+        point = self._call(_CLICK_POINT_JS)
+        if point.get("hidden"):
+            raise ElementNotInteractableException("element not interactable: element has no size")
+        if point.get("covered"):
+            raise ElementClickInterceptedException(
+                f"element click intercepted: other element would receive the click: {point['covered']}"
+            )
+        self._driver._mouse_click(point["x"], point["y"])
+
+    def send_keys(self, *value: str) -> None:
+        self._call(_ELEMENT_JS["focus"])
+        self._driver.send("Input.insertText", {"text": "".join(str(v) for v in value)})
+
+    def clear(self) -> None:
+        try:
+            self._call(_ELEMENT_JS["clear"])
+        except JavascriptException as e:
+            raise ElementNotInteractableException(str(e)) from e
+
+    def submit(self) -> None:
+        self._call(_ELEMENT_JS["submit"])
+
+
+class _SwitchTo:
+    def __init__(self, driver: "CdpDriver") -> None:
+        self._driver = driver
+
+    def default_content(self) -> None:
+        self._driver._frame_id = None
+
+    def parent_frame(self) -> None:
+        self._driver._frame_id = self._driver._parent_frames.get(self._driver._frame_id)
+
+    def frame(self, frame_reference) -> None:
+        """Switch into an iframe given as element, name/id or index (same-origin frames)."""
+        driver = self._driver
+        if isinstance(frame_reference, int):
+            elements = driver.find_elements("css selector", "iframe, frame")
+            if frame_reference >= len(elements):
+                raise NoSuchFrameException(f"no such frame: index {frame_reference}")
+            element = elements[frame_reference]
+        elif isinstance(frame_reference, str):
+            selector = f"iframe[name='{frame_reference}'], iframe#{frame_reference}, frame[name='{frame_reference}']"
+            elements = driver.find_elements("css selector", selector)
+            if not elements:
+                raise NoSuchFrameException(f"no such frame: {frame_reference}")
+            element = elements[0]
+        else:
+            element = frame_reference
+        try:
+            node = driver.send("DOM.describeNode", {"objectId": element.object_id})["node"]
+        except WebDriverException as e:
+            raise _stale_or(e)
+        frame_id = node.get("frameId")
+        if not frame_id or node.get("nodeName", "").upper() not in ("IFRAME", "FRAME"):
+            raise NoSuchFrameException("no such frame: element is not a frame")
+        driver._parent_frames[frame_id] = driver._frame_id
+        driver._frame_id = frame_id
+
+
+class CdpDriver:
+    """The WebDriver API subset ``SeleniumHelper`` needs, over a DevTools page session."""
+
+    def __init__(
+        self,
+        connection: CdpConnection,
+        session_id: str,
+        target_id: str,
+        process: Optional[subprocess.Popen] = None,
+        profile_dir: Optional[str] = None,
+        page_load_strategy: str = "normal",
+    ) -> None:
+        self._conn = connection
+        self._session = session_id
+        self.session_id = target_id
+        # ``driver.service.process.pid`` is where SeleniumHelper (reaper, watchdog,
+        # resource sampling) looks for the root of the browser process tree
+        self.service = types.SimpleNamespace(process=process)
+        self._profile_dir = profile_dir
+        self.page_load_strategy = page_load_strategy
+        self._implicit_wait = 0.0
+        self._page_load_timeout = 300.0
+        self._script_timeout = 30.0
+        self._contexts: Dict[str, int] = {}
+        self._contexts_changed = threading.Condition()
+        self._main_frame: Optional[str] = None
+        self._frame_id: Optional[str] = None
+        self._parent_frames: Dict[Optional[str], Optional[str]] = {}
+        self._dom_ready = threading.Event()
+        self._loaded = threading.Event()
+        self._console: Deque[dict] = collections.deque(maxlen=1000)
+        self._crashed: Optional[str] = None
+        self.switch_to = _SwitchTo(self)
+
+        conn = self._conn
+        conn.on("Runtime.executionContextCreated", self._on_context_created)
+        conn.on("Runtime.executionContextDestroyed", self._on_context_destroyed)
+        conn.on("Runtime.executionContextsCleared", self._on_contexts_cleared)
+        conn.on("Page.domContentEventFired", self._for_page(lambda p: self._dom_ready.set()))
+        conn.on("Page.loadEventFired", self._for_page(lambda p: self._loaded.set()))
+        conn.on("Page.javascriptDialogOpening", self._for_page(self._on_dialog))
+        conn.on("Runtime.consoleAPICalled", self._for_page(self._on_console))
+        conn.on("Runtime.exceptionThrown", self._for_page(self._on_exception))
+        conn.on("Inspector.targetCrashed", self._for_page(lambda p: self._set_crashed("tab crashed")))
+        conn.on("Target.detachedFromTarget", self._on_detached)
+
+        self.send("Page.enable")
+        self.send("Runtime.enable")
+        try:
+            self.send("Inspector.enable")  # targetCrashed events
+        except WebDriverException:
+            pass
+        self._main_frame = self.send("Page.getFrameTree")["frameTree"]["frame"]["id"]
+
+    # ------------------------- Launch ------------------------- #
+    @classmethod
+    def launch(
+        cls,
+        binary: str,
+        arguments: List[str],
+        page_load_strategy: str = "normal",
+        startup_timeout: float = 30.0,
+    ) -> "CdpDriver":
+        """Start Chrome with a temp profile and attach to its first page."""
+        profile_dir = tempfile.mkdtemp(prefix=PROFILE_PREFIX)
+        command = [
+            binary,
+            "--remote-debugging-port=0",
+            f"--user-data-dir={profile_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            *arguments,
+        ]
+        start = time.monotonic()
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            port, path = cls._wait_for_port(process, profile_dir, startup_timeout)
+            connection = CdpConnection("127.0.0.1", port, path)
+            page = next(
+                (t for t in connection.send("Target.getTargets")["targetInfos"] if t.get("type") == "page"), None
+            )
+            if page is None:
+                target_id = connection.send("Target.createTarget", {"url": "about:blank"})["targetId"]
+            else:
+                target_id = page["targetId"]
+            session_id = connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})[
+                "sessionId"
+            ]
+            driver = cls(connection, session_id, target_id, process, profile_dir, page_load_strategy)
+        except BaseException:
+            process.kill()
+            process.wait(5)
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        logger.info(f"Chrome started over CDP in {(time.monotonic() - start) * 1000:.0f}ms (pid {process.pid})")
+        return driver
+
+    @staticmethod
+    def _wait_for_port(process: subprocess.Popen, profile_dir: str, timeout: float):
+        """Port and browser WebSocket path Chrome writes to ``DevToolsActivePort``."""
+        marker = os.path.join(profile_dir, "DevToolsActivePort")
+        limit = time.monotonic() + timeout
+        while time.monotonic() < limit:
+            if process.poll() is not None:
+                raise WebDriverException(f"Chrome exited during startup (exit code {process.returncode})")
+            try:
+                with open(marker) as fh:
+                    lines = fh.read().split()
+                if len(lines) >= 2:
+                    return int(lines[0]), lines[1]
+            except (OSError, ValueError):
+                pass
+            time.sleep(0.02)
+        raise WebDriverException(f"Chrome did not open its DevTools port within {timeout:g}s")
+
+    # ------------------------- Protocol plumbing ------------------------- #
+    def send(self, method: str, params: Optional[dict] = None, timeout: Optional[float] = COMMAND_TIMEOUT) -> dict:
+        """Send a command to this page's session."""
+        if self._crashed:
+            raise WebDriverException(self._crashed)
+        return self._conn.send(method, params, self._session, timeout)
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict) -> dict:
+        return self.send(cmd, cmd_args)
+
+    def _for_page(self, handler: Callable[[dict], None]) -> Callable[[dict, Optional[str]], None]:
+        def callback(params: dict, session_id: Optional[str]) -> None:
+            if session_id == self._session:
+                handler(params)
+
+        return callback
+
+    def _on_context_created(self, params: dict, session_id: Optional[str]) -> None:
+        context = params["context"]
+        aux = context.get("auxData") or {}
+        if session_id == self._session and aux.get("isDefault") and aux.get("frameId"):
+            with self._contexts_changed:
+                self._contexts[aux["frameId"]] = context["id"]
+                self._contexts_changed.notify_all()
+
+    def _on_context_destroyed(self, params: dict, session_id: Optional[str]) -> None:
+        if session_id == self._session:
+            with self._contexts_changed:
+                for frame, context in list(self._contexts.items()):
+                    if context == params["executionContextId"]:
+                        del self._contexts[frame]
+
+    def _on_contexts_cleared(self, params: dict, session_id: Optional[str]) -> None:
+        if session_id == self._session:
+            with self._contexts_changed:
+                self._contexts.clear()
+
+    def _on_dialog(self, params: dict) -> None:
+        logger.info(f"Accepting JavaScript {params.get('type')} dialog: {params.get('message')}")
+        self._conn.send("Page.handleJavaScriptDialog", {"accept": True}, self._session, wait=False)
+
+    def _on_console(self, params: dict) -> None:
+        levels = {"error": "SEVERE", "warning": "WARNING", "debug": "DEBUG"}
+        text = " ".join(str(a.get("value", a.get("description", ""))) for a in params.get("args", []))
+        self._console.append(
+            {
+                "level": levels.get(params.get("type"), "INFO"),
+                "message": text,
+                "source": "console-api",
+                "timestamp": int(params.get("timestamp", time.time() * 1000)),
+            }
+        )
+
+    def _on_exception(self, params: dict) -> None:
+        details = params.get("exceptionDetails", {})
+        description = (details.get("exception") or {}).get("description") or details.get("text", "")
+        self._console.append(
+            {
+                "level": "SEVERE",
+                "message": f"{details.get('url', '')} {details.get('lineNumber', '')}:{description}",
+                "source": "javascript",
+                "timestamp": int(params.get("timestamp", time.time() * 1000)),
+            }
+        )
+
+    def _on_detached(self, params: dict, session_id: Optional[str]) -> None:
+        if params.get("sessionId") == self._session:
+            self._set_crashed("no such window: target window already closed")
+
+    def _set_crashed(self, reason: str) -> None:
+        self._crashed = reason
+        with self._contexts_changed:
+            self._contexts_changed.notify_all()
+
+    def _context(self) -> int:
+        """Execution context of the current frame, waiting briefly while it is being replaced."""
+        frame = self._frame_id or self._main_frame
+        # The top document may be mid-navigation; a frame without a document is gone
+        limit = time.monotonic() + (max(self._page_load_timeout, 1.0) if self._frame_id is None else 5.0)
+        with self._contexts_changed:
+            while frame not in self._contexts:
+                if self._crashed:
+                    raise WebDriverException(self._crashed)
+                if self._conn.closed.is_set():
+                    raise WebDriverException("chrome not reachable: DevTools connection closed")
+                remaining = limit - time.monotonic()
+                if remaining <= 0:
+                    if self._frame_id is not None:
+                        raise NoSuchFrameException("no such frame: frame has no document")
+                    raise TimeoutException("timeout: page has no JavaScript context")
+                self._contexts_changed.wait(min(remaining, 0.5))
+            return self._contexts[frame]
+
+    @staticmethod
+    def _argument(value: Any) -> dict:
+        if isinstance(value, CdpElement):
+            return {"objectId": value.object_id}
+        if isinstance(value, (list, tuple)) and any(isinstance(v, CdpElement) for v in value):
+            raise WebDriverException("Lists of elements cannot be passed as script arguments")
+        return {"value": value}
+
+    def _evaluate(self, params: dict, timeout: Optional[float] = COMMAND_TIMEOUT) -> Any:
+        params.setdefault("objectGroup", "ww")
+        params.setdefault("userGesture", True)
+        try:
+            reply = self.send("Runtime.callFunctionOn", params, timeout)
+        except TimeoutException:
+            raise
+        except WebDriverException as e:
+            raise _stale_or(e)
+        details = reply.get("exceptionDetails")
+        if details:
+            description = (details.get("exception") or {}).get("description") or details.get("text", "")
+            if "stale element reference" in description:
+                raise StaleElementReferenceException(description)
+            raise JavascriptException(f"javascript error: {description}")
+        return self._unwrap(reply["result"])
+
+    def _unwrap(self, remote: dict) -> Any:
+        """Turn a RemoteObject into a Python value (DOM nodes become CdpElement)."""
+        if remote.get("subtype") == "node":
+            return CdpElement(self, remote["objectId"])
+        if remote.get("subtype") == "null" or remote.get("type") == "undefined":
+            return None
+        if "objectId" not in remote:
+            return remote.get("value")
+        if remote.get("subtype") == "array":
+            props = self.send("Runtime.getProperties", {"objectId": remote["objectId"], "ownProperties": True})
+            items = sorted(
+                (int(p["name"]), p["value"]) for p in props["result"] if p["name"].isdigit() and "value" in p
+            )
+            if any(value.get("subtype") == "node" for _, value in items):
+                return [self._unwrap(value) for _, value in items]
+        reply = self.send(
+            "Runtime.callFunctionOn",
+            {"objectId": remote["objectId"], "functionDeclaration": "function () { return this; }", "returnByValue": True},
+        )
+        return reply["result"].get("value")
+
+    def _call_on(self, object_id: str, declaration: str, args=()) -> Any:
+        return self._evaluate(
+            {"objectId": object_id, "functionDeclaration": declaration, "arguments": [self._argument(a) for a in args]}
+        )
+
+    def _mouse_click(self, x: float, y: float) -> None:
+        for kind in ("mouseMoved", "mousePressed", "mouseReleased"):
+            event = {"type": kind, "x": x, "y": y}
+            if kind != "mouseMoved":
+                event.update(button="left", clickCount=1)
+            self.send("Input.dispatchMouseEvent", event)
+
+    # ------------------------- WebDriver API ------------------------- #
+    def implicitly_wait(self, time_to_wait: float) -> None:
+        self._implicit_wait = float(time_to_wait)
+
+    def set_page_load_timeout(self, time_to_wait: float) -> None:
+        self._page_load_timeout = float(time_to_wait)
+
+    def set_script_timeout(self, time_to_wait: float) -> None:
+        self._script_timeout = float(time_to_wait)
+
+    def get(self, url: str) -> None:
+        """Navigate the top frame, waiting per the page-load strategy (``none``: not at all)."""
+        self._frame_id = None
+        self._parent_frames.clear()
+        self._dom_ready.clear()
+        self._loaded.clear()
+        result = self.send("Page.navigate", {"url": url}, timeout=self._page_load_timeout)
+        if result.get("errorText"):
+            raise WebDriverException(f"unknown error: {result['errorText']} ({url})")
+        if not result.get("loaderId") or self.page_load_strategy == "none":
+            return  # same-document navigation, or not waiting
+        event = self._loaded if self.page_load_strategy == "normal" else self._dom_ready
+        if not event.wait(self._page_load_timeout):
+            raise TimeoutException(f"timeout: page load of {url} exceeded {self._page_load_timeout:g}s")
+
+    @property
+    def current_url(self) -> str:
+        return self.execute_script("return document.location.href")
+
+    @property
+    def title(self) -> str:
+        return self.execute_script("return document.title")
+
+    @property
+    def page_source(self) -> str:
+        return self.execute_script("return document.documentElement.outerHTML")
+
+    def execute_script(self, script: str, *args) -> Any:
+        return self._evaluate(
+            {
+                "executionContextId": self._context(),
+                "functionDeclaration": f"function () {{ {script}\n}}",
+                "arguments": [self._argument(a) for a in args],
+            }
+        )
+
+    def execute_async_script(self, script: str, *args) -> Any:
+        """Run ``script`` with a completion callback as its last argument (like Selenium)."""
+        context = self._context()
+        try:
+            return self._evaluate(
+                {
+                    "executionContextId": context,
+                    "functionDeclaration": _ASYNC_WRAPPER % script,
+                    "arguments": [self._argument(a) for a in args],
+                    "awaitPromise": True,
+                },
+                timeout=self._script_timeout,
+            )
+        except TimeoutException:
+            raise TimeoutException(f"script timeout: result was not received in {self._script_timeout:g} seconds")
+
+    def _find_once(self, by: str, value: str, root: Optional[CdpElement], all_: bool) -> Any:
+        if root is not None:
+            return self._call_on(root.object_id, _FIND_JS, (by, value, all_))
+        return self._evaluate(
+            {
+                "executionContextId": self._context(),
+                "functionDeclaration": _FIND_JS,
+                "arguments": [{"value": by}, {"value": value}, {"value": all_}],
+            }
+        )
+
+    def _find(self, by: str, value: str, root: Optional[CdpElement] = None) -> CdpElement:
+        limit = time.monotonic() + self._implicit_wait
+        while True:
+            element = self._find_once(by, value, root, False)
+            if element is not None:
+                return element
+            if time.monotonic() >= limit:
+                raise NoSuchElementException(f"no such element: Unable to locate element: {by}={value}")
+            time.sleep(0.1)
+
+    def _find_all(self, by: str, value: str, root: Optional[CdpElement] = None) -> List[CdpElement]:
+        limit = time.monotonic() + self._implicit_wait
+        while True:
+            elements = self._find_once(by, value, root, True) or []
+            if elements or time.monotonic() >= limit:
+                return elements
+            time.sleep(0.1)
+
+    def find_element(self, by: str = "id", value: Optional[str] = None) -> CdpElement:
+        return self._find(by, value)
+
+    def find_elements(self, by: str = "id", value: Optional[str] = None) -> List[CdpElement]:
+        return self._find_all(by, value)
+
+    def get_cookies(self) -> List[dict]:
+        cookies = []
+        for cookie in self.send("Network.getCookies")["cookies"]:
+            converted = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly")}
+            if not cookie.get("session") and cookie.get("expires", -1) > 0:
+                converted["expiry"] = int(cookie["expires"])
+            if cookie.get("sameSite"):
+                converted["sameSite"] = cookie["sameSite"]
+            cookies.append(converted)
+        return cookies
+
+    def add_cookie(self, cookie: dict) -> None:
+        param = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in cookie}
+        if "domain" not in param:
+            param["url"] = self.current_url
+        if "expiry" in cookie:
+            param["expires"] = cookie["expiry"]
+        if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+            param["sameSite"] = cookie["sameSite"]
+        if not self.send("Network.setCookie", param).get("success", True):
+            raise WebDriverException(f"unable to set cookie {cookie.get('name')}")
+
+    def get_screenshot_as_png(self) -> bytes:
+        return base64.b64decode(self.send("Page.captureScreenshot", {"format": "png"})["data"])
+
+    def get_log(self, log_type: str) -> List[dict]:
+        """Console messages and uncaught exceptions since the last call (``browser`` only)."""
+        if log_type != "browser":
+            return []
+        entries = list(self._console)
+        self._console.clear()
+        return entries
+
+    def quit(self) -> None:
+        """Close Chrome, wait for it to exit and remove its temp profile."""
+        process = self.service.process
+        try:
+            if not self._conn.closed.is_set():
+                self._conn.send("Browser.close", timeout=5.0)
+        except WebDriverException as e:
+            logger.debug(f"Browser.close failed: {e}")
+        finally:
+            self._conn.close()
+            if process is not None:
+                try:
+                    process.wait(5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait(5)
+            if self._profile_dir:
+                shutil.rmtree(self._profile_dir, ignore_errors=True)
@@ -0,0 +1,65 @@
+"""
+Checkpoints for resuming a punch after a browser crash.
+
+The flow records how far it got (:class:`Checkpoint`) together with what is needed to
+get back there without starting over: the portal session cookies, the landing page
+URL after login and the TL_WEB_CLOCK page URL (its iframe ``src``, usable as a deep
+link). After Chrome or chromedriver dies, the driver is restarted, the cookies are
+restored and the flow resumes from the last checkpoint.
+
+The save click is a one-way door: once ``SAVE_SENT`` is reached the save is never
+issued again, whatever happens afterwards.
+"""
+
+from __future__ import annotations
+
+import enum
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+class Checkpoint(enum.IntEnum):
+    START = 0
+    LOGGED_IN = 1  # landing page reached; cookies captured
+    CLOCK_FORM = 2  # TL_WEB_CLOCK page reached; deep link captured
+    SAVE_SENT = 3  # save is about to be / has been clicked
+
+
+@dataclass
+class FlowState:
+    checkpoint: Checkpoint = Checkpoint.START
+    cookies: List[Dict] = field(default_factory=list)
+    landing_url: Optional[str] = None
+    clock_url: Optional[str] = None
+    # ``time.monotonic()`` at which the hold-mode delay ends (set once, kept across restarts)
+    hold_until: Optional[float] = None
+    recoveries: int = 0
+
+    def reach(self, checkpoint: Checkpoint) -> None:
+        if checkpoint > self.checkpoint:
+            self.checkpoint = checkpoint
+
+
+# Messages WebDriver / urllib3 produce when Chrome or chromedriver is gone
+_CRASH_MARKERS = (
+    "invalid session id",
+    "chrome not reachable",
+    "session deleted",
+    "tab crashed",
+    "page crash",
+    "disconnected",
+    "no such window",
+    "target window already closed",
+    "connection refused",
+    "max retries exceeded",
+    "remote end closed connection",
+    "connection reset",
+)
+
+
+def is_browser_crash(exc: BaseException) -> bool:
+    """Whether ``exc`` means the browser or driver process died (as opposed to a page problem)."""
+    if isinstance(exc, ConnectionError):
+        return True
+    text = f"{type(exc).__name__}: {exc}".lower()
+    return any(marker in text for marker in _CRASH_MARKERS)
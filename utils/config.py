@@ -5,16 +5,41 @@ Default precedence: environment variables override .env.
 Set PREFER_DOTENV=true to make .env override environment variables for this process.
 
 Supports explicit .env path via DOTENV_PATH or DOTENV_FILE.
+
+The .env file is parsed once into an immutable, typed ``Settings`` snapshot that is
+passed to components. Long-running modes can start a ``ConfigWatcher`` that swaps in a
+new snapshot atomically when the .env file changes; an invalid edit keeps the previous
+snapshot. The current snapshot's .env values are also exported into the process
+environment (never overriding it), for Chrome, chromedriver and webdriver-manager.
 """
 
 from __future__ import annotations
 
+import datetime
+import logging
 import os
-from typing import Optional
-from dotenv import load_dotenv, dotenv_values, find_dotenv
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOGIN_URL = "https://hr.wiwynn.com/psc/hcmprd/?cmd=login&languageCd=ZHT"
+SUBMIT_MODES = ("hold", "deferred", "prestage")
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+CHROME_PROFILES = ("default", "lean")
+DRIVER_BACKENDS = ("local", "remote", "cdp")
+LOG_FORMATS = ("json", "text")
+
+
+class ConfigError(ValueError):
+    """Raised when configuration values fail validation."""
 
 
 def _resolve_dotenv_path() -> Optional[str]:
+    from dotenv import find_dotenv
+
     # Allow explicit override via env
     explicit = os.getenv("DOTENV_PATH") or os.getenv("DOTENV_FILE")
     if explicit and os.path.exists(explicit):
@@ -24,27 +49,433 @@ def _resolve_dotenv_path() -> Optional[str]:
     return path if path else None
 
 
-_DOTENV_PATH = _resolve_dotenv_path()
-_DOTENV_MAP = dotenv_values(_DOTENV_PATH) if _DOTENV_PATH else {}
+def _dotenv_watch_path() -> str:
+    """Where a .env would be loaded from, whether or not it exists yet."""
+    explicit = os.getenv("DOTENV_PATH") or os.getenv("DOTENV_FILE")
+    if explicit:
+        return explicit
+    # find_dotenv walks up from this package, so a new file at the project root is picked up
+    return _resolve_dotenv_path() or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
 
-# Load into process env without overriding existing env vars
-load_dotenv(dotenv_path=_DOTENV_PATH, override=False)
 
+# .env values this process exported into os.environ, so that a reload can tell them
+# from the real environment and replace them
+_exported: Dict[str, str] = {}
+_export_lock = threading.Lock()
 
-def get_config_value(key: str, default: Optional[str] = None) -> Optional[str]:
-    """Get configuration with precedence control.
+
+def _getenv(key: str) -> Optional[str]:
+    """``os.getenv`` that ignores values exported from .env by :func:`_export_dotenv`."""
+    value = os.environ.get(key)
+    return None if key in _exported and _exported[key] == value else value
+
+
+def _export_dotenv(dotenv_map: Mapping[str, Optional[str]]) -> None:
+    """Export .env values into ``os.environ`` without overriding the real environment.
+
+    Chrome, chromedriver and webdriver-manager read their settings (proxy, ``WDM_*``)
+    from the environment, not from :class:`Settings`. Values exported from a previous
+    snapshot are updated or removed.
+    """
+    with _export_lock:
+        for key, value in list(_exported.items()):
+            del _exported[key]
+            if os.environ.get(key) != value:
+                continue  # set by someone else since
+            new = dotenv_map.get(key)
+            if new is None:
+                del os.environ[key]
+            else:
+                os.environ[key] = _exported[key] = new
+        for key, value in dotenv_map.items():
+            if value is not None and key not in os.environ:
+                os.environ[key] = value
+                _exported[key] = value
+
+
+def _lookup(key: str, dotenv_map: Mapping[str, Optional[str]], default: Optional[str] = None) -> Optional[str]:
+    """Resolve ``key`` with precedence control.
 
     Precedence (default):
     - env var -> .env -> default
 
-    If PREFER_DOTENV=true:
+    If PREFER_DOTENV=true (in the environment or in .env):
     - .env -> env var -> default
     """
-    prefer_dotenv = os.getenv("PREFER_DOTENV", "false").lower() == "true"
+    prefer_dotenv = (_getenv("PREFER_DOTENV") or dotenv_map.get("PREFER_DOTENV") or "false").lower() == "true"
 
-    env_val = os.getenv(key)
-    dotenv_val = _DOTENV_MAP.get(key)
+    env_val = _getenv(key)
+    dotenv_val = dotenv_map.get(key)
 
     if prefer_dotenv:
         return dotenv_val if dotenv_val not in (None, "") else (env_val if env_val not in (None, "") else default)
     return env_val if env_val not in (None, "") else (dotenv_val if dotenv_val not in (None, "") else default)
+
+
+def strip_comment(value: str) -> str:
+    """Drop an inline ``# comment`` (``podman --env-file`` passes them through verbatim)."""
+    return value.split("#", 1)[0].strip()
+
+
+def parse_work_days(value: str) -> FrozenSet[int]:
+    """Parse "1,2,3,4" or "1-4" (or a mix) into ISO weekday numbers."""
+    days = set()
+    for part in strip_comment(value).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = (int(x) for x in part.split("-", 1))
+            days.update(range(lo, hi + 1))
+        else:
+            days.add(int(part))
+    invalid = [d for d in days if not 1 <= d <= 7]
+    if invalid:
+        raise ValueError(f"Invalid WORK_DAYS entries: {invalid} (expected 1=Monday .. 7=Sunday)")
+    return frozenset(days)
+
+
+def parse_url_list(value: str) -> Tuple[str, ...]:
+    """Parse a comma-separated list of http(s) URLs."""
+    urls = tuple(part.strip().rstrip("/") for part in strip_comment(value).split(",") if part.strip())
+    invalid = [url for url in urls if not url.startswith(("http://", "https://"))]
+    if invalid:
+        raise ValueError(f"Invalid URLs: {invalid} (expected http://host:port[/path])")
+    return urls
+
+
+def parse_clock(value: str) -> datetime.time:
+    """Parse HH:MM or HH:MM:SS."""
+    parts = [int(p) for p in strip_comment(value).split(":")]
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid time: {value} (expected HH:MM or HH:MM:SS)")
+    return datetime.time(*parts)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable, validated configuration snapshot."""
+
+    login_url: str = DEFAULT_LOGIN_URL
+    username: Optional[str] = None
+    password: Optional[str] = field(default=None, repr=False)
+
+    # Logging
+    log_level: str = "INFO"
+    log_file: str = "logs/ww_check_in.log"
+    log_format: str = "json"  # format of LOG_FILE; stdout is always text
+    log_stdout: bool = True
+    log_max_bytes: int = 5 * 1024 * 1024
+    log_backups: int = 5
+    log_max_age_days: float = 7.0
+    # Per-run volume budget: INFO/DEBUG records kept per run, and repeats of one message
+    # before it is sampled (0 = unlimited)
+    log_run_budget: int = 2000
+    log_repeat_limit: int = 5
+
+    # Selenium
+    headless: bool = False
+    implicit_wait: int = 10
+    page_load_timeout: int = 30
+    # normal: wait for every sub-resource; eager: DOM ready; none: return at once.
+    # Navigations wait for their own readiness predicate instead.
+    page_load_strategy: str = "eager"
+    chrome_binary: Optional[str] = None
+    chromedriver_path: Optional[str] = None
+    use_webdriver_manager: bool = True
+    # default: 1440x900 window; lean: small viewport, no extensions/background services,
+    # capped renderer count and JS heap
+    chrome_profile: str = "default"
+    # local: chromedriver on this host; remote: WebDriver server / Selenium Grid;
+    # cdp: Chrome on this host driven over DevTools, without chromedriver
+    driver_backend: str = "local"
+    remote_webdriver_urls: Tuple[str, ...] = ()
+    remote_health_timeout: float = 2.0  # seconds per /status check
+    remote_retry_after: float = 60.0  # seconds an endpoint is skipped after failing
+    # Sample peak RSS / CPU of the browser process tree per step
+    resource_sampling: bool = True
+    # Run each UI step as one injected script (falls back to element-by-element on failure)
+    step_macros: bool = True
+
+    # Submit timing
+    submit_mode: str = "hold"
+    submit_at: Optional[str] = None
+    keepalive_interval: float = 60.0
+    # Wall-clock budget for one punch from browser start to outcome (0: no limit);
+    # the random hold / prestage wait before save does not count
+    run_deadline: float = 120.0
+    # Browser restarts per punch after Chrome/chromedriver crashes (resuming from the last checkpoint)
+    crash_retries: int = 2
+    # Watchdog kills the browser tree this long after hold + RUN_DEADLINE_SECONDS
+    watchdog_grace: float = 30.0
+    # Kill orphaned automation Chrome/chromedriver and stale temp profiles at startup
+    reap_on_start: bool = True
+
+    # Schedule
+    work_days: Optional[FrozenSet[int]] = None
+    work_start: Optional[datetime.time] = None
+    work_end: Optional[datetime.time] = None
+    skip_dates_file: Optional[str] = None
+
+    # Batch / fleet
+    accounts_file: Optional[str] = None
+    logins_per_second: float = 0.5
+    max_sessions: int = 4
+    stagger_window: float = 600.0
+    stagger_seed: Optional[str] = None
+    # Start batch sessions only while their memory fits (MAX_SESSIONS stays the upper cap)
+    admission_control: bool = True
+    session_footprint_mb: float = 350.0  # initial estimate; follows measured peak RSS
+    memory_reserve_mb: float = 256.0  # kept free for everything else
+    max_load_per_cpu: float = 1.5
+
+    # Failure artifacts (screenshot, page sources, console log)
+    artifacts_enabled: bool = True
+    artifact_dir: str = "logs/artifacts"
+    artifact_max_mb: float = 200.0
+    # How long a failing run waits for the browser part of the capture
+    artifact_capture_timeout: float = 3.0
+
+    # Run ledger / locking
+    ledger_enabled: bool = True
+    ledger_path: str = "logs/ww_ledger.sqlite3"
+    lock_dir: str = "logs"
+
+    # Where this snapshot came from; ``raw`` keeps .env values for keys without a field
+    dotenv_path: Optional[str] = None
+    raw: Mapping[str, Optional[str]] = field(default_factory=dict, repr=False, compare=False)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Untyped lookup with the usual env/.env precedence, for keys not modelled above."""
+        return _lookup(key, self.raw, default)
+
+
+def load_settings(dotenv_path: Optional[str] = None) -> Settings:
+    """Parse .env once, merge with the environment and validate every value.
+
+    Raises:
+        ConfigError: listing every invalid value found
+    """
+    from dotenv import dotenv_values
+
+    path = dotenv_path or _resolve_dotenv_path()
+    dotenv_map: Dict[str, Optional[str]] = dict(dotenv_values(path)) if path else {}
+    errors: List[str] = []
+
+    def _str(key: str, default: Optional[str] = None) -> Optional[str]:
+        value = _lookup(key, dotenv_map, default)
+        return strip_comment(value) if isinstance(value, str) else value
+
+    def _bool(key: str, default: bool) -> bool:
+        return str(_str(key, "true" if default else "false")).lower() == "true"
+
+    def _num(key: str, default, cast):
+        raw = _str(key)
+        if raw is None:
+            return default
+        try:
+            value = cast(raw)
+        except ValueError:
+            errors.append(f"{key}={raw!r} is not a valid {cast.__name__}")
+            return default
+        if value < 0:
+            errors.append(f"{key}={raw!r} must not be negative")
+            return default
+        return value
+
+    def _parsed(key: str, parser):
+        raw = _str(key)
+        if raw is None:
+            return None
+        try:
+            return parser(raw)
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+            return None
+
+    submit_mode = str(_str("SUBMIT_MODE", "hold")).lower()
+    if submit_mode not in SUBMIT_MODES:
+        errors.append(f"SUBMIT_MODE={submit_mode!r} (expected one of {', '.join(SUBMIT_MODES)})")
+        submit_mode = "hold"
+    page_load_strategy = str(_str("PAGE_LOAD_STRATEGY", "eager")).lower()
+    if page_load_strategy not in PAGE_LOAD_STRATEGIES:
+        errors.append(
+            f"PAGE_LOAD_STRATEGY={page_load_strategy!r} (expected one of {', '.join(PAGE_LOAD_STRATEGIES)})"
+        )
+        page_load_strategy = "eager"
+    log_format = str(_str("LOG_FORMAT", "json")).lower()
+    if log_format not in LOG_FORMATS:
+        errors.append(f"LOG_FORMAT={log_format!r} (expected one of {', '.join(LOG_FORMATS)})")
+        log_format = "json"
+    chrome_profile = str(_str("CHROME_PROFILE", "default")).lower()
+    if chrome_profile not in CHROME_PROFILES:
+        errors.append(f"CHROME_PROFILE={chrome_profile!r} (expected one of {', '.join(CHROME_PROFILES)})")
+        chrome_profile = "default"
+    driver_backend = str(_str("DRIVER_BACKEND", "local")).lower()
+    if driver_backend not in DRIVER_BACKENDS:
+        errors.append(f"DRIVER_BACKEND={driver_backend!r} (expected one of {', '.join(DRIVER_BACKENDS)})")
+        driver_backend = "local"
+    remote_webdriver_urls = _parsed("REMOTE_WEBDRIVER_URLS", parse_url_list) or ()
+    if driver_backend == "remote" and not remote_webdriver_urls:
+        errors.append("DRIVER_BACKEND=remote requires REMOTE_WEBDRIVER_URLS")
+    submit_at = _str("SUBMIT_AT")
+    if submit_at is not None and _parsed("SUBMIT_AT", parse_clock) is None:
+        submit_at = None
+
+    settings = Settings(
+        login_url=str(_str("LOGIN_URL", DEFAULT_LOGIN_URL)),
+        username=_str("WW_USERNAME"),
+        password=_lookup("WW_PASSWORD", dotenv_map),
+        log_level=str(_str("LOG_LEVEL", "INFO")).upper(),
+        log_file=str(_str("LOG_FILE", "logs/ww_check_in.log")),
+        log_format=log_format,
+        log_stdout=_bool("LOG_STDOUT", True),
+        log_max_bytes=_num("LOG_MAX_BYTES", 5 * 1024 * 1024, int),
+        log_backups=_num("LOG_BACKUPS", 5, int),
+        log_max_age_days=_num("LOG_MAX_AGE_DAYS", 7.0, float),
+        log_run_budget=_num("LOG_RUN_BUDGET", 2000, int),
+        log_repeat_limit=_num("LOG_REPEAT_LIMIT", 5, int),
+        headless=_bool("HEADLESS", False),
+        implicit_wait=_num("IMPLICIT_WAIT", 10, int),
+        page_load_timeout=_num("PAGE_LOAD_TIMEOUT", 30, int),
+        page_load_strategy=page_load_strategy,
+        chrome_binary=_str("CHROME_BINARY"),
+        chromedriver_path=_str("CHROMEDRIVER_PATH"),
+        use_webdriver_manager=_bool("USE_WEBDRIVER_MANAGER", True),
+        chrome_profile=chrome_profile,
+        driver_backend=driver_backend,
+        remote_webdriver_urls=remote_webdriver_urls,
+        remote_health_timeout=_num("REMOTE_HEALTH_TIMEOUT", 2.0, float),
+        remote_retry_after=_num("REMOTE_RETRY_AFTER", 60.0, float),
+        resource_sampling=_bool("RESOURCE_SAMPLING", True),
+        step_macros=_bool("STEP_MACROS", True),
+        submit_mode=submit_mode,
+        submit_at=submit_at,
+        keepalive_interval=_num("KEEPALIVE_INTERVAL", 60.0, float),
+        run_deadline=_num("RUN_DEADLINE_SECONDS", 120.0, float),
+        crash_retries=_num("CRASH_RETRIES", 2, int),
+        watchdog_grace=_num("WATCHDOG_GRACE", 30.0, float),
+        reap_on_start=_bool("REAP_ON_START", True),
+        work_days=_parsed("WORK_DAYS", parse_work_days),
+        work_start=_parsed("WORK_START_TIME", parse_clock),
+        work_end=_parsed("WORK_END_TIME", parse_clock),
+        skip_dates_file=_str("SKIP_DATES_FILE"),
+        accounts_file=_str("ACCOUNTS_FILE"),
+        logins_per_second=_num("LOGINS_PER_SECOND", 0.5, float),
+        max_sessions=_num("MAX_SESSIONS", 4, int),
+        stagger_window=_num("STAGGER_WINDOW", 600.0, float),
+        stagger_seed=_str("STAGGER_SEED"),
+        admission_control=_bool("ADMISSION_CONTROL", True),
+        session_footprint_mb=_num("SESSION_FOOTPRINT_MB", 350.0, float),
+        memory_reserve_mb=_num("MEMORY_RESERVE_MB", 256.0, float),
+        max_load_per_cpu=_num("MAX_LOAD_PER_CPU", 1.5, float),
+        ledger_enabled=_bool("LEDGER_ENABLED", True),
+        artifacts_enabled=_bool("ARTIFACTS_ENABLED", True),
+        artifact_dir=str(_str("ARTIFACT_DIR", "logs/artifacts")),
+        artifact_max_mb=_num("ARTIFACT_MAX_MB", 200.0, float),
+        artifact_capture_timeout=_num("ARTIFACT_CAPTURE_TIMEOUT", 3.0, float),
+        ledger_path=str(_str("LEDGER_PATH", "logs/ww_ledger.sqlite3")),
+        lock_dir=str(_str("LOCK_DIR", "logs")),
+        dotenv_path=path,
+        raw=dotenv_map,
+    )
+    if errors:
+        raise ConfigError("Invalid configuration: " + "; ".join(errors))
+    return settings
+
+
+_current: Optional[Settings] = None
+_current_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Return the current snapshot, loading it on first use."""
+    global _current
+    if _current is None:
+        with _current_lock:
+            if _current is None:
+                _current = load_settings()
+                _export_dotenv(_current.raw)
+    return _current
+
+
+def reload_settings() -> Settings:
+    """Re-read .env and atomically replace the current snapshot (kept as is on error)."""
+    global _current
+    settings = load_settings()
+    with _current_lock:
+        _current = settings
+        _export_dotenv(settings.raw)
+    return settings
+
+
+def get_config_value(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Get configuration with precedence control (env var -> .env -> default by default).
+
+    Prefer the typed fields on :func:`get_settings`; this remains for ad-hoc keys.
+    """
+    if _current is not None:
+        return _lookup(key, _current.raw, default)
+    from dotenv import dotenv_values
+
+    path = _resolve_dotenv_path()
+    return _lookup(key, dotenv_values(path) if path else {}, default)
+
+
+class ConfigWatcher:
+    """Poll the .env file's mtime and hot-swap the settings snapshot when it changes."""
+
+    def __init__(
+        self,
+        interval: float = 2.0,
+        on_change: Optional[Callable[[Settings], None]] = None,
+    ) -> None:
+        self.interval = interval
+        self.on_change = on_change
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Watch where .env would be read from even if it does not exist yet, so a file
+        # created after startup is loaded too
+        self._path = get_settings().dotenv_path or _dotenv_watch_path()
+        self._mtime = self._stat()
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self._path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check. Returns True when a new snapshot was applied."""
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            settings = reload_settings()
+        except ConfigError as e:
+            logger.error(f"Ignoring .env change, keeping previous configuration: {e}")
+            return False
+        logger.info(f"Configuration reloaded from {self._path}")
+        if self.on_change is not None:
+            self.on_change(settings)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # never let the watcher thread die
+                logger.debug(f"Config watcher error: {e}")
+
+    def start(self) -> "ConfigWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -0,0 +1,79 @@
+"""
+Run-level time budget for WW check-in.
+
+A :class:`Deadline` is created per punch and handed to ``SeleniumHelper``; every wait,
+retry and sleep is clamped to what is left of the budget, so a hanging portal aborts
+the run cleanly instead of stacking per-call timeouts. Planned waits (the random hold
+before save, the prestage hold) run inside :meth:`Deadline.paused` and do not count.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import time
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run used up its budget; ``step`` is the step that was running at the time."""
+
+    def __init__(self, budget: float, step: Optional[str]) -> None:
+        self.budget = budget
+        self.step = step
+        super().__init__(f"run deadline of {budget:g}s exceeded during {step or 'startup'}")
+
+
+class Deadline:
+    """Monotonic end time plus the label of the step currently consuming it.
+
+    ``seconds`` of None or 0 means no limit.
+    """
+
+    def __init__(self, seconds: Optional[float] = None) -> None:
+        self.budget = float(seconds) if seconds else math.inf
+        self.step: Optional[str] = None
+        self._end = time.monotonic() + self.budget
+
+    def restart(self) -> None:
+        """Start the full budget again from now."""
+        self._end = time.monotonic() + self.budget
+
+    def remaining(self) -> float:
+        return self._end - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def clamp(self, timeout: float) -> float:
+        """``timeout`` limited to the remaining budget (never negative)."""
+        return max(0.0, min(timeout, self.remaining()))
+
+    def check(self) -> None:
+        """Raise :class:`DeadlineExceeded` if the budget is used up."""
+        if self.expired:
+            raise self.exceeded()
+
+    def exceeded(self) -> DeadlineExceeded:
+        return DeadlineExceeded(self.budget, self.step)
+
+    def mark(self, step: str) -> None:
+        """Record which step is consuming the budget from now on."""
+        self.step = step
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep at most the remaining budget; raise if the budget runs out first."""
+        self.check()
+        time.sleep(self.clamp(seconds))
+        if seconds > 0:
+            self.check()
+
+    @contextlib.contextmanager
+    def paused(self) -> Iterator[None]:
+        """Exclude the block's duration (planned waits) from the budget."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._end += time.monotonic() - start
@@ -0,0 +1,204 @@
+"""
+Fleet dispatcher for running many accounts against the portal at once.
+
+- Deterministic, evenly spread start offsets per account (seeded), instead of an
+  independent random delay per process
+- Token bucket limiting portal logins per second
+- Limit on concurrent browser sessions: a fixed semaphore, or the memory-aware
+  :class:`~utils.admission.AdmissionController` (earliest punch deadline first)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.admission import PUNCH, AdmissionController, Ticket
+from utils.config import Settings, get_config_value, get_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Account:
+    username: str
+    password: str
+    punch: Optional[str] = None  # CLI-style punch override for this account
+
+
+def load_accounts(path: str) -> List[Account]:
+    """Load accounts from a JSON list.
+
+    Each entry needs ``username`` and either ``password`` or ``password_env`` (name of an
+    environment/.env variable holding the password); ``punch`` is optional.
+    """
+    with open(path, encoding="utf-8") as fh:
+        raw = json.load(fh)
+    if not isinstance(raw, list):
+        raise ValueError(f"{path}: expected a JSON list of accounts")
+
+    accounts: List[Account] = []
+    for idx, entry in enumerate(raw):
+        username = entry.get("username")
+        password = entry.get("password")
+        if not password and entry.get("password_env"):
+            password = get_config_value(entry["password_env"])
+        if not username or not password:
+            raise ValueError(f"{path}: account #{idx} is missing username or password")
+        accounts.append(Account(username=username, password=password, punch=entry.get("punch")))
+    return accounts
+
+
+def stagger_offsets(usernames: Iterable[str], window_seconds: float, seed: str) -> Dict[str, float]:
+    """Spread accounts evenly across ``[0, window_seconds)``.
+
+    Accounts are ordered by a seeded hash and assigned equally spaced slots, so the same
+    seed always gives the same offsets and no two accounts share a slot.
+    """
+    names = sorted(set(usernames), key=lambda u: hashlib.sha256(f"{seed}:{u}".encode("utf-8")).hexdigest())
+    if not names:
+        return {}
+    step = window_seconds / len(names)
+    return {name: idx * step for idx, name in enumerate(names)}
+
+
+class TokenBucket:
+    """Thread-safe token bucket. ``rate`` <= 0 disables limiting."""
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token even if we must wait; callers queue up behind each other
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class FleetDispatcher:
+    """Run one callable per account with staggered starts and portal rate limits."""
+
+    def __init__(
+        self,
+        logins_per_second: float = 0.5,
+        max_sessions: int = 4,
+        stagger_window: float = 600.0,
+        seed: Optional[str] = None,
+        admission: Optional[AdmissionController] = None,
+    ) -> None:
+        self.login_bucket = TokenBucket(logins_per_second)
+        self.max_sessions = max(1, max_sessions)
+        self._sessions = threading.BoundedSemaphore(self.max_sessions)
+        # With an admission controller, MAX_SESSIONS is its upper cap instead of a semaphore
+        self.admission = admission
+        self.stagger_window = stagger_window
+        # Default seed rotates daily so the same account is not always first in line
+        self.seed = seed if seed is not None else datetime.date.today().isoformat()
+
+    @classmethod
+    def from_config(cls, settings: Optional[Settings] = None) -> "FleetDispatcher":
+        settings = settings or get_settings()
+        admission = None
+        # Remote sessions do not use this host's memory
+        if settings.admission_control and settings.driver_backend == "local":
+            admission = AdmissionController(
+                session_mb=settings.session_footprint_mb,
+                reserve_mb=settings.memory_reserve_mb,
+                max_load_per_cpu=settings.max_load_per_cpu,
+                max_sessions=settings.max_sessions,
+            )
+        return cls(
+            logins_per_second=settings.logins_per_second,
+            max_sessions=settings.max_sessions,
+            stagger_window=settings.stagger_window,
+            seed=settings.stagger_seed,
+            admission=admission,
+        )
+
+    @contextlib.contextmanager
+    def session(
+        self, name: str, deadline: Optional[float] = None, priority: int = PUNCH
+    ) -> Iterator[Optional[Ticket]]:
+        """Hold a browser-session slot and a login token for the duration of the block.
+
+        ``priority`` (``admission.PUNCH`` or ``admission.BACKGROUND``) and ``deadline``
+        (``time.monotonic()`` the punch is due) order waiting accounts when admission
+        control is on; the yielded ticket takes the session's measured peak RSS.
+        """
+        start = time.monotonic()
+        if self.admission is not None:
+            slot = self.admission.admit(name, deadline, priority)
+        else:
+            slot = self._semaphore()
+        with slot as ticket:
+            slot_wait = time.monotonic() - start
+            token_wait = self.login_bucket.acquire()
+            if slot_wait + token_wait > 0.5:
+                logger.info(f"[{name}] waited {slot_wait:.1f}s for a session slot, {token_wait:.1f}s for login rate")
+            yield ticket
+
+    @contextlib.contextmanager
+    def _semaphore(self) -> Iterator[None]:
+        with self._sessions:
+            yield None
+
+    def run(self, accounts: List[Account], run_account: Callable[[Account, float], bool]) -> Dict[str, bool]:
+        """Call ``run_account(account, offset_seconds)`` for every account concurrently.
+
+        ``run_account`` is responsible for sleeping its offset (ideally with no browser open)
+        and for entering :meth:`session` before starting the browser.
+        """
+        offsets = stagger_offsets((a.username for a in accounts), self.stagger_window, self.seed)
+        limit = "memory-aware admission, " if self.admission is not None else ""
+        logger.info(
+            f"Dispatching {len(accounts)} accounts over {self.stagger_window:.0f}s "
+            f"({limit}max {self.max_sessions} sessions, {self.login_bucket.rate:g} logins/s)"
+        )
+
+        results: Dict[str, bool] = {}
+        durations: Dict[str, float] = {}
+
+        def _one(account: Account) -> None:
+            start = time.monotonic()
+            try:
+                results[account.username] = bool(run_account(account, offsets[account.username]))
+            except Exception as e:
+                logger.error(f"[{account.username}] dispatch failed: {e}")
+                results[account.username] = False
+            # Latency net of the planned stagger offset
+            durations[account.username] = time.monotonic() - start - offsets[account.username]
+
+        # Workers mostly sleep through their offsets; the semaphore bounds real browser load
+        with ThreadPoolExecutor(max_workers=max(1, len(accounts)), thread_name_prefix="account") as pool:
+            list(pool.map(_one, accounts))
+
+        for username in sorted(results):
+            logger.info(
+                f"[{username}] {'success' if results[username] else 'failed'} "
+                f"(offset {offsets[username]:.0f}s, latency {durations[username]:.1f}s)"
+            )
+        ok = sum(results.values())
+        logger.info(f"Batch finished: {ok}/{len(results)} succeeded")
+        return results
@@ -0,0 +1,347 @@
+"""
+Streaming export of reported punches for WW check-in.
+
+``ww_check_in.py --export FROM[:TO]`` logs in like a punch run, opens 我的出勤/工時 →
+工時回報 and pages through the reported-time grid. Each page is read in the browser
+with one macro call (see ``utils.macros``), parsed into :class:`PunchRow` values
+(date, punch type, time, status), filtered to the range and written to the sink
+before the next page is requested. Memory therefore holds one page at a time,
+whatever the range, and an interrupted export keeps every page already written.
+
+Sinks (format from ``--export-format`` or the file extension):
+- ``csv``: one header line, then a row per punch
+- ``jsonl``: one JSON object per punch
+- ``sqlite``: table ``punches`` keyed on (account, date, punch type, time), so
+  exporting an overlapping range again updates rows instead of duplicating them
+
+With ``--batch`` every account is exported into the same sink through the fleet
+dispatcher (session and login-rate limits apply; there is no start stagger).
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from utils.selenium_helper import SeleniumHelper
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "jsonl", "sqlite")
+FIELDS = ("account", "date", "punch_type", "time", "status")
+# Safety stop for a grid whose "next" control never runs out
+MAX_PAGES = 500
+
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".sqlite": "sqlite", ".sqlite3": "sqlite", ".db": "sqlite"}
+# Header keywords per column (PeopleSoft labels, zh-TW or English)
+_COLUMNS = (
+    ("punch_type", re.compile(r"類型|類別|punch|type", re.I)),
+    ("status", re.compile(r"狀態|status", re.I)),
+    ("date", re.compile(r"日期|date", re.I)),
+    ("time", re.compile(r"時間|time", re.I)),
+)
+_ISO_DATE = re.compile(r"(\d{4})[/.-](\d{1,2})[/.-](\d{1,2})")
+_US_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_TIME = re.compile(r"(AM|PM|上午|下午)?\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*(AM|PM|上午|下午)?", re.I)
+
+
+@dataclass(frozen=True)
+class PunchRow:
+    account: str
+    date: str  # ISO YYYY-MM-DD
+    punch_type: str
+    time: str  # HH:MM:SS, or the portal's text when it is not a clock time
+    status: str
+
+
+# ------------------------- Parsing ------------------------- #
+def parse_date_range(value: str) -> Tuple[datetime.date, datetime.date]:
+    """Parse ``FROM[:TO]`` (ISO dates); TO defaults to today."""
+    start_text, _, end_text = value.partition(":")
+    try:
+        start = datetime.date.fromisoformat(start_text.strip())
+        end = datetime.date.fromisoformat(end_text.strip()) if end_text.strip() else datetime.date.today()
+    except ValueError:
+        raise ValueError(f"Invalid export range {value!r} (expected YYYY-MM-DD[:YYYY-MM-DD])") from None
+    if end < start:
+        raise ValueError(f"Invalid export range {value!r}: end is before start")
+    return start, end
+
+
+def parse_date(text: str) -> Optional[datetime.date]:
+    """First date in ``text`` (YYYY/MM/DD, YYYY-MM-DD or MM/DD/YYYY)."""
+    for pattern, order in ((_ISO_DATE, (1, 2, 3)), (_US_DATE, (3, 1, 2))):
+        match = pattern.search(text)
+        if match:
+            try:
+                return datetime.date(*(int(match.group(i)) for i in order))
+            except ValueError:
+                return None
+    return None
+
+
+def parse_time(text: str) -> Optional[str]:
+    """First clock time in ``text`` as HH:MM:SS (12-hour AM/PM and 上午/下午 converted)."""
+    match = _TIME.search(text)
+    if not match:
+        return None
+    hour, minute, second = int(match.group(2)), int(match.group(3)), int(match.group(4) or 0)
+    meridiem = (match.group(5) or match.group(1) or "").upper()
+    if meridiem in ("PM", "下午") and hour < 12:
+        hour += 12
+    elif meridiem in ("AM", "上午") and hour == 12:
+        hour = 0
+    return f"{hour:02d}:{minute:02d}:{second:02d}"
+
+
+def format_like(sample: str, day: datetime.date) -> str:
+    """``day`` in the format of the portal's ``sample`` date text (e.g. 2026/10/19 or 10/19/2026)."""
+    if _US_DATE.search(sample or "") and not _ISO_DATE.search(sample or ""):
+        return f"{day.month:02d}/{day.day:02d}/{day.year}"
+    match = _ISO_DATE.search(sample or "")
+    separator = sample[match.start(1) + 4] if match else "/"
+    return f"{day.year}{separator}{day.month:02d}{separator}{day.day:02d}"
+
+
+def column_map(header: List[str]) -> Dict[str, int]:
+    """Field name -> column index, from the grid's header labels."""
+    columns: Dict[str, int] = {}
+    for index, label in enumerate(header):
+        for field, pattern in _COLUMNS:
+            if field not in columns and pattern.search(label):
+                columns[field] = index
+                break
+    return columns
+
+
+def parse_page(
+    account: str, header: List[str], rows: List[List[str]], last_date: Optional[datetime.date] = None
+) -> Tuple[List[Tuple[datetime.date, PunchRow]], Optional[datetime.date]]:
+    """Turn one grid page into dated punch rows.
+
+    PeopleSoft shows a day's date only on its first punch, so a row without a date
+    inherits the previous one (``last_date`` carries it across pages). Returns the
+    rows and the date to carry into the next page.
+    """
+    columns = column_map(header)
+    parsed: List[Tuple[datetime.date, PunchRow]] = []
+
+    def cell(row: List[str], field: str) -> str:
+        index = columns.get(field)
+        return row[index] if index is not None and index < len(row) else ""
+
+    for row in rows:
+        time_text = cell(row, "time")
+        day = parse_date(cell(row, "date")) or parse_date(time_text) or last_date
+        last_date = day
+        clock = parse_time(time_text)
+        if day is None or (clock is None and not time_text):
+            logger.debug(f"Skipping reported-time row without date/time: {row}")
+            continue
+        punch = PunchRow(account, day.isoformat(), cell(row, "punch_type"), clock or time_text, cell(row, "status"))
+        parsed.append((day, punch))
+    return parsed, last_date
+
+
+# ------------------------- Sinks ------------------------- #
+class ExportSink:
+    """Thread-safe writer; every ``write`` is flushed before it returns."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.rows = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, rows: Iterable[PunchRow]) -> int:
+        rows = list(rows)
+        if rows:
+            with self._lock:
+                self._write(rows)
+                self.rows += len(rows)
+        return len(rows)
+
+    def _write(self, rows: List[PunchRow]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "ExportSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CsvSink(ExportSink):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        # utf-8-sig: Excel opens the Chinese punch types correctly
+        self._fh = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow(FIELDS)
+        self._fh.flush()
+
+    def _write(self, rows: List[PunchRow]) -> None:
+        self._writer.writerows([getattr(row, f) for f in FIELDS] for row in rows)
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class JsonlSink(ExportSink):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._fh = open(path, "w", encoding="utf-8")
+
+    def _write(self, rows: List[PunchRow]) -> None:
+        self._fh.writelines(json.dumps(asdict(row), ensure_ascii=False) + "\n" for row in rows)
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class SqliteSink(ExportSink):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS punches (
+            account TEXT NOT NULL,
+            date TEXT NOT NULL,
+            punch_type TEXT NOT NULL,
+            time TEXT NOT NULL,
+            status TEXT,
+            exported_at TEXT NOT NULL,
+            PRIMARY KEY (account, date, punch_type, time)
+        )
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        # Batch exports write from one thread per account, serialized by the sink lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(self.SCHEMA)
+        self._db.commit()
+
+    def _write(self, rows: List[PunchRow]) -> None:
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO punches (account, date, punch_type, time, status, exported_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(r.account, r.date, r.punch_type, r.time, r.status, now) for r in rows],
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+
+_SINKS = {"csv": CsvSink, "jsonl": JsonlSink, "sqlite": SqliteSink}
+
+
+def open_sink(path: str, fmt: Optional[str] = None) -> ExportSink:
+    """Open the sink for ``path``; ``fmt`` defaults to the extension's format (else CSV)."""
+    fmt = fmt or _EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+    if fmt not in _SINKS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {', '.join(EXPORT_FORMATS)})")
+    return _SINKS[fmt](path)
+
+
+# ------------------------- Browser side ------------------------- #
+def _macro(helper: "SeleniumHelper", script: str, *args) -> dict:
+    result = helper.driver.execute_async_script(script, *args)
+    if not isinstance(result, dict) or not result.get("ok"):
+        error = result.get("error") if isinstance(result, dict) else result
+        raise RuntimeError(f"Reported time: {error}")
+    return result
+
+
+def open_reported_time(helper: "SeleniumHelper", login_url: str, username: str, password: str) -> None:
+    """Log in and open 我的出勤/工時 → 工時回報 (the reported-time step, when the page has one)."""
+    from utils import selenium_helper
+
+    helper.login(login_url=login_url, username=username, password=password)
+    helper.wait_for_ajax_and_ready(10)
+    helper.click_by_id(selenium_helper.TIME_GROUPLET_ID, sleep_after=2)
+    helper.click_by_id(selenium_helper.TIME_REPORTED_ID, sleep_after=2)
+    helper.switch_to_default()
+    node = helper.find_dynamic_element(
+        selenium_helper.REPORTED_TIME_STEP_SELECTORS, "reported time step", max_retries=1
+    )
+    if node is not None:
+        helper._click_step_node(
+            node, label="已回報工時", ready=lambda d: d.execute_script("return document.readyState") != "loading"
+        )
+        helper.deadline.sleep(2)
+    else:
+        logger.info("No separate reported-time step; reading the 工時回報 page itself")
+
+
+def export_account(
+    helper: "SeleniumHelper",
+    login_url: str,
+    username: str,
+    password: str,
+    start: datetime.date,
+    end: datetime.date,
+    sink: ExportSink,
+    max_pages: int = MAX_PAGES,
+) -> int:
+    """Stream ``username``'s reported punches between ``start`` and ``end`` into ``sink``.
+
+    Each page gets the full run budget (``helper.deadline`` is restarted per page).
+    Returns the number of rows written.
+    """
+    from utils import macros
+
+    open_reported_time(helper, login_url, username, password)
+    page = _macro(helper, macros.READ_REPORTED_TIME, None, helper._macro_timeout_ms())
+    if page.get("dateValue") is not None:
+        target = format_like(page["dateValue"], start)
+        if page["dateValue"] != target:
+            logger.info(f"[{username}] Reported time: going to {target}")
+            try:
+                _macro(helper, macros.REPORTED_TIME_GOTO, target, helper._macro_timeout_ms())
+                page = _macro(helper, macros.READ_REPORTED_TIME, page["signature"], helper._macro_timeout_ms())
+            except RuntimeError as e:
+                # Rows outside the range are filtered out anyway
+                logger.warning(f"[{username}] Could not go to {target} ({e}); exporting from the period shown")
+    else:
+        logger.warning(f"[{username}] Reported time has no date field; exporting from the period shown")
+
+    written = 0
+    last_date: Optional[datetime.date] = None
+    for number in range(1, max_pages + 1):
+        helper.deadline.restart()
+        rows, last_date = parse_page(username, page["header"], page["rows"], last_date)
+        in_range = [row for day, row in rows if start <= day <= end]
+        written += sink.write(in_range)
+        logger.info(f"[{username}] Reported time page {number}: {len(rows)} rows, {len(in_range)} in range")
+        if rows and min(day for day, _ in rows) > end:
+            break
+        if not page.get("next"):
+            break
+        _macro(helper, macros.REPORTED_TIME_NEXT)
+        helper.invalidate_elements(f"reported time {page['next']}")
+        try:
+            page = _macro(helper, macros.READ_REPORTED_TIME, page["signature"], helper._macro_timeout_ms())
+        except RuntimeError as e:
+            logger.warning(f"[{username}] Stopping after page {number}: {e}")
+            break
+    else:
+        logger.warning(f"[{username}] Stopped at {max_pages} pages")
+    logger.info(f"[{username}] Exported {written} punches ({start} to {end})")
+    return written
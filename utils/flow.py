@@ -0,0 +1,192 @@
+"""
+Shared step sequences for the synchronous and asynchronous helpers.
+
+The portal logic (locators, macros, fallbacks, outcome classification and the order
+of the check-in steps) is written once, as generators. A step sequence does its
+driver calls directly and yields only when it has to wait:
+- :class:`Sleep`: a fixed pause
+- :class:`Until`: poll a WebDriverWait-style condition; the value is sent back, a
+  timeout (or any other wait error) is thrown back in
+
+``SeleniumHelper.run_steps`` performs those waits blocking; ``AsyncSeleniumHelper``
+runs the driver work between two yields in a worker thread and awaits the waits, so
+a waiting session holds no thread.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterator, List, Optional, Tuple, TypeVar, Union
+
+from utils.checkpoint import Checkpoint, FlowState
+from utils.deadline import Deadline
+from utils.outcome import PunchResult
+
+if TYPE_CHECKING:
+    from utils.selenium_helper import SeleniumHelper
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Sleep:
+    seconds: float
+    # False: a plain pause the run budget does not cut short (after save, planned hold)
+    budget: bool = True
+
+
+@dataclass(frozen=True)
+class Until:
+    condition: Callable[[Any], Any]
+    timeout: float
+    message: str = ""
+
+
+Steps = Generator[Union[Sleep, Until], Any, T]
+
+
+def advance(steps: Steps[T], value: Any = None, error: Optional[BaseException] = None) -> Tuple[bool, Any]:
+    """Run ``steps`` up to its next wait: (False, request) or, once finished, (True, result)."""
+    try:
+        return False, steps.throw(error) if error is not None else steps.send(value)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+@contextlib.contextmanager
+def timed_step(
+    label: str,
+    timings: Optional[List[Tuple[str, float]]] = None,
+    deadline: Optional[Deadline] = None,
+) -> Iterator[None]:
+    """Log a step marker and record how long the block took.
+
+    With a ``deadline``, the step is refused once the run budget is spent and is
+    recorded as the step consuming the budget.
+    """
+    if deadline is not None:
+        deadline.check()
+        deadline.mark(label)
+    logger.info(label)
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.append((label, time.monotonic() - start))
+
+
+def check_in_steps(
+    helper: SeleniumHelper,
+    login_url: str,
+    username: str,
+    password: str,
+    target_punch: str,
+    delay_seconds: float = 0,
+    submit_deadline: Optional[float] = None,
+    timings: Optional[List[Tuple[str, float]]] = None,
+    state: Optional[FlowState] = None,
+) -> Steps[PunchResult]:
+    """Drive the portal from login to the punch confirmation.
+
+    ``delay_seconds`` is slept between selecting the punch type and clicking save
+    (hold mode). Deferred mode passes 0 so the browser lives only as long as the
+    navigation itself. Prestage mode passes ``submit_deadline`` (``time.monotonic()``)
+    and the save click is fired at that instant instead. Per-step durations are
+    appended to ``timings`` when given. Steps run against ``helper.deadline``; the
+    planned hold before save is excluded from it.
+
+    Progress is checkpointed in ``state``. Run again with the same ``state`` after
+    :meth:`SeleniumHelper.restart`, the flow restores the session cookies and resumes
+    from the last checkpoint instead of logging in again.
+
+    Returns the classified portal response to the save click.
+    """
+    from utils.selenium_helper import TIME_GROUPLET_ID, TIME_REPORTED_ID
+
+    state = state or FlowState()
+    if state.checkpoint >= Checkpoint.SAVE_SENT:
+        raise RuntimeError("save was already sent; refusing to run the flow again")
+    deadline = helper.deadline
+
+    if state.checkpoint is Checkpoint.START:
+        with timed_step("Step 1: login", timings, deadline):
+            helper.start(login_url)
+            yield from helper.login_steps(login_url=login_url, username=username, password=password)
+            logger.info("Login submitted. Waiting for page to stabilize...")
+            yield from helper.ready_steps(10)
+            state.landing_url = helper.current_url()
+            state.cookies = helper.session_cookies()
+            state.reach(Checkpoint.LOGGED_IN)
+    elif state.checkpoint is Checkpoint.CLOCK_FORM and state.clock_url:
+        with timed_step("Resume: TL_WEB_CLOCK", timings, deadline):
+            yield from helper.restore_session_steps(
+                state.cookies, state.clock_url, ready_id="TL_RPTD_TIME_PUNCH_TYPE$0"
+            )
+    else:
+        with timed_step("Resume: landing page", timings, deadline):
+            yield from helper.restore_session_steps(state.cookies, state.landing_url, ready_id=TIME_GROUPLET_ID)
+        state.checkpoint = Checkpoint.LOGGED_IN
+
+    if state.checkpoint is Checkpoint.LOGGED_IN:
+        with timed_step("Step 2: 我的出勤/工時", timings, deadline):
+            yield from helper.click_by_id_steps(TIME_GROUPLET_ID, sleep_after=2)
+
+        with timed_step("Step 3: 工時回報", timings, deadline):
+            yield from helper.click_by_id_steps(TIME_REPORTED_ID, sleep_after=2)
+
+        with timed_step("Step 4: 線上打卡", timings, deadline):
+            yield from helper.open_online_checkin_steps()
+
+    # With nothing to wait for between select and save, both run as one step
+    save_with_select = submit_deadline is None and delay_seconds <= 0
+
+    # The save checkpoint is taken right before the save click goes out: a crash after it
+    # can never lead to a second save, one before it is retried
+    def save_sent() -> None:
+        state.reach(Checkpoint.SAVE_SENT)
+
+    # Step 5: Iframe and form
+    with timed_step("Step 5: Iframe and form", timings, deadline):
+        if state.checkpoint is Checkpoint.LOGGED_IN:
+            yield from helper.clock_iframe_steps()
+            state.clock_url = helper.current_url()
+            state.reach(Checkpoint.CLOCK_FORM)
+        if save_with_select:
+            yield from helper.select_punch_steps(target_punch, save=True, before_save=save_sent)
+        else:
+            yield from helper.select_punch_steps(target_punch)
+    if submit_deadline is not None:
+        # The timed click spins on the clock; it stays one blocking call
+        helper.prestage_save()
+        hold = max(submit_deadline - time.monotonic(), 0.0)
+        logger.info(f"Form pre-staged; holding {hold:.1f}s until submit deadline")
+        deadline.mark("Hold before save")
+        with deadline.paused():
+            helper.fire_save_at(
+                submit_deadline,
+                keepalive_interval=helper.settings.keepalive_interval,
+                before_click=save_sent,
+            )
+    elif not save_with_select:
+        if state.hold_until is None:
+            state.hold_until = time.monotonic() + delay_seconds
+        remaining = max(state.hold_until - time.monotonic(), 0.0)
+        logger.info(f"Random delay before click save button: {int(delay_seconds) // 60}m({int(delay_seconds)}s)")
+        deadline.mark("Hold before save")
+        with deadline.paused():
+            yield Sleep(remaining, budget=False)
+        with timed_step("Step 6: save", timings, deadline):
+            yield from helper.click_save_steps(before_click=save_sent)
+
+    # Classify the portal response, confirming a duplicate clock-in prompt if it appears.
+    # The save is in, so this step is clamped to the budget but never refused.
+    deadline.mark("Step 7: confirmation popup")
+    with timed_step("Step 7: confirmation popup", timings):
+        return (yield from helper.outcome_steps())
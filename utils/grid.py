@@ -0,0 +1,220 @@
+"""
+Remote WebDriver endpoints (Selenium Grid hubs or standalone servers) for WW check-in.
+
+With ``DRIVER_BACKEND=remote`` the browser runs behind one of ``REMOTE_WEBDRIVER_URLS``
+instead of a local chromedriver. :class:`EndpointPool` picks the endpoint for each new
+session:
+- health: ``GET <url>/status`` must answer ``ready``; an endpoint that fails its check
+  or a session start is skipped for ``REMOTE_RETRY_AFTER`` seconds
+- balance: the endpoint with the most free slots (as reported by ``/status``, minus
+  sessions this process is still creating) wins; ties go to the endpoint with fewer
+  of this process's sessions, then round-robin
+
+Status answers are cached for a couple of seconds, so a batch starting many sessions
+asks each endpoint once rather than once per session.
+
+Check the configured endpoints with ``python -m utils.grid``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.config import Settings, get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# How long a /status answer is reused
+STATUS_TTL = 2.0
+
+
+@dataclass(frozen=True)
+class EndpointStatus:
+    url: str
+    ready: bool
+    free_slots: Optional[int] = None  # None: the server does not report slots
+    total_slots: Optional[int] = None
+    message: str = ""
+    checked_at: float = 0.0
+
+
+def fetch_status(url: str, timeout: float = 2.0) -> EndpointStatus:
+    """Query ``<url>/status`` (W3C WebDriver; Grid 4 adds per-node slots)."""
+    now = time.monotonic()
+    try:
+        with urllib.request.urlopen(url.rstrip("/") + "/status", timeout=timeout) as response:
+            value = json.load(response).get("value") or {}
+    except Exception as e:
+        return EndpointStatus(url, False, message=str(e), checked_at=now)
+    free = total = None
+    nodes = value.get("nodes")
+    if isinstance(nodes, list):
+        free = total = 0
+        for node in nodes:
+            if node.get("availability", "UP") != "UP":
+                continue
+            for slot in node.get("slots") or []:
+                total += 1
+                if not slot.get("session"):
+                    free += 1
+    return EndpointStatus(url, bool(value.get("ready")), free, total, str(value.get("message") or ""), now)
+
+
+class EndpointPool:
+    """Health-checked, load-balanced set of remote WebDriver endpoints shared by all sessions."""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        health_timeout: float = 2.0,
+        retry_after: float = 60.0,
+        status: Callable[[str, float], EndpointStatus] = fetch_status,
+    ) -> None:
+        if not urls:
+            raise ValueError("No remote WebDriver endpoints configured (REMOTE_WEBDRIVER_URLS)")
+        self.urls = list(urls)
+        self.health_timeout = health_timeout
+        self.retry_after = retry_after
+        self._status = status
+        self._lock = threading.Lock()
+        self._cache: Dict[str, EndpointStatus] = {}
+        self._down_until: Dict[str, float] = {}
+        self._sessions: Dict[str, int] = {url: 0 for url in self.urls}
+        self._starting: Dict[str, int] = {url: 0 for url in self.urls}
+        self._turn = itertools.count()
+
+    # ------------------------- Health ------------------------- #
+    def refresh(self, force: bool = False) -> List[EndpointStatus]:
+        """Check every endpoint not in cool-down (in parallel); returns the fresh answers."""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                url
+                for url in self.urls
+                if self._down_until.get(url, 0.0) <= now
+                and (force or now - self._cache.get(url, EndpointStatus(url, False)).checked_at > STATUS_TTL)
+            ]
+        if not due:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(due), 8), thread_name_prefix="grid-status") as pool:
+            answers = list(pool.map(lambda url: self._status(url, self.health_timeout), due))
+        for answer in answers:
+            with self._lock:
+                self._cache[answer.url] = answer
+            if not answer.ready:
+                self.mark_down(answer.url, f"not ready: {answer.message}" if answer.message else "not ready")
+        return answers
+
+    def mark_down(self, url: str, reason: str) -> None:
+        """Skip ``url`` for ``retry_after`` seconds."""
+        with self._lock:
+            was_up = self._down_until.get(url, 0.0) <= time.monotonic()
+            self._down_until[url] = time.monotonic() + self.retry_after
+            self._cache.pop(url, None)
+        if was_up:
+            logger.warning(f"Remote WebDriver {url} unavailable ({reason}); retrying it in {self.retry_after:.0f}s")
+
+    # ------------------------- Balancing ------------------------- #
+    def candidates(self) -> List[str]:
+        """Endpoints to try for the next session, best first.
+
+        When every endpoint is in cool-down they are all returned in configured order:
+        trying a flaky endpoint beats failing the punch outright.
+        """
+        self.refresh()
+        now = time.monotonic()
+        turn = next(self._turn)
+        with self._lock:
+            healthy = [url for url in self.urls if self._down_until.get(url, 0.0) <= now and url in self._cache]
+
+            def score(indexed: Tuple[int, str]) -> Tuple[float, int, int]:
+                index, url = indexed
+                free = self._cache[url].free_slots
+                spare = float("inf") if free is None else free - self._starting[url]
+                return (-spare, self._sessions[url], (index - turn) % len(self.urls))
+
+            ranked = [url for _, url in sorted(((self.urls.index(u), u) for u in healthy), key=score)]
+        if not ranked:
+            logger.warning("No healthy remote WebDriver endpoint; trying all of them")
+            return list(self.urls)
+        return ranked
+
+    def starting(self, url: str) -> None:
+        """A session is being created on ``url``."""
+        with self._lock:
+            self._starting[url] += 1
+
+    def started(self, url: str, ok: bool) -> None:
+        """Session creation on ``url`` finished (``ok``: it now holds a session)."""
+        with self._lock:
+            self._starting[url] -= 1
+            if ok:
+                self._sessions[url] += 1
+                # The cached free-slot count no longer includes this session
+                cached = self._cache.get(url)
+                if cached is not None and cached.free_slots:
+                    self._cache[url] = EndpointStatus(
+                        url, cached.ready, cached.free_slots - 1, cached.total_slots, cached.message, cached.checked_at
+                    )
+
+    def release(self, url: str) -> None:
+        """A session on ``url`` was closed."""
+        with self._lock:
+            self._sessions[url] = max(self._sessions[url] - 1, 0)
+
+    @property
+    def sessions(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._sessions)
+
+
+_pools: Dict[Tuple[str, ...], EndpointPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings: Optional[Settings] = None) -> EndpointPool:
+    """The process-wide pool for the configured endpoints (shared by batch sessions)."""
+    settings = settings or get_settings()
+    key = tuple(settings.remote_webdriver_urls)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = EndpointPool(key, settings.remote_health_timeout, settings.remote_retry_after)
+        return _pools[key]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Check the remote WebDriver endpoints")
+    parser.add_argument("urls", nargs="*", help="Endpoints to check (default: REMOTE_WEBDRIVER_URLS)")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per /status request")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    urls = args.urls or list(settings.remote_webdriver_urls)
+    if not urls:
+        print("No endpoints given and REMOTE_WEBDRIVER_URLS is not set")
+        raise SystemExit(2)
+    timeout = args.timeout if args.timeout is not None else settings.remote_health_timeout
+    ready = 0
+    for url in urls:
+        start = time.monotonic()
+        status = fetch_status(url, timeout)
+        elapsed = (time.monotonic() - start) * 1000
+        slots = f"{status.free_slots}/{status.total_slots} slots free" if status.total_slots is not None else "-"
+        state = "ready" if status.ready else "NOT READY"
+        print(f"{url:40}  {state:9}  {slots:18}  {elapsed:5.0f}ms  {status.message}")
+        ready += status.ready
+    raise SystemExit(0 if ready else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+SQLite run ledger for WW check-in.
+
+Every run is recorded (account, punch type, timestamps, per-step durations, outcome,
+popup text). The ledger is consulted before any browser starts so a punch that already
+completed today is skipped immediately.
+
+Query past runs:
+    python -m utils.ledger [--user USER] [--days N] [--steps]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.config import get_settings
+
+
+# Outcomes that mean the punch is (or may be) on record at the portal. "unknown" means save
+# was clicked without a recognizable answer; rerunning it could punch twice.
+COMPLETED_OUTCOMES = ("success", "duplicate", "unknown")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    punch_type TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    duration REAL,
+    outcome TEXT NOT NULL DEFAULT 'running',
+    popup_text TEXT,
+    error TEXT,
+    peak_rss_mb REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs (username, run_date, punch_type, outcome);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    peak_rss_mb REAL,
+    cpu_seconds REAL,
+    PRIMARY KEY (run_id, seq)
+);
+"""
+
+# Columns added after the first schema; ledgers created earlier get them on open
+_MIGRATIONS = (
+    ("runs", "peak_rss_mb", "REAL"),
+    ("steps", "peak_rss_mb", "REAL"),
+    ("steps", "cpu_seconds", "REAL"),
+)
+
+
+def default_ledger_path() -> str:
+    return get_settings().ledger_path
+
+
+class RunLedger:
+    """Thin wrapper over a SQLite file; safe to share across threads (one connection per call)."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or default_ledger_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            for table, column, kind in _MIGRATIONS:
+                existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.datetime.now().isoformat(timespec="seconds")
+
+    def find_completed(
+        self, username: str, punch_type: str, day: Optional[datetime.date] = None
+    ) -> Optional[sqlite3.Row]:
+        """Return the run that already completed this punch on ``day`` (default: today), if any."""
+        day = day or datetime.date.today()
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT * FROM runs WHERE username = ? AND run_date = ? AND punch_type = ? "
+                f"AND outcome IN ({','.join('?' * len(COMPLETED_OUTCOMES))}) ORDER BY id DESC LIMIT 1",
+                (username, day.isoformat(), punch_type, *COMPLETED_OUTCOMES),
+            ).fetchone()
+
+    def start_run(self, username: str, punch_type: str) -> int:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (username, punch_type, run_date, started_at) VALUES (?, ?, ?, ?)",
+                (username, punch_type, datetime.date.today().isoformat(), self._now()),
+            )
+            return int(cur.lastrowid)
+
+    def finish_run(
+        self,
+        run_id: int,
+        outcome: str,
+        steps: Iterable[Tuple[str, float]] = (),
+        popup_text: Optional[str] = None,
+        error: Optional[str] = None,
+        peak_rss_mb: Optional[float] = None,
+        step_resources: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> None:
+        """Close a run. ``step_resources`` maps step name to (peak RSS MB, CPU seconds)."""
+        step_resources = step_resources or {}
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO steps (run_id, seq, name, seconds, peak_rss_mb, cpu_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, seq, name, seconds, *step_resources.get(name, (None, None)))
+                    for seq, (name, seconds) in enumerate(steps, 1)
+                ],
+            )
+            conn.execute(
+                "UPDATE runs SET finished_at = ?, outcome = ?, popup_text = ?, error = ?, peak_rss_mb = ?, "
+                "duration = (julianday(?) - julianday(started_at)) * 86400.0 WHERE id = ?",
+                (self._now(), outcome, popup_text, error, peak_rss_mb, self._now(), run_id),
+            )
+
+    def record_skip(self, username: str, punch_type: str, reason: str) -> None:
+        run_id = self.start_run(username, punch_type)
+        self.finish_run(run_id, "skipped", error=reason)
+
+    def recent_runs(self, username: Optional[str] = None, days: int = 7) -> List[sqlite3.Row]:
+        since = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+        query = "SELECT * FROM runs WHERE run_date >= ?"
+        params: list = [since]
+        if username:
+            query += " AND username = ?"
+            params.append(username)
+        with self._connect() as conn:
+            return conn.execute(query + " ORDER BY id", params).fetchall()
+
+    def steps_for(self, run_id: int) -> List[sqlite3.Row]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT name, seconds, peak_rss_mb, cpu_seconds FROM steps WHERE run_id = ? ORDER BY seq", (run_id,)
+            ).fetchall()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the WW check-in run ledger")
+    parser.add_argument("--db", default=None, help="Ledger path (default: LEDGER_PATH or logs/ww_ledger.sqlite3)")
+    parser.add_argument("--user", default=None, help="Only show runs for this account")
+    parser.add_argument("--days", type=int, default=7, help="How many days back to show (default: 7)")
+    parser.add_argument("--steps", action="store_true", help="Show per-step durations for each run")
+    args = parser.parse_args(argv)
+
+    ledger = RunLedger(args.db)
+    rows = ledger.recent_runs(args.user, args.days)
+    if not rows:
+        print("No runs recorded")
+        return
+
+    print(f"{'id':>5}  {'started':19}  {'user':16}  {'punch':8}  {'outcome':10}  {'secs':>7}  {'MB':>5}  detail")
+    for row in rows:
+        duration = f"{row['duration']:.1f}" if row["duration"] is not None else "-"
+        rss = f"{row['peak_rss_mb']:.0f}" if row["peak_rss_mb"] is not None else "-"
+        detail = (row["error"] or row["popup_text"] or "").replace("\n", " ")[:60]
+        print(
+            f"{row['id']:>5}  {row['started_at']:19}  {row['username'][:16]:16}  {row['punch_type']:8}  "
+            f"{row['outcome']:10}  {duration:>7}  {rss:>5}  {detail}"
+        )
+        if args.steps:
+            for step in ledger.steps_for(row["id"]):
+                usage = ""
+                if step["peak_rss_mb"] is not None:
+                    usage = f"  ({step['peak_rss_mb']:.0f} MB, {step['cpu_seconds']:.2f}s CPU)"
+                print(f"{'':>7}{step['seconds']:8.2f}s  {step['name']}{usage}")
+
+    counts: dict = {}
+    for row in rows:
+        counts[row["outcome"]] = counts.get(row["outcome"], 0) + 1
+    print("\n" + ", ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+Step latency analytics over WW check-in log files.
+
+Streams one or more log files line by line (rotated ``.1``/``.2`` files, ``.gz``
+archives and the cron wrapper logs included), rebuilds each run from its start
+banner, ``Step N:`` / ``Resume:`` markers and finish line, and reports:
+- per-step latency percentiles (planned holds before save excluded)
+- outcome counts, failure rate, and the step each failed run stopped in
+- a trend of runs, failure rate and run-duration percentiles per day/week/month
+
+Both the text format (with or without the ``[run_id]`` tag) and the JSON-lines
+format written by :mod:`utils.logs` are read. Memory stays flat however much log
+is fed in: percentiles come from fixed-size reservoirs, unfinished runs are capped,
+and only a small key per run is kept to drop runs seen twice (the cron wrappers
+used to copy the whole app log).
+
+Usage:
+    python -m utils.log_analytics logs/ww_check_in.log* logs/cron_check_in_*.log
+    python -m utils.log_analytics logs/*.log* --weekday mon --step "Step 4"
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import glob
+import gzip
+import json
+import math
+import random
+import re
+import sys
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+PERIODS = ("day", "week", "month")
+FAILED_OUTCOMES = ("failed", "timeout", "incomplete")
+
+_TEXT_LINE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(\d{3}) - \S+ - [A-Z]+ - (?:\[([0-9a-f]{8})\] )?(.*)$"
+)
+_STEP = re.compile(r"^(Step \d+: .+|Resume: .+|Browser start|Browser restart)$")
+_HOLD = re.compile(r"^(?:Random delay before click save button: \d+m\((\d+)s\)|Form pre-staged; holding ([\d.]+)s)")
+_OUTCOME = re.compile(r"^Punch outcome (\w+)")
+
+# Unfinished runs kept open at once (interleaved batch logs); the oldest is closed beyond this
+MAX_OPEN_RUNS = 256
+
+
+@dataclass
+class Record:
+    ts: datetime.datetime
+    msg: str
+    run_key: str = ""
+    account: str = ""
+
+
+@dataclass
+class Run:
+    started: datetime.datetime
+    account: str = ""
+    punch: str = ""
+    outcome: str = "incomplete"
+    finished: Optional[datetime.datetime] = None
+    steps: List[Tuple[str, float]] = field(default_factory=list)
+    # Internal: step currently running and its start, planned hold inside it
+    _step: Optional[str] = None
+    _step_started: Optional[datetime.datetime] = None
+    _hold: float = 0.0
+
+    @property
+    def duration(self) -> Optional[float]:
+        return (self.finished - self.started).total_seconds() if self.finished else None
+
+    @property
+    def last_step(self) -> Optional[str]:
+        return self._step or (self.steps[-1][0] if self.steps else None)
+
+    def end_step(self, ts: datetime.datetime) -> None:
+        if self._step is not None and self._step_started is not None:
+            seconds = (ts - self._step_started).total_seconds() - self._hold
+            self.steps.append((self._step, max(seconds, 0.0)))
+        self._step = None
+        self._step_started = None
+        self._hold = 0.0
+
+
+class Reservoir:
+    """Uniform fixed-size sample of a stream (Algorithm R) plus exact count/mean/max."""
+
+    def __init__(self, size: int = 1024, seed: int = 0) -> None:
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self.max = -math.inf
+        self._sample: List[float] = []
+        self._random = random.Random(seed)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self._sample) < self.size:
+            self._sample.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.size:
+                self._sample[slot] = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def percentile(self, p: float) -> float:
+        """``p`` in 0..100, linearly interpolated over the sample."""
+        if not self._sample:
+            return math.nan
+        ordered = sorted(self._sample)
+        rank = (len(ordered) - 1) * p / 100.0
+        low = math.floor(rank)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+# ------------------------- Reading ------------------------- #
+def _open(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def parse_line(line: str) -> Optional[Record]:
+    """One log line (text or JSON) as a Record; None for tracebacks, banners and noise."""
+    line = line.rstrip("\n")
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+            ts = datetime.datetime.fromisoformat(entry["ts"])
+        except (ValueError, KeyError, TypeError):
+            return None
+        return Record(ts, str(entry.get("msg", "")), entry.get("run_id") or "", entry.get("account") or "")
+    match = _TEXT_LINE.match(line)
+    if match is None:
+        return None
+    ts = datetime.datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").replace(
+        microsecond=int(match.group(2)) * 1000
+    )
+    return Record(ts, match.group(4), match.group(3) or "")
+
+
+def read_records(paths: Iterable[str]) -> Iterator[Record]:
+    """Records of ``paths`` in file order, rotated backups (``.N``) oldest first."""
+
+    def order(path: str) -> Tuple[bool, str, int]:
+        # App logs before cron wrapper logs, so a run found in both is taken from the app log
+        cron = "cron_check_in" in path
+        base, _, suffix = path.removesuffix(".gz").rpartition(".")
+        return (cron, base, -int(suffix)) if suffix.isdigit() else (cron, path.removesuffix(".gz"), 0)
+
+    for path in sorted(paths, key=order):
+        try:
+            with _open(path) as fh:
+                for line in fh:
+                    record = parse_line(line)
+                    if record is not None:
+                        yield record
+        except OSError as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+
+
+# ------------------------- Run reconstruction ------------------------- #
+def iter_runs(records: Iterable[Record]) -> Iterator[Run]:
+    """Rebuild runs from a record stream; runs without a finish line end as ``incomplete``."""
+    open_runs: "OrderedDict[str, Run]" = OrderedDict()
+    seen: set = set()
+
+    def close(key: str) -> Iterator[Run]:
+        run = open_runs.pop(key)
+        # The same run copied into another file (old cron wrapper logs) counts once
+        ident = hash((run.started, key))
+        if ident not in seen:
+            seen.add(ident)
+            yield run
+
+    for record in records:
+        key = record.run_key
+        msg = record.msg.strip()
+        run = open_runs.get(key)
+
+        if msg == "WW Check-in start":
+            if run is not None:
+                yield from close(key)
+            open_runs[key] = Run(started=record.ts, account=record.account)
+            if len(open_runs) > MAX_OPEN_RUNS:
+                yield from close(next(iter(open_runs)))
+            continue
+        if run is None:
+            continue
+
+        if msg.startswith("Account: "):
+            run.account = run.account or msg[len("Account: ") :]
+        elif msg.startswith("UI punch option: "):
+            run.punch = msg[len("UI punch option: ") :]
+        elif _STEP.match(msg) and not record.msg.startswith(" "):
+            run.end_step(record.ts)
+            run._step, run._step_started = msg, record.ts
+        elif _HOLD.match(msg):
+            hold = _HOLD.match(msg)
+            run._hold += float(hold.group(1) or hold.group(2))
+        elif _OUTCOME.match(msg):
+            run.end_step(record.ts)
+            if _OUTCOME.match(msg).group(1) == "DUPLICATE_CONFIRMED":
+                run.outcome = "duplicate"
+        elif msg.startswith("Duplicate clock-in popup message"):
+            run.outcome = "duplicate"
+        elif msg == "WW Check-in completed successfully":
+            run.end_step(record.ts)
+            run.outcome = run.outcome if run.outcome == "duplicate" else "success"
+            run.finished = record.ts
+            yield from close(key)
+        elif msg.startswith("Check-in unverified"):
+            run.finished = record.ts
+            run.outcome = "unknown"
+            yield from close(key)
+        elif msg.startswith(("Check-in failed", "Check-in aborted")):
+            # The step that was running is where the run stopped; it is not a latency sample
+            run.finished = record.ts
+            run.outcome = "timeout" if msg.startswith("Check-in aborted") else "failed"
+            yield from close(key)
+
+    for key in list(open_runs):
+        yield from close(key)
+
+
+# ------------------------- Aggregation ------------------------- #
+@dataclass
+class StepStats:
+    latency: Reservoir = field(default_factory=Reservoir)
+    reached: int = 0
+    failed_here: int = 0
+
+
+@dataclass
+class PeriodStats:
+    runs: int = 0
+    failed: int = 0
+    duration: Reservoir = field(default_factory=lambda: Reservoir(256))
+
+
+@dataclass
+class Report:
+    runs: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    steps: Dict[str, StepStats] = field(default_factory=dict)
+    periods: Dict[str, PeriodStats] = field(default_factory=dict)
+    duration: Reservoir = field(default_factory=Reservoir)
+
+    @property
+    def failure_rate(self) -> float:
+        failed = sum(self.outcomes.get(outcome, 0) for outcome in FAILED_OUTCOMES)
+        return failed / self.runs if self.runs else 0.0
+
+
+def period_of(ts: datetime.datetime, period: str) -> str:
+    if period == "day":
+        return ts.strftime("%Y-%m-%d")
+    if period == "month":
+        return ts.strftime("%Y-%m")
+    year, week, _ = ts.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def analyze(
+    runs: Iterable[Run],
+    period: str = "week",
+    since: Optional[datetime.date] = None,
+    until: Optional[datetime.date] = None,
+    weekday: Optional[int] = None,
+    account: Optional[str] = None,
+    step_prefix: Optional[str] = None,
+) -> Report:
+    """Fold runs into a Report; ``weekday`` is 0 (Monday) .. 6."""
+    report = Report()
+    for run in runs:
+        day = run.started.date()
+        if (since and day < since) or (until and day > until):
+            continue
+        if weekday is not None and run.started.weekday() != weekday:
+            continue
+        if account and run.account != account:
+            continue
+
+        failed = run.outcome in FAILED_OUTCOMES
+        report.runs += 1
+        report.outcomes[run.outcome] = report.outcomes.get(run.outcome, 0) + 1
+        if run.duration is not None and not failed:
+            report.duration.add(run.duration)
+
+        for name, seconds in run.steps:
+            if step_prefix and not name.startswith(step_prefix):
+                continue
+            stats = report.steps.setdefault(name, StepStats())
+            stats.latency.add(seconds)
+            stats.reached += 1
+        stopped = run.last_step if failed else None
+        if stopped and not (step_prefix and not stopped.startswith(step_prefix)):
+            stats = report.steps.setdefault(stopped, StepStats())
+            stats.reached += 1
+            stats.failed_here += 1
+
+        bucket = report.periods.setdefault(period_of(run.started, period), PeriodStats())
+        bucket.runs += 1
+        bucket.failed += failed
+        if run.duration is not None and not failed:
+            bucket.duration.add(run.duration)
+    return report
+
+
+# ------------------------- Output ------------------------- #
+def _cell(text: str, width: int) -> str:
+    """``text`` cut/padded to ``width`` terminal columns (CJK step labels are double width)."""
+    out, used = "", 0
+    for char in text:
+        size = 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+        if used + size > width:
+            break
+        out += char
+        used += size
+    return out + " " * (width - used)
+
+
+def _fmt(value: float) -> str:
+    return "-" if math.isnan(value) else f"{value:.2f}"
+
+
+def print_report(report: Report, period: str) -> None:
+    if not report.runs:
+        print("No runs found")
+        return
+    outcomes = ", ".join(f"{k} {v}" for k, v in sorted(report.outcomes.items()))
+    print(f"Runs: {report.runs} ({outcomes}); failure rate {report.failure_rate:.1%}")
+    print(
+        f"Run duration (completed runs): p50 {_fmt(report.duration.percentile(50))}s  "
+        f"p95 {_fmt(report.duration.percentile(95))}s"
+    )
+
+    print("\nStep latency in seconds (planned holds excluded)")
+    print(f"{'step':32}  {'n':>5}  {'p50':>7}  {'p90':>7}  {'p95':>7}  {'p99':>7}  {'max':>7}  {'fail':>6}")
+    for name, stats in report.steps.items():
+        lat = stats.latency
+        fail = stats.failed_here / stats.reached if stats.reached else 0.0
+        print(
+            f"{_cell(name, 32)}  {lat.count:>5}  {_fmt(lat.percentile(50)):>7}  {_fmt(lat.percentile(90)):>7}  "
+            f"{_fmt(lat.percentile(95)):>7}  {_fmt(lat.percentile(99)):>7}  "
+            f"{_fmt(lat.max if lat.count else math.nan):>7}  {fail:>6.1%}"
+        )
+
+    print(f"\nTrend by {period}")
+    print(f"{'period':10}  {'runs':>5}  {'fail':>6}  {'p50':>7}  {'p95':>7}")
+    for key in sorted(report.periods):
+        bucket = report.periods[key]
+        print(
+            f"{key:10}  {bucket.runs:>5}  {bucket.failed / bucket.runs:>6.1%}  "
+            f"{_fmt(bucket.duration.percentile(50)):>7}  {_fmt(bucket.duration.percentile(95)):>7}"
+        )
+
+
+def report_json(report: Report) -> dict:
+    def pct(res: Reservoir) -> dict:
+        values = {f"p{p}": res.percentile(p) for p in (50, 90, 95, 99)}
+        values.update(count=res.count, mean=res.mean, max=res.max if res.count else math.nan)
+        return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in values.items()}
+
+    return {
+        "runs": report.runs,
+        "outcomes": report.outcomes,
+        "failure_rate": report.failure_rate,
+        "duration": pct(report.duration),
+        "steps": {
+            name: dict(pct(stats.latency), reached=stats.reached, failed_here=stats.failed_here)
+            for name, stats in report.steps.items()
+        },
+        "trend": {
+            key: dict(runs=bucket.runs, failed=bucket.failed, duration=pct(bucket.duration))
+            for key, bucket in sorted(report.periods.items())
+        },
+    }
+
+
+def _weekday(value: str) -> int:
+    value = value.strip().lower()[:3]
+    if value.isdigit() and 1 <= int(value) <= 7:
+        return int(value) - 1
+    if value in WEEKDAYS:
+        return WEEKDAYS.index(value)
+    raise argparse.ArgumentTypeError(f"expected mon..sun or 1..7, got {value!r}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Step latency percentiles, failure rates and trends from WW logs")
+    parser.add_argument(
+        "paths", nargs="*", help="Log files or globs (default: logs/ww_check_in.log* logs/cron_check_in_*.log*)"
+    )
+    parser.add_argument("--period", choices=PERIODS, default="week", help="Trend bucket (default: week)")
+    parser.add_argument("--since", type=datetime.date.fromisoformat, help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", type=datetime.date.fromisoformat, help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument("--weekday", type=_weekday, help="Only runs started on this weekday (mon..sun or 1..7)")
+    parser.add_argument("--user", default=None, help="Only runs for this account")
+    parser.add_argument("--step", default=None, help="Only steps whose label starts with this (e.g. 'Step 4')")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.paths:
+        paths = sorted({path for pattern in args.paths for path in (glob.glob(pattern) or [pattern])})
+    else:
+        paths = sorted(glob.glob("logs/ww_check_in.log*") + glob.glob("logs/cron_check_in_*.log*"))
+    runs = iter_runs(read_records(paths))
+    report = analyze(runs, args.period, args.since, args.until, args.weekday, args.user, args.step)
+    if args.json:
+        print(json.dumps(report_json(report), ensure_ascii=False, indent=2))
+    else:
+        print_report(report, args.period)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Logging setup for WW check-in.
+
+- Callers only put records on a queue (:class:`logging.handlers.QueueHandler`); a
+  :class:`~logging.handlers.QueueListener` thread formats and writes them, so file and
+  stdout I/O stay off the punch path.
+- The log file rotates by size and by age, and holds one JSON object per line
+  (``LOG_FORMAT=json``) or the classic text lines (``LOG_FORMAT=text``).
+- Every record logged inside :func:`run_context` carries that run's ``run_id`` and
+  account, so interleaved batch runs can be told apart.
+- Each run has a volume budget: a message repeated with only numbers changing (retry
+  loops) is logged ``repeat_limit`` times and then sampled 1 in :data:`REPEAT_SAMPLE`,
+  and at most ``run_budget`` INFO/DEBUG records are kept per run. Warnings and errors
+  always pass. What was dropped is summarized when the run ends.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# After the repeat limit, keep every Nth occurrence of a repeated message
+REPEAT_SAMPLE = 10
+
+_run: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar("ww_log_run", default=None)
+_NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, run_id, account, thread, exc."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        run_id = getattr(record, "run_id", None)
+        if run_id:
+            entry["run_id"] = run_id
+            entry["account"] = getattr(record, "account", "")
+        if record.threadName and record.threadName != "MainThread":
+            entry["thread"] = record.threadName
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format, with ``[run_id]`` after the level inside a run."""
+
+    def __init__(self) -> None:
+        super().__init__(TEXT_FORMAT)
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        run_id = getattr(record, "run_id", None)
+        if not run_id:
+            return text
+        prefix = f"{self.formatTime(record)} - {record.name} - {record.levelname} - "
+        return f"{prefix}[{run_id}] {text[len(prefix):]}"
+
+
+class SizeAndAgeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Roll over when the file exceeds ``maxBytes`` or is older than ``max_age`` seconds."""
+
+    def __init__(self, filename: str, maxBytes: int, backupCount: int, max_age: float) -> None:
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding="utf-8")
+        self.max_age = max_age
+        self._started_at = self._first_record_time()
+
+    def _first_record_time(self) -> float:
+        """When the current file was started: the timestamp of its first line (cron runs
+        append to the same file, so neither this process nor the mtime can tell)."""
+        try:
+            with open(self.baseFilename, encoding="utf-8", errors="ignore") as fh:
+                first = fh.readline().strip()
+        except OSError:
+            return time.time()
+        if not first:
+            return time.time()
+        try:
+            if first.startswith("{"):
+                return datetime.datetime.fromisoformat(json.loads(first)["ts"]).timestamp()
+            return datetime.datetime.strptime(first[:19], "%Y-%m-%d %H:%M:%S").timestamp()
+        except (ValueError, KeyError, TypeError):
+            return os.path.getmtime(self.baseFilename)
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if self.max_age and time.time() - self._started_at >= self.max_age:
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return 1
+            self._started_at = time.time()
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self._started_at = time.time()
+
+
+class RunContextFilter(logging.Filter):
+    """Stamp records with the ``run_id``/``account`` of the enclosing :func:`run_context`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        current = _run.get()
+        if current is not None:
+            record.run_id, record.account = current
+        return True
+
+
+class VolumeBudget(logging.Filter):
+    """Per-run cap on total records and on near-identical repeats (see module docstring)."""
+
+    def __init__(self, run_budget: int, repeat_limit: int) -> None:
+        super().__init__()
+        self.run_budget = run_budget
+        self.repeat_limit = repeat_limit
+        self._lock = threading.Lock()
+        self._kept: Dict[str, int] = {}
+        self._repeats: Dict[Tuple[str, str], int] = {}
+        self._dropped: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        run_id = getattr(record, "run_id", None)
+        if run_id is None or record.levelno >= logging.WARNING:
+            return True
+        key = (run_id, _NUMBERS.sub("#", str(record.msg)))
+        with self._lock:
+            seen = self._repeats.get(key, 0) + 1
+            self._repeats[key] = seen
+            keep = True
+            if self.repeat_limit and seen > self.repeat_limit:
+                keep = (seen - self.repeat_limit) % REPEAT_SAMPLE == 0
+            if keep and self.run_budget and self._kept.get(run_id, 0) >= self.run_budget:
+                keep = False
+            if keep:
+                self._kept[run_id] = self._kept.get(run_id, 0) + 1
+            else:
+                self._dropped[run_id] = self._dropped.get(run_id, 0) + 1
+        return keep
+
+    def dropped(self, run_id: str) -> int:
+        with self._lock:
+            return self._dropped.get(run_id, 0)
+
+    def finish(self, run_id: str) -> None:
+        """Forget ``run_id``'s counters."""
+        with self._lock:
+            self._kept.pop(run_id, None)
+            self._dropped.pop(run_id, None)
+            for key in [key for key in self._repeats if key[0] == run_id]:
+                del self._repeats[key]
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Like QueueHandler, but keeps the traceback separate for the listener's formatter."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+_budget: Optional[VolumeBudget] = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    log_file: Optional[str] = None,
+    log_format: str = "json",
+    stdout: bool = True,
+    max_bytes: int = 5 * 1024 * 1024,
+    backups: int = 5,
+    max_age: float = 7 * 86400,
+    run_budget: int = 2000,
+    repeat_limit: int = 5,
+) -> None:
+    """Route the root logger through a queue to the rotating log file and/or stdout."""
+    global _listener, _budget
+    shutdown()
+
+    handlers = []
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = SizeAndAgeRotatingFileHandler(log_file, max_bytes, backups, max_age)
+        file_handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+        handlers.append(file_handler)
+    if stdout or not handlers:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(TextFormatter())
+        handlers.append(stream_handler)
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records)
+    queue_handler.addFilter(RunContextFilter())
+    _budget = VolumeBudget(run_budget, repeat_limit)
+    queue_handler.addFilter(_budget)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown() -> None:
+    """Flush the queue and close the log handlers (registered with atexit)."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(shutdown)
+
+
+def new_run_id() -> str:
+    return os.urandom(4).hex()
+
+
+@contextlib.contextmanager
+def run_context(account: str, run_id: Optional[str] = None) -> Iterator[str]:
+    """Tag every record logged in this block (this thread/task) with a run id and account."""
+    run_id = run_id or new_run_id()
+    token = _run.set((run_id, account))
+    try:
+        yield run_id
+    finally:
+        if _budget is not None:
+            dropped = _budget.dropped(run_id)
+            if dropped:
+                # WARNING: always passes the budget it reports on
+                logging.getLogger(__name__).warning(f"Log budget: dropped {dropped} repeated or excess records")
+            _budget.finish(run_id)
+        _run.reset(token)
@@ -0,0 +1,312 @@
+"""
+In-page step macros for the WW check-in flow.
+
+Each macro runs one whole UI step inside the page as a single
+``execute_async_script`` call (wait for elements, fill/select, click) and returns a
+structured dict, replacing the dozens of find/clear/send_keys/click round trips the
+element-by-element path needs. The last argument is always the WebDriver callback.
+
+Results always contain ``ok`` (bool) and, on failure, ``error``.
+"""
+
+# Shared helpers prepended to every macro
+_PRELUDE = r"""
+var done = arguments[arguments.length - 1];
+function waitFor(probe, timeoutMs, cb) {
+    var t0 = Date.now();
+    (function poll() {
+        var found = null;
+        try { found = probe(); } catch (e) { found = null; }
+        if (found) { return cb(found); }
+        if (Date.now() - t0 >= timeoutMs) { return cb(null); }
+        setTimeout(poll, 100);
+    })();
+}
+function byXPath(xpath) {
+    return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function setValue(el, value) {
+    el.focus();
+    var desc = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');
+    if (desc && desc.set) { desc.set.call(el, value); } else { el.value = value; }
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+}
+function isVisible(el) {
+    return !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+}
+// PeopleSoft shows #WAIT_win0 while a server round trip triggered by a field change runs
+function peopleSoftIdle() {
+    var w = document.getElementById('WAIT_win0');
+    return !isVisible(w) && document.readyState === 'complete';
+}
+// Click after the callback so a navigation cannot swallow the script result
+function clickLater(el) {
+    setTimeout(function () {
+        try { el.scrollIntoView({block: 'center'}); } catch (e) {}
+        el.click();
+    }, 0);
+}
+"""
+
+# arguments: username, password, timeoutMs
+LOGIN = _PRELUDE + r"""
+var username = arguments[0], password = arguments[1], timeoutMs = arguments[2];
+waitFor(function () {
+    var u = document.getElementById('userid');
+    var p = document.getElementById('pwd');
+    var b = document.getElementsByName('Submit')[0];
+    return (u && p && b) ? [u, p, b] : null;
+}, timeoutMs, function (els) {
+    if (!els) { return done({ok: false, error: 'login form not found'}); }
+    setValue(els[0], username);
+    setValue(els[1], password);
+    done({ok: true});
+    clickLater(els[2]);
+});
+"""
+
+# arguments: optionText, save (bool), timeoutMs
+SELECT_PUNCH = _PRELUDE + r"""
+var target = arguments[0], save = arguments[1], timeoutMs = arguments[2];
+var started = Date.now();  // timeoutMs covers both waits together
+function findSave() {
+    return byXPath("//input[contains(@id,'TL_LINK_WRK_TL_SAVE_PB') or @value='輸入打卡' or @value='Save']")
+        || byXPath("//button[contains(text(),'輸入打卡') or contains(text(),'Save')]");
+}
+waitFor(function () {
+    return document.getElementById('TL_RPTD_TIME_PUNCH_TYPE$0')
+        || document.querySelector("select[id*='TL_RPTD_TIME_PUNCH_TYPE']");
+}, timeoutMs, function (sel) {
+    if (!sel) { return done({ok: false, error: 'punch type dropdown not found'}); }
+    var options = [], index = -1;
+    for (var i = 0; i < sel.options.length; i++) {
+        var text = (sel.options[i].text || '').trim();
+        if (!text) { continue; }
+        options.push(text);
+        if (text === target) { index = i; }
+    }
+    if (index < 0) { return done({ok: false, error: 'option not found: ' + target, options: options}); }
+    if (sel.selectedIndex !== index) {
+        sel.selectedIndex = index;
+        sel.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+    if (!save) { return done({ok: true, options: options, saved: false}); }
+    waitFor(function () {
+        var btn = findSave();
+        return (btn && !btn.disabled && peopleSoftIdle()) ? btn : null;
+    }, Math.max(0, timeoutMs - (Date.now() - started)), function (btn) {
+        if (!btn) { return done({ok: false, error: 'save button not ready', options: options}); }
+        done({ok: true, options: options, saved: true});
+        clickLater(btn);
+    });
+});
+"""
+
+# arguments: timeoutMs, confirm (bool), ignoreText (text of a popup already handled, or null)
+POPUP_CONFIRM = _PRELUDE + r"""
+var timeoutMs = arguments[0], confirm = arguments[1], ignoreText = arguments[2];
+function popupText(modal) {
+    var text = (modal.innerText || '').trim();
+    if (!text) {
+        var inner = modal.querySelector('.popupText');
+        if (inner) { text = (inner.innerText || '').trim(); }
+    }
+    return text;
+}
+var modalSelectors = ["div[role='alertdialog'][aria-modal='true']", "#ptModTable_0", ".ps_modal_container.ps_popup-msg"];
+waitFor(function () {
+    for (var i = 0; i < modalSelectors.length; i++) {
+        var el = document.querySelector(modalSelectors[i]);
+        if (el && (ignoreText === null || popupText(el) !== ignoreText)) { return el; }
+    }
+    return null;
+}, timeoutMs, function (modal) {
+    if (!modal) { return done({ok: true, found: false}); }
+    var text = popupText(modal);
+    if (!confirm) { return done({ok: true, found: true, text: text, confirmed: false}); }
+    var btn = document.getElementById('#ICOK')
+        || document.querySelector("input.PSPUSHBUTTONTBOK[value='確定']")
+        || byXPath("//input[@type='button' and @value='確定' and contains(@id, 'ICOK')]");
+    if (!btn) { return done({ok: true, found: true, text: text, confirmed: false}); }
+    done({ok: true, found: true, text: text, confirmed: true});
+    clickLater(btn);
+});
+"""
+
+# Synchronous probe (execute_script) for the portal's response to save.
+# arguments: ignoreText (text of a popup already handled, or null)
+# Returns {kind: 'modal'|'saved', text} or null when nothing has shown up yet.
+OUTCOME_PROBE = r"""
+var ignoreText = arguments[0];
+function isVisible(el) {
+    return !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+}
+function popupText(modal) {
+    var text = (modal.innerText || '').trim();
+    if (!text) {
+        var inner = modal.querySelector('.popupText');
+        if (inner) { text = (inner.innerText || '').trim(); }
+    }
+    return text;
+}
+var modalSelectors = ["div[role='alertdialog'][aria-modal='true']", "#ptModTable_0", ".ps_modal_container.ps_popup-msg"];
+for (var i = 0; i < modalSelectors.length; i++) {
+    var modal = document.querySelector(modalSelectors[i]);
+    if (modal) {
+        var text = popupText(modal);
+        if (ignoreText === null || text !== ignoreText) { return {kind: 'modal', text: text}; }
+    }
+}
+var docs = [document];
+var frame = document.querySelector("iframe[src*='TL_WEB_CLOCK']");
+try { if (frame && frame.contentDocument) { docs.push(frame.contentDocument); } } catch (e) {}
+for (var j = 0; j < docs.length; j++) {
+    // PeopleSoft's transient "Saved" notice
+    var saved = docs[j].getElementById('SAVED_win0');
+    if (isVisible(saved)) { return {kind: 'saved', text: (saved.innerText || '').trim()}; }
+}
+return null;
+"""
+
+# ------------------------- Reported time (export) ------------------------- #
+# The reported-time grid is looked for in the top document and every same-origin
+# iframe: it is the first table whose own header row names a date and a time column.
+# Paging follows PeopleSoft conventions: ``$hdown$`` links page through grid rows,
+# *NEXT_WEEK* / *NEXT_PERIOD* controls move to the next period.
+_REPORTED_TIME_PRELUDE = _PRELUDE + r"""
+var DATE_HEADER = /日期|date/i, TIME_HEADER = /時間|time/i;
+var DATE_FIELDS = ["input[id*='DATE_DAY1']", "input[id*='VIEW_DATE']", "input[id*='DERIVED_TL_WEEK'][id*='DATE']",
+                   "input[type='date']"];
+var REFRESH = /重新整理|重新顯示|查詢|refresh|search/i;
+var NEXT_PERIOD_IDS = ["[id*='NEXT_WEEK']", "[id*='NEXT_PERIOD']", "[id*='NEXTPRD']"];
+var NEXT_PERIOD = /下一期間|下一週|下週|next period|next week/i;
+function documents() {
+    var out = [document], frames = document.querySelectorAll('iframe');
+    for (var i = 0; i < frames.length; i++) {
+        try { if (frames[i].contentDocument) { out.push(frames[i].contentDocument); } } catch (e) {}
+    }
+    return out;
+}
+function cellText(cell) { return (cell.innerText || cell.textContent || '').replace(/\s+/g, ' ').trim(); }
+function idleIn(doc) {
+    return !isVisible(doc.getElementById('WAIT_win0')) && doc.readyState === 'complete';
+}
+function enabled(el) {
+    return isVisible(el) && !el.disabled && !/disabled/i.test(el.className || '')
+        && el.getAttribute('aria-disabled') !== 'true';
+}
+function findGrid() {
+    var docs = documents();
+    for (var d = 0; d < docs.length; d++) {
+        var tables = docs[d].getElementsByTagName('table');
+        for (var t = 0; t < tables.length; t++) {
+            var rows = tables[t].rows;
+            for (var r = 0; r < rows.length && r < 3; r++) {
+                var header = [];
+                for (var c = 0; c < rows[r].cells.length; c++) {
+                    if (rows[r].cells[c].tagName === 'TH') { header.push(cellText(rows[r].cells[c])); }
+                }
+                if (!header.length) { continue; }
+                var joined = header.join('|');
+                if (DATE_HEADER.test(joined) && TIME_HEADER.test(joined)) {
+                    return {doc: docs[d], table: tables[t], headerRow: r, header: header};
+                }
+                break;
+            }
+        }
+    }
+    return null;
+}
+function dateField(doc) {
+    for (var i = 0; i < DATE_FIELDS.length; i++) {
+        var el = doc.querySelector(DATE_FIELDS[i]);
+        if (el) { return el; }
+    }
+    return null;
+}
+function byText(doc, pattern) {
+    var els = doc.querySelectorAll("a, button, input[type='button'], input[type='submit']");
+    for (var i = 0; i < els.length; i++) {
+        var text = els[i].innerText || els[i].value || els[i].title || '';
+        if (pattern.test(text) && enabled(els[i])) { return els[i]; }
+    }
+    return null;
+}
+function nextControl(doc) {
+    var rows = doc.querySelectorAll("a[id*='$hdown$']");
+    for (var i = 0; i < rows.length; i++) {
+        if (enabled(rows[i])) { return {kind: 'rows', el: rows[i]}; }
+    }
+    for (var j = 0; j < NEXT_PERIOD_IDS.length; j++) {
+        var el = doc.querySelector(NEXT_PERIOD_IDS[j]);
+        if (el && enabled(el)) { return {kind: 'period', el: el}; }
+    }
+    var link = byText(doc, NEXT_PERIOD);
+    return link ? {kind: 'period', el: link} : null;
+}
+function readGrid(grid) {
+    var rows = [], all = grid.table.rows;
+    for (var r = grid.headerRow + 1; r < all.length; r++) {
+        var cells = [], any = false;
+        for (var c = 0; c < all[r].cells.length; c++) {
+            var text = cellText(all[r].cells[c]);
+            any = any || text !== '';
+            cells.push(text);
+        }
+        if (any) { rows.push(cells); }
+    }
+    return rows;
+}
+"""
+
+# arguments: previousSignature (string or null), timeoutMs
+# Waits until the grid is present, its document idle and (when given) the grid read last
+# time is gone: its table was replaced or its rows differ from previousSignature. The date
+# field is not part of the signature, since REPORTED_TIME_GOTO writes it before the
+# refresh. Marks the table it returns. Returns {ok, header, rows, signature, dateValue, next}.
+READ_REPORTED_TIME = _REPORTED_TIME_PRELUDE + r"""
+var previous = arguments[0], timeoutMs = arguments[1];
+var READ_MARK = 'data-ww-read';
+waitFor(function () {
+    var grid = findGrid();
+    if (!grid || !idleIn(grid.doc)) { return null; }
+    grid.rows = readGrid(grid);
+    grid.signature = JSON.stringify(grid.rows);
+    var replaced = !grid.table.hasAttribute(READ_MARK);
+    return (previous === null || replaced || grid.signature !== previous) ? grid : null;
+}, timeoutMs, function (grid) {
+    if (!grid) {
+        return done({ok: false, error: previous === null ? 'reported time grid not found' : 'page did not change'});
+    }
+    grid.table.setAttribute(READ_MARK, '1');
+    var field = dateField(grid.doc), next = nextControl(grid.doc);
+    done({ok: true, header: grid.header, rows: grid.rows, signature: grid.signature,
+          dateValue: field ? field.value : null, next: next ? next.kind : null});
+});
+"""
+
+# arguments: dateText (formatted like the field's current value), timeoutMs
+REPORTED_TIME_GOTO = _REPORTED_TIME_PRELUDE + r"""
+var dateText = arguments[0], timeoutMs = arguments[1];
+waitFor(function () {
+    var grid = findGrid();
+    return grid && idleIn(grid.doc) ? grid : null;
+}, timeoutMs, function (grid) {
+    if (!grid) { return done({ok: false, error: 'reported time grid not found'}); }
+    var field = dateField(grid.doc);
+    if (!field) { return done({ok: false, error: 'date field not found'}); }
+    setValue(field, dateText);
+    var btn = byText(grid.doc, REFRESH);
+    done({ok: true, refreshed: !!btn});
+    if (btn) { clickLater(btn); }
+});
+"""
+
+# arguments: none. Clicks the next rows / next period control after returning {ok, kind}.
+REPORTED_TIME_NEXT = _REPORTED_TIME_PRELUDE + r"""
+var grid = findGrid();
+var next = grid ? nextControl(grid.doc) : null;
+if (!next) { done({ok: false, error: 'no next page'}); }
+else { done({ok: true, kind: next.kind}); clickLater(next.el); }
+"""
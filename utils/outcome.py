@@ -0,0 +1,123 @@
+"""
+Typed punch outcomes for WW check-in.
+
+After save, the portal answers with one of a few signals: a duplicate-punch prompt
+that must be confirmed, an error message, or a normal confirmation (a popup or
+PeopleSoft's "Saved" marker). ``SeleniumHelper.detect_punch_outcome`` watches for
+all of them at once, feeding each probe answer to an :class:`OutcomeWatch`, and
+reports a :class:`PunchResult`. A popup that is still empty or says nothing known
+is not taken as success: watching continues, and ends UNKNOWN at the timeout.
+"""
+
+from __future__ import annotations
+
+import enum
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+# Fragments of the "your last punch was the same type, select 確定 to continue" prompt
+DUPLICATE_INDICATORS = (
+    "最近的打卡",  # "Recent clock-in"
+    "也是",  # "is also"
+    "選取「確定」",  # "Select 'Confirm'"
+)
+
+# Fragments of portal error messages (checked before the duplicate prompt)
+ERROR_INDICATORS = ("錯誤", "無效", "失敗", "Error", "Invalid", "failed")
+
+# Fragments of confirmation messages (checked last)
+SUCCESS_INDICATORS = ("成功", "已儲存", "已完成", "Success", "success", "Saved", "saved")
+
+
+class PunchOutcome(enum.Enum):
+    SUCCESS = "success"
+    DUPLICATE_CONFIRMED = "duplicate"
+    ERROR = "error"
+    # Save was clicked but nothing recognizable showed up in time
+    UNKNOWN = "unknown"
+
+    @property
+    def ledger_outcome(self) -> str:
+        """Outcome name stored in the run ledger."""
+        return "failed" if self is PunchOutcome.ERROR else self.value
+
+
+@dataclass(frozen=True)
+class PunchResult:
+    outcome: PunchOutcome
+    message: str = ""
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """True only for a confirmed punch; UNKNOWN (save sent, nothing recognized) needs checking."""
+        return self.outcome in (PunchOutcome.SUCCESS, PunchOutcome.DUPLICATE_CONFIRMED)
+
+
+def classify_message(text: str) -> PunchOutcome:
+    """Classify one portal popup message.
+
+    Returns ERROR for error messages, DUPLICATE_CONFIRMED for the duplicate-punch
+    prompt (still to be confirmed by the caller), SUCCESS for a known confirmation
+    and UNKNOWN for anything else (including empty text).
+    """
+    if any(indicator in text for indicator in ERROR_INDICATORS):
+        return PunchOutcome.ERROR
+    if any(indicator in text for indicator in DUPLICATE_INDICATORS):
+        return PunchOutcome.DUPLICATE_CONFIRMED
+    if any(indicator in text for indicator in SUCCESS_INDICATORS):
+        return PunchOutcome.SUCCESS
+    return PunchOutcome.UNKNOWN
+
+
+class OutcomeWatch:
+    """Classification state of one post-save watch, fed the ``OUTCOME_PROBE`` answers.
+
+    ``observe`` returns the final outcome once it is known, else None (keep polling).
+    When it leaves ``prompt`` set, the duplicate-punch prompt is showing: the caller
+    clicks 確定 and reports back through ``confirmed``.
+    """
+
+    def __init__(self) -> None:
+        self.messages: List[str] = []
+        self.duplicate = False
+        # Text of the handled duplicate prompt; the probe skips a modal still showing it
+        self.handled_text: Optional[str] = None
+        self.prompt: Optional[str] = None
+
+    @property
+    def message(self) -> str:
+        return "\n".join(self.messages)
+
+    def observe(self, signal: Optional[dict]) -> Optional[PunchOutcome]:
+        if not signal:
+            return None
+        text = (signal.get("text") or "").strip()
+        if text and (not self.messages or self.messages[-1] != text):
+            self.messages.append(text)
+        if signal.get("kind") == "saved":
+            return self._done(PunchOutcome.SUCCESS)
+        kind = classify_message(text)
+        if kind is PunchOutcome.DUPLICATE_CONFIRMED:
+            if not self.duplicate:
+                self.prompt = text
+            return None
+        # Empty (not rendered yet) or unrecognized: wait for more
+        return None if kind is PunchOutcome.UNKNOWN else self._done(kind)
+
+    def confirmed(self, ok: bool) -> Optional[PunchOutcome]:
+        """Report whether the pending duplicate prompt was confirmed."""
+        if not ok:
+            self.messages.append("duplicate prompt could not be confirmed")
+            return PunchOutcome.ERROR
+        self.duplicate = True
+        self.handled_text, self.prompt = self.prompt, None
+        return None
+
+    def timed_out(self) -> PunchOutcome:
+        # A confirmed duplicate needs no follow-up message to count as done
+        return PunchOutcome.DUPLICATE_CONFIRMED if self.duplicate else PunchOutcome.UNKNOWN
+
+    def _done(self, outcome: PunchOutcome) -> PunchOutcome:
+        return PunchOutcome.DUPLICATE_CONFIRMED if self.duplicate and outcome is PunchOutcome.SUCCESS else outcome
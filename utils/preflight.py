@@ -0,0 +1,138 @@
+"""
+Browser-free preflight checks for a check-in run.
+
+Everything that can make a run a no-op or a certain failure is checked here before
+any delay is slept or Chrome is started:
+- credentials present
+- punch type resolved
+- today is a work day and not in the skip-date file
+- punch not already completed today (run ledger)
+- no concurrent run for the same account (per-account file lock)
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+try:  # POSIX only; Windows runs go through WSL/containers
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+from utils.config import Settings, get_settings
+from utils.ledger import RunLedger
+from utils.scheduler import load_work_schedule
+
+
+logger = logging.getLogger(__name__)
+
+VALID_PUNCH_TYPES = ("Time-In", "Time-Out")
+
+
+class RunLock:
+    """Non-blocking exclusive lock file, one per account."""
+
+    def __init__(self, name: str, directory: Optional[str] = None) -> None:
+        directory = directory or get_settings().lock_dir
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        self.path = os.path.join(directory, f".ww_check_in.{safe_name}.lock")
+        self._fh = None
+
+    def acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fh = open(self.path, "a+")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        fh.seek(0)
+        fh.truncate()
+        fh.write(f"{os.getpid()}\n")
+        fh.flush()
+        self._fh = fh
+        return True
+
+    def release(self) -> None:
+        if self._fh is not None:
+            try:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._fh.close()
+                self._fh = None
+
+    def __enter__(self) -> "RunLock":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+@dataclass
+class PreflightResult:
+    proceed: bool
+    # When not proceeding: True means there is simply nothing to do (exit 0), False a real error
+    skip: bool = False
+    reason: str = ""
+    lock: Optional[RunLock] = None
+    elapsed_ms: float = 0.0
+
+
+def run_preflight(
+    username: Optional[str],
+    password: Optional[str],
+    target_punch: str,
+    ledger: Optional[RunLedger] = None,
+    force: bool = False,
+    today: Optional[datetime.date] = None,
+    settings: Optional[Settings] = None,
+) -> PreflightResult:
+    """Run all browser-free checks. On success the returned ``lock`` is held and must be released."""
+    start = time.perf_counter()
+    settings = settings or get_settings()
+    today = today or datetime.date.today()
+
+    def _done(result: PreflightResult) -> PreflightResult:
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    if not username or not password:
+        return _done(PreflightResult(False, reason="missing WW_USERNAME or WW_PASSWORD"))
+
+    if target_punch not in VALID_PUNCH_TYPES:
+        return _done(PreflightResult(False, reason=f"unresolved punch type: {target_punch}"))
+
+    schedule = load_work_schedule(settings)
+    if schedule is not None and not force:
+        if today in schedule.skip_dates:
+            return _done(PreflightResult(False, skip=True, reason=f"{today} is listed in SKIP_DATES_FILE"))
+        if today.isoweekday() not in schedule.work_days:
+            return _done(PreflightResult(False, skip=True, reason=f"{today:%A} is not in WORK_DAYS"))
+
+    if ledger is not None and not force:
+        done = ledger.find_completed(username, target_punch, today)
+        if done is not None:
+            return _done(
+                PreflightResult(
+                    False,
+                    skip=True,
+                    reason=(
+                        f"already completed today at {done['finished_at']} "
+                        f"(ledger run #{done['id']}, {done['outcome']})"
+                    ),
+                )
+            )
+
+    lock = RunLock(username, settings.lock_dir)
+    if not lock.acquire():
+        return _done(PreflightResult(False, skip=True, reason=f"another run for {username} is in progress"))
+
+    return _done(PreflightResult(True, lock=lock))
@@ -0,0 +1,387 @@
+"""
+Watchdog and orphan reaper for Chrome / chromedriver processes.
+
+- ``track``/``untrack``: SeleniumHelper registers the chromedriver PID of every live
+  browser so the reaper never touches a session in use.
+- :class:`Watchdog`: hard wall-clock limit for one helper; on expiry the whole
+  chromedriver -> chrome process tree is killed and reaped, which also unblocks a hung
+  WebDriver call or ``quit()``.
+- :func:`reap_stale`: at startup, kills automation Chrome/chromedriver processes left
+  behind by earlier runs (SIGKILL, a hung ``quit()``, a crash in ``_setup_driver``) and
+  removes their temp profiles, reporting what was reclaimed.
+
+Processes are read from /proc, falling back to ``ps`` where /proc is unavailable.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import glob
+import logging
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+_DRIVER_NAMES = ("chromedriver",)
+_CHROME_NAMES = (
+    "chrome",
+    "chromium",
+    "chromium-browser",
+    "google-chrome",
+    "chrome_crashpad",
+    "chrome_crashpad_handler",
+)
+# Only Chrome instances started for automation are ever reaped
+_AUTOMATION_MARKERS = (
+    "--enable-automation",
+    "--test-type=webdriver",
+    "/.com.google.Chrome.",
+    "/.org.chromium.Chromium.",
+    "/ww-cdp-",  # DRIVER_BACKEND=cdp profiles (utils.cdp)
+)
+_SUBREAPER_NAMES = ("init", "systemd", "tini", "catatonit", "dumb-init")
+_PROFILE_PATTERNS = (".com.google.Chrome.*", ".org.chromium.Chromium.*", "scoped_dir*", "ww-cdp-*")
+# Where a crashpad handler names the profile it belongs to
+_PROFILE_ARG = re.compile(r"--(?:user-data-dir|database)=(\S+)")
+
+_live_roots: Set[int] = set()
+_live_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ProcInfo:
+    pid: int
+    ppid: int
+    uid: int
+    name: str
+    cmdline: str
+
+
+@dataclass
+class ReapReport:
+    killed: List[int] = field(default_factory=list)
+    profiles_removed: int = 0
+    bytes_freed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"killed {len(self.killed)} stale browser processes, removed {self.profiles_removed} temp profiles "
+            f"({self.bytes_freed / (1024 * 1024):.1f} MB)"
+        )
+
+
+def track(pid: Optional[int]) -> None:
+    """Mark ``pid`` (a chromedriver) as belonging to a live session."""
+    if pid:
+        with _live_lock:
+            _live_roots.add(pid)
+
+
+def untrack(pid: Optional[int]) -> None:
+    if pid:
+        with _live_lock:
+            _live_roots.discard(pid)
+
+
+# ------------------------- Process table ------------------------- #
+def list_processes() -> Dict[int, ProcInfo]:
+    """Snapshot of running processes (pid -> info)."""
+    if os.path.isdir("/proc/self"):
+        return _list_proc()
+    return _list_ps()
+
+
+def _list_proc() -> Dict[int, ProcInfo]:
+    procs: Dict[int, ProcInfo] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        path = f"/proc/{entry}"
+        try:
+            with open(f"{path}/stat") as fh:
+                stat = fh.read()
+            with open(f"{path}/cmdline", "rb") as fh:
+                cmdline = fh.read().replace(b"\0", b" ").decode("utf-8", "ignore").strip()
+            uid = os.stat(path).st_uid
+        except OSError:
+            continue  # exited while we were looking
+        # Field 2 is "(comm)" and may itself contain spaces or parentheses
+        name = stat[stat.index("(") + 1 : stat.rindex(")")]
+        fields = stat[stat.rindex(")") + 2 :].split()
+        if fields[0] == "Z":
+            continue
+        procs[int(entry)] = ProcInfo(int(entry), int(fields[1]), uid, name, cmdline)
+    return procs
+
+
+def _list_ps() -> Dict[int, ProcInfo]:
+    procs: Dict[int, ProcInfo] = {}
+    try:
+        out = subprocess.check_output(["ps", "-eo", "pid=,ppid=,uid=,comm=,args="], text=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.debug(f"ps unavailable: {e}")
+        return procs
+    for line in out.splitlines():
+        parts = line.split(None, 4)
+        if len(parts) < 4:
+            continue
+        pid, ppid, uid = int(parts[0]), int(parts[1]), int(parts[2])
+        procs[pid] = ProcInfo(pid, ppid, uid, os.path.basename(parts[3]), parts[4] if len(parts) > 4 else "")
+    return procs
+
+
+def descendants(root: int, procs: Optional[Dict[int, ProcInfo]] = None) -> List[int]:
+    """All descendants of ``root`` (children first-level first)."""
+    procs = procs if procs is not None else list_processes()
+    children: Dict[int, List[int]] = {}
+    for info in procs.values():
+        children.setdefault(info.ppid, []).append(info.pid)
+    found: List[int] = []
+    queue = list(children.get(root, []))
+    while queue:
+        pid = queue.pop(0)
+        found.append(pid)
+        queue.extend(children.get(pid, []))
+    return found
+
+
+def tree(root: int) -> List[int]:
+    """``root`` plus its current descendants."""
+    return [root] + descendants(root)
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            return fh.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+def _reap(pids: Iterable[int]) -> None:
+    """Collect exit status of any of ``pids`` that are our own children (no zombies left)."""
+    for pid in pids:
+        try:
+            os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            pass
+    # As container init (PID 1), orphans are re-parented to us and must be reaped here too
+    if os.getpid() == 1:
+        while True:
+            try:
+                if os.waitpid(-1, os.WNOHANG)[0] == 0:
+                    break
+            except ChildProcessError:
+                break
+
+
+def kill_tree(root: int, grace: float = 3.0) -> List[int]:
+    """SIGTERM ``root`` and all its descendants, SIGKILL what is left after ``grace`` seconds.
+
+    Returns the PIDs that were signalled.
+    """
+    return kill_pids(tree(root), grace)
+
+
+def kill_pids(pids: Iterable[int], grace: float = 3.0) -> List[int]:
+    """SIGTERM ``pids`` that are still running, SIGKILL them after ``grace`` seconds, reap them."""
+    signalled: List[int] = []
+    for pid in pids:
+        if not is_alive(pid):
+            continue
+        try:
+            os.kill(pid, signal.SIGTERM)
+            signalled.append(pid)
+        except (ProcessLookupError, PermissionError):
+            continue
+    end = time.monotonic() + grace
+    while time.monotonic() < end:
+        _reap(signalled)
+        if not any(is_alive(pid) for pid in signalled):
+            break
+        time.sleep(0.1)
+    for pid in signalled:
+        if is_alive(pid):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    _reap(signalled)
+    return signalled
+
+
+# ------------------------- Watchdog ------------------------- #
+class Watchdog:
+    """Kill the browser process tree of a session that outlives ``limit`` seconds.
+
+    ``root_pid`` is called at expiry so a driver restarted mid-run is still covered.
+    """
+
+    def __init__(self, limit: float, root_pid: Callable[[], Optional[int]], name: str = "") -> None:
+        self.limit = limit
+        self.root_pid = root_pid
+        self.name = name
+        self.fired = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Watchdog":
+        self._thread = threading.Thread(target=self._run, name=f"watchdog-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _run(self) -> None:
+        if self._stop.wait(self.limit):
+            return
+        pid = self.root_pid()
+        if not pid:
+            return
+        self.fired = True
+        killed = kill_tree(pid)
+        logger.error(
+            f"Watchdog{f' [{self.name}]' if self.name else ''}: session exceeded {self.limit:.0f}s; "
+            f"killed browser process tree ({len(killed)} processes)"
+        )
+
+    def __enter__(self) -> "Watchdog":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ------------------------- Startup cleanup ------------------------- #
+def _is_browser(info: ProcInfo) -> bool:
+    if info.name in _DRIVER_NAMES:
+        return True
+    return info.name in _CHROME_NAMES and any(marker in info.cmdline for marker in _AUTOMATION_MARKERS)
+
+
+def _is_crashpad(info: ProcInfo) -> bool:
+    return info.name.startswith("chrome_crashpad")
+
+
+def _profile_of(cmdline: str) -> Optional[str]:
+    """The temp profile directory a ``--user-data-dir``/``--database`` argument points into."""
+    for match in _PROFILE_ARG.finditer(cmdline):
+        parts = match.group(1).split("/")
+        for index, part in enumerate(parts):
+            if any(fnmatch.fnmatch(part, pattern) for pattern in _PROFILE_PATTERNS):
+                return "/".join(parts[: index + 1])
+    return None
+
+
+def find_orphans(procs: Optional[Dict[int, ProcInfo]] = None) -> List[int]:
+    """Roots of automation browser trees whose launching process is gone (re-parented).
+
+    Chrome detaches its crashpad handler on purpose, so a handler counts as orphaned
+    only once no browser outside the trees found here still uses its profile (it may
+    belong to another process's live session).
+    """
+    procs = procs if procs is not None else list_processes()
+    uid = os.getuid()
+    with _live_lock:
+        protected = set(_live_roots)
+    for root in list(protected):
+        protected.update(descendants(root, procs))
+
+    orphans: List[int] = []
+    handlers: List[ProcInfo] = []
+    for info in procs.values():
+        if info.uid != uid or info.pid in protected or not _is_browser(info):
+            continue
+        parent = procs.get(info.ppid)
+        # The launching process is gone: re-parented to init or a subreaper
+        if not (info.ppid <= 1 or parent is None or parent.name in _SUBREAPER_NAMES):
+            continue
+        if _is_crashpad(info):
+            handlers.append(info)
+        else:
+            orphans.append(info.pid)
+
+    reaped = set(orphans)
+    for root in orphans:
+        reaped.update(descendants(root, procs))
+    in_use = " ".join(
+        info.cmdline
+        for info in procs.values()
+        if info.name in _CHROME_NAMES and not _is_crashpad(info) and info.pid not in reaped
+    )
+    for handler in handlers:
+        profile = _profile_of(handler.cmdline)
+        if profile is not None and not re.search(re.escape(profile) + r"(?:/|\s|$)", in_use):
+            orphans.append(handler.pid)
+    return orphans
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def remove_stale_profiles(
+    procs: Optional[Dict[int, ProcInfo]] = None, min_age: float = 300.0, tmpdir: Optional[str] = None
+) -> ReapReport:
+    """Delete Chrome/chromedriver temp profile dirs that no running process references."""
+    procs = procs if procs is not None else list_processes()
+    report = ReapReport()
+    tmpdir = tmpdir or tempfile.gettempdir()
+    in_use = " ".join(info.cmdline for info in procs.values())
+    now = time.time()
+    for pattern in _PROFILE_PATTERNS:
+        for path in glob.glob(os.path.join(tmpdir, pattern)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_uid != os.getuid() or now - stat.st_mtime < min_age or path in in_use:
+                continue
+            size = _dir_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+            if not os.path.exists(path):
+                report.profiles_removed += 1
+                report.bytes_freed += size
+    return report
+
+
+def reap_stale(min_profile_age: float = 300.0) -> ReapReport:
+    """Kill orphaned automation browsers and remove unused temp profiles; log what was reclaimed."""
+    procs = list_processes()
+    killed: List[int] = []
+    for root in find_orphans(procs):
+        killed.extend(kill_tree(root))
+    # Re-read: killed browsers no longer hold their profiles
+    report = remove_stale_profiles(list_processes() if killed else procs, min_age=min_profile_age)
+    report.killed = killed
+    if killed or report.profiles_removed:
+        logger.info(f"Reaper: {report}")
+    else:
+        logger.debug("Reaper: nothing to reclaim")
+    return report
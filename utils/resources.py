@@ -0,0 +1,131 @@
+"""
+Per-step memory / CPU sampling of a session's browser process tree.
+
+A background thread samples the chromedriver -> chrome tree every ``interval`` seconds
+and attributes each sample to the step currently running (``Deadline.step``):
+- peak RSS of the whole tree (sum over processes; shared pages count once per process)
+- CPU seconds (user + system) consumed by the tree during the step
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from utils import reaper
+
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class StepUsage:
+    step: str
+    peak_rss_mb: float = 0.0
+    cpu_seconds: float = 0.0
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/statm") as fh:
+        return int(fh.read().split()[1]) * _PAGE_SIZE
+
+
+def _cpu_ticks(pid: int) -> int:
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 of the full stat line
+    return int(fields[11]) + int(fields[12])
+
+
+class ResourceSampler:
+    """Sample the process tree under ``root_pid()`` and bucket usage by ``current_step()``."""
+
+    def __init__(
+        self,
+        root_pid: Callable[[], Optional[int]],
+        current_step: Callable[[], Optional[str]],
+        interval: float = 0.5,
+    ) -> None:
+        self.root_pid = root_pid
+        self.current_step = current_step
+        self.interval = interval
+        self.steps: Dict[str, StepUsage] = {}
+        self.peak_rss_mb = 0.0
+        self._last_ticks: Dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> None:
+        """Take one sample now."""
+        root = self.root_pid()
+        if not root:
+            return
+        rss = 0
+        cpu_ticks = 0
+        for pid in reaper.tree(root):
+            try:
+                rss += _rss_bytes(pid)
+                ticks = _cpu_ticks(pid)
+            except (OSError, ValueError, IndexError):
+                continue  # exited between listing and reading
+            # Ticks a process accumulated before it was first seen count to the current step
+            cpu_ticks += max(ticks - self._last_ticks.get(pid, 0), 0)
+            self._last_ticks[pid] = ticks
+
+        label = self.current_step() or "startup"
+        usage = self.steps.setdefault(label, StepUsage(label))
+        rss_mb = rss / (1024 * 1024)
+        usage.peak_rss_mb = max(usage.peak_rss_mb, rss_mb)
+        usage.cpu_seconds += cpu_ticks / _CLK_TCK
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:  # never let sampling break a punch
+                logger.debug(f"Resource sample failed: {e}")
+
+    def start(self) -> "ResourceSampler":
+        if os.path.isdir("/proc/self"):
+            self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        try:
+            self.sample()
+        except Exception:
+            pass
+
+    def __enter__(self) -> "ResourceSampler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(usage.cpu_seconds for usage in self.steps.values())
+
+    def summary(self) -> List[StepUsage]:
+        """Per-step usage in the order steps were first seen."""
+        return list(self.steps.values())
+
+    def log_summary(self) -> None:
+        if not self.steps:
+            return
+        logger.info(f"Browser resources: peak RSS {self.peak_rss_mb:.0f} MB, CPU {self.cpu_seconds:.1f}s")
+        for usage in self.summary():
+            logger.info(f"  {usage.step}: peak RSS {usage.peak_rss_mb:.0f} MB, CPU {usage.cpu_seconds:.2f}s")
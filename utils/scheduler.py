@@ -0,0 +1,175 @@
+"""
+In-process punch scheduler driven by WORK_DAYS / WORK_START_TIME / WORK_END_TIME.
+
+Replaces crontab-based triggering for long-running (daemon) deployments:
+- A calendar of punch events is precomputed from the work schedule and a skip-date file
+- The asyncio loop sleeps until exactly the next event, then runs the flow in-process
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, Iterator, List, Optional
+
+from utils.config import Settings, get_settings, strip_comment
+
+
+logger = logging.getLogger(__name__)
+
+# Longest single asyncio.sleep; the remaining time is recomputed from the wall clock after
+# each chunk so host suspend or NTP adjustments cannot make us miss an event.
+_MAX_SLEEP_CHUNK = 3600.0
+
+
+@dataclass(frozen=True)
+class PunchEvent:
+    at: datetime.datetime
+    punch_type: str  # "Time-In" | "Time-Out"
+
+
+@dataclass(frozen=True)
+class WorkSchedule:
+    work_days: FrozenSet[int]  # ISO weekdays, 1=Monday .. 7=Sunday
+    start: datetime.time
+    end: datetime.time
+    skip_dates: FrozenSet[datetime.date] = frozenset()
+
+    def is_work_day(self, day: datetime.date) -> bool:
+        return day.isoweekday() in self.work_days and day not in self.skip_dates
+
+    def events_for(self, day: datetime.date) -> List[PunchEvent]:
+        if not self.is_work_day(day):
+            return []
+        return [
+            PunchEvent(datetime.datetime.combine(day, self.start), "Time-In"),
+            PunchEvent(datetime.datetime.combine(day, self.end), "Time-Out"),
+        ]
+
+    def iter_events(self, after: datetime.datetime) -> Iterator[PunchEvent]:
+        """Yield events strictly after ``after``, in order, indefinitely."""
+        day = after.date()
+        while True:
+            for event in self.events_for(day):
+                if event.at > after:
+                    yield event
+            day += datetime.timedelta(days=1)
+
+    def build_calendar(self, after: datetime.datetime, horizon_days: int = 14) -> List[PunchEvent]:
+        """Precompute all events in ``(after, after + horizon_days]``."""
+        limit = after + datetime.timedelta(days=horizon_days)
+        events: List[PunchEvent] = []
+        for event in self.iter_events(after):
+            if event.at > limit:
+                break
+            events.append(event)
+        return events
+
+    def punch_for(self, now: datetime.datetime) -> str:
+        """Pick the punch type for an ad-hoc run: Time-In before the shift midpoint, else Time-Out."""
+        start = datetime.datetime.combine(now.date(), self.start)
+        end = datetime.datetime.combine(now.date(), self.end)
+        midpoint = start + (end - start) / 2
+        return "Time-In" if now < midpoint else "Time-Out"
+
+
+def load_skip_dates(path: Optional[str]) -> FrozenSet[datetime.date]:
+    """Read holidays/leave days, one per line.
+
+    Accepts ``YYYY-MM-DD`` or an inclusive range ``YYYY-MM-DD..YYYY-MM-DD``; blank lines
+    and ``#`` comments are ignored. A missing file yields an empty set.
+    """
+    if not path or not os.path.exists(path):
+        return frozenset()
+    dates = set()
+    with open(path, encoding="utf-8") as fh:
+        for lineno, raw in enumerate(fh, 1):
+            line = strip_comment(raw)
+            if not line:
+                continue
+            try:
+                if ".." in line:
+                    first, last = (datetime.date.fromisoformat(x.strip()) for x in line.split("..", 1))
+                    day = first
+                    while day <= last:
+                        dates.add(day)
+                        day += datetime.timedelta(days=1)
+                else:
+                    dates.add(datetime.date.fromisoformat(line))
+            except ValueError:
+                logger.warning(f"Ignoring invalid skip date at {path}:{lineno}: {line}")
+    return frozenset(dates)
+
+
+def load_work_schedule(settings: Optional[Settings] = None) -> Optional[WorkSchedule]:
+    """Build the schedule from config, or None when WORK_* settings are absent."""
+    settings = settings or get_settings()
+    if not (settings.work_days and settings.work_start and settings.work_end):
+        return None
+    return WorkSchedule(
+        work_days=settings.work_days,
+        start=settings.work_start,
+        end=settings.work_end,
+        skip_dates=load_skip_dates(settings.skip_dates_file),
+    )
+
+
+async def sleep_until(target: datetime.datetime) -> None:
+    """Sleep until a local wall-clock time."""
+    # asyncio is imported lazily: the CLI uses this module for schedule checks on every run
+    import asyncio
+
+    while True:
+        remaining = (target - datetime.datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, _MAX_SLEEP_CHUNK))
+
+
+async def run_schedule(
+    run_punch: Callable[[str], bool],
+    load_schedule: Callable[[], Optional[WorkSchedule]] = load_work_schedule,
+    horizon_days: int = 14,
+) -> None:
+    """Run ``run_punch(punch_type)`` at every scheduled event, forever.
+
+    The calendar is rebuilt from a freshly loaded schedule (including the skip-date file)
+    after every event and re-checked right before an event fires, so edits take effect
+    without restarting the daemon. ``run_punch`` is blocking and runs in a worker thread.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    announced: Optional[WorkSchedule] = None
+    while True:
+        schedule = load_schedule()
+        if schedule is None:
+            raise RuntimeError("WORK_DAYS, WORK_START_TIME and WORK_END_TIME must be set for daemon mode")
+
+        calendar = schedule.build_calendar(datetime.datetime.now(), horizon_days)
+        if not calendar:
+            logger.info(f"No punch events in the next {horizon_days} days; checking again tomorrow")
+            await sleep_until(datetime.datetime.now() + datetime.timedelta(days=1))
+            continue
+        if schedule != announced:
+            logger.info(
+                "Scheduled punches: "
+                + ", ".join(f"{e.at:%a %Y-%m-%d %H:%M} {e.punch_type}" for e in calendar[:6])
+                + (f" (+{len(calendar) - 6} more)" if len(calendar) > 6 else "")
+            )
+        announced = schedule
+
+        event = calendar[0]
+        logger.info(f"Next punch: {event.punch_type} at {event.at:%Y-%m-%d %H:%M:%S}")
+        await sleep_until(event.at)
+
+        # Pick up schedule/skip-date edits made while we were asleep
+        current = load_schedule()
+        if current is None or event not in current.events_for(event.at.date()):
+            logger.info(f"Skipping {event.punch_type} at {event.at:%Y-%m-%d %H:%M}: no longer scheduled")
+            continue
+
+        ok = await loop.run_in_executor(None, run_punch, event.punch_type)
+        logger.info(f"Scheduled {event.punch_type} finished: {'success' if ok else 'failed'}")
@@ -8,10 +8,16 @@ the main script remains small and easy to maintain.
 import logging
 import os
 import shutil
+import socket
+import ssl
 import subprocess
 import re
 import time
-from typing import Iterable, List, Optional, Tuple
+import functools
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -19,31 +25,294 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from dotenv import load_dotenv
-from utils.config import get_config_value
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+from utils import macros, reaper
+from utils.config import Settings, get_settings
+from utils.deadline import Deadline
+from utils.flow import Sleep, Steps, Until, advance
+from utils.outcome import OutcomeWatch, PunchOutcome, PunchResult
 
 
-# Load environment variables
-load_dotenv()
-
 logger = logging.getLogger(__name__)
 
+_MODULE_LOADED = time.monotonic()
+
+
+def process_elapsed() -> float:
+    """Seconds since this process started (from /proc on Linux, else since this module loaded)."""
+    try:
+        with open("/proc/self/stat") as fh:
+            # Field 22 (starttime) comes after the parenthesised command name
+            start_ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _MODULE_LOADED
+
 
 Selector = Tuple[By, str]
+# (frame, by, locator)
+CacheKey = Tuple[str, str, str]
+# WebDriverWait condition telling when a freshly loaded page is usable
+ReadyPredicate = Callable[[webdriver.Chrome], object]
+T = TypeVar("T")
+
+# Locators shared by the sync and async helpers
+CLOCK_IFRAME: Selector = (By.CSS_SELECTOR, "iframe[src*='TL_WEB_CLOCK']")
+# Landing page tile 我的出勤/工時 and its 工時回報 entry
+TIME_GROUPLET_ID = "win0groupletPTNUI_LAND_REC_GROUPLET$1"
+TIME_REPORTED_ID = "Z_ESS_TIMEREPORTED$2"
+ONLINE_CHECKIN_SELECTORS: List[Selector] = [
+    # Direct role-link with steplabel
+    (By.XPATH, "//div[@role='link' and @steplabel='線上打卡']"),
+    # Container that includes target label text
+    (
+        By.XPATH,
+        "//div[contains(@id,'PTGP_STEP_DVW_PTGP_STEP_BTN_GB')][.//span[normalize-space()='線上打卡']]",
+    ),
+    # From label id to container
+    (
+        By.XPATH,
+        "//*[@id='PTGP_STEP_DVW_PTGP_STEP_LABEL$3']/ancestor::div[contains(@id,'PTGP_STEP_DVW_PTGP_"
+        "STEP_BTN_GB')]",
+    ),
+]
+# Step listing punches already reported (used by --export)
+REPORTED_TIME_STEP_SELECTORS: List[Selector] = [
+    (
+        By.XPATH,
+        "//div[@role='link' and (contains(@steplabel,'已回報') or contains(@steplabel,'檢視')"
+        " or contains(@steplabel,'Reported'))]",
+    ),
+    (
+        By.XPATH,
+        "//div[contains(@id,'PTGP_STEP_DVW_PTGP_STEP_BTN_GB')][.//span[contains(normalize-space(),'已回報')"
+        " or contains(normalize-space(),'Reported')]]",
+    ),
+]
+PUNCH_DROPDOWN_SELECTORS: List[Selector] = [
+    (By.ID, "TL_RPTD_TIME_PUNCH_TYPE$0"),
+    (By.CSS_SELECTOR, "select[id*='TL_RPTD_TIME_PUNCH_TYPE']"),
+    (By.XPATH, "//select[contains(@id,'TL_RPTD_TIME_PUNCH_TYPE')]"),
+]
+SAVE_BUTTON_SELECTORS: List[Selector] = [
+    (By.XPATH, "//input[contains(@id,'TL_LINK_WRK_TL_SAVE_PB') or @value='輸入打卡' or @value='Save']"),
+    (By.XPATH, "//button[contains(text(),'輸入打卡') or contains(text(),'Save')]"),
+]
+POPUP_OK_SELECTORS: List[Selector] = [
+    (By.ID, "#ICOK"),
+    (By.CSS_SELECTOR, "input[id='#ICOK'][value='確定']"),
+    (By.CSS_SELECTOR, "input.PSPUSHBUTTONTBOK[value='確定']"),
+    (By.XPATH, "//input[@type='button' and @value='確定' and contains(@id, 'ICOK')]"),
+]
+
+
+def _retry_on_stale(method):
+    """Re-run a step once, with a cleared element cache, if a cached handle went stale."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except StaleElementReferenceException:
+            self.invalidate_elements("stale element reference")
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _retry_steps_on_stale(method):
+    """Step-sequence counterpart of ``_retry_on_stale``."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return (yield from method(self, *args, **kwargs))
+        except StaleElementReferenceException:
+            self.invalidate_elements("stale element reference")
+            return (yield from method(self, *args, **kwargs))
+
+    return wrapper
 
 
 class SeleniumHelper:
     """High-level helper for Selenium operations with robust utilities."""
 
-    def __init__(self) -> None:
-        self.driver: Optional[webdriver.Chrome] = None
-        self.wait: Optional[WebDriverWait] = None
-        self._setup_driver()
+    def __init__(self, settings: Optional[Settings] = None, deadline: Optional[Deadline] = None) -> None:
+        self.settings = settings or get_settings()
+        # Run-level budget; every wait and sleep below is clamped to what is left of it
+        self.deadline = deadline or Deadline()
+        # Chrome is started lazily on first use of ``driver`` so no-op runs never pay for it
+        self._driver: Optional[webdriver.Chrome] = None
+        self._wait: Optional[WebDriverWait] = None
+        self._staged_save = None
+        self.last_popup_text: Optional[str] = None
+        self._driver_path_future: Optional[Future] = None
+        self._warming = False
+        self._initial_url: Optional[str] = None
+        # Remote backend: endpoint holding the current session
+        self._endpoint: Optional[str] = None
+        # Element handles for the current page generation; cleared on navigation and
+        # page-changing clicks, keyed by the frame they were found in
+        self._elements: Dict[CacheKey, object] = {}
+        self._frame = "top"
+
+    @property
+    def driver(self) -> webdriver.Chrome:
+        if self._driver is None:
+            self._setup_driver()
+        return self._driver
+
+    @property
+    def wait(self) -> WebDriverWait:
+        if self._wait is None:
+            self._setup_driver()
+        return self._wait
+
+    @property
+    def remote(self) -> bool:
+        return self.settings.driver_backend == "remote"
+
+    @property
+    def driver_pid(self) -> Optional[int]:
+        """PID of the chromedriver process (root of the browser process tree), if running.
+
+        Always None for remote sessions: their processes live on the endpoint's host.
+        """
+        try:
+            return self._driver.service.process.pid
+        except AttributeError:
+            return None
+
+    @property
+    def started(self) -> bool:
+        """Whether a browser has actually been launched."""
+        return self._driver is not None
 
     # ------------------------- Driver Setup ------------------------- #
-    def _setup_driver(self) -> None:
+    def warm_up(self, url: Optional[str] = None) -> None:
+        """Start browser-free startup work in background threads.
+
+        Resolves the chromedriver (version probes, possibly webdriver-manager) and, when
+        ``url`` is given, warms DNS and TCP/TLS to its host. ``start``/``driver`` pick up the
+        resolved path instead of probing again. With the remote backend, the endpoints'
+        health is checked instead of resolving a driver; the CDP backend needs no driver.
+        Safe to call more than once.
+        """
+        if self._warming or self._driver is not None:
+            return
+        self._warming = True
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup")
+        if self.remote:
+            from utils import grid
+
+            pool.submit(grid.get_pool(self.settings).refresh)
+        elif self.settings.driver_backend == "local":
+            self._driver_path_future = pool.submit(self._resolve_driver_path)
+        if url:
+            pool.submit(self._preconnect, url)
+        pool.shutdown(wait=False)
+
+    def start(self, initial_url: Optional[str] = None) -> None:
+        """Launch Chrome now, opening ``initial_url`` as its first page (no extra navigation)."""
+        if self._driver is None:
+            self._setup_driver(initial_url)
+
+    # Flags for CHROME_PROFILE=lean: the flow only needs a few form controls, so trade
+    # everything else for a smaller, more predictable footprint per session
+    LEAN_ARGUMENTS = (
+        "--window-size=1024,768",
+        "--disable-extensions",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--disable-client-side-phishing-detection",
+        "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication",
+        "--no-first-run",
+        "--mute-audio",
+        "--metrics-recording-only",
+        "--renderer-process-limit=2",
+        "--js-flags=--max-old-space-size=128",
+    )
+
+    @staticmethod
+    def _preconnect(url: str, timeout: float = 5.0) -> None:
+        """Resolve the host and complete a TCP (+TLS) handshake to warm the path to the portal."""
+        parsed = urlparse(url)
+        host = parsed.hostname
+        if not host:
+            return
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        start = time.monotonic()
+        try:
+            socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+            resolved = time.monotonic()
+            with socket.create_connection((host, port), timeout=timeout) as sock:
+                if parsed.scheme == "https":
+                    ctx = ssl.create_default_context()
+                    with ctx.wrap_socket(sock, server_hostname=host):
+                        pass
+            logger.debug(
+                f"Preconnected to {host}:{port} (dns {(resolved - start) * 1000:.0f}ms, "
+                f"total {(time.monotonic() - start) * 1000:.0f}ms)"
+            )
+        except Exception as e:
+            logger.debug(f"Preconnect to {host}:{port} failed: {e}")
+
+    def _resolve_driver_path(self) -> str:
+        """Pick a chromedriver matching the installed Chrome, falling back to webdriver-manager."""
+        chrome_binary = self.settings.chrome_binary
+
+        # Resolve chromedriver path preferring local/system installs
+        driver_path = self._select_best_chromedriver()
+
+        # If we explicitly selected a driver via env, system which, or Homebrew path, disable WDM fallback
+        which_driver_path = shutil.which("chromedriver")
+        forced_selected = (
+            bool(self.settings.chromedriver_path)
+            or (driver_path == which_driver_path and driver_path is not None)
+            or (driver_path == "/opt/homebrew/bin/chromedriver")
+        )
+
+        # If not found or mismatch, optionally use webdriver-manager
+        use_wdm = self.settings.use_webdriver_manager
+        if forced_selected:
+            use_wdm = False
+
+        chrome_major = self._detect_chrome_major(chrome_binary)
+        drv_major = self._get_major_version_from_path(driver_path) if driver_path else None
+        mismatch = chrome_major is not None and drv_major is not None and chrome_major != drv_major
+
+        if (driver_path is None or not os.path.exists(driver_path) or (mismatch and not forced_selected)) and use_wdm:
+            logger.info(
+                "Preparing driver via webdriver-manager (found=%s, mismatch=%s)",
+                bool(driver_path),
+                mismatch,
+            )
+            try:
+                # Imported here: webdriver-manager is a fallback and costs ~40 ms to import
+                from webdriver_manager.chrome import ChromeDriverManager
+
+                # Let webdriver-manager auto-detect proper driver
+                driver_path = ChromeDriverManager().install()
+                logger.info(f"Webdriver-manager installed driver at: {driver_path}")
+            except Exception as e:
+                logger.error(
+                    "webdriver-manager failed. Set CHROMEDRIVER_PATH to a valid driver matching your Chrome. "
+                    f"Error: {e}"
+                )
+                # Fall through to validation below
+
+        if not driver_path or not os.path.exists(driver_path):
+            raise FileNotFoundError(
+                "Chromedriver not found. Ensure the container image includes a compatible chromedriver, "
+                "set CHROMEDRIVER_PATH, or enable USE_WEBDRIVER_MANAGER=true with network access."
+            )
+        return driver_path
+
+    def _setup_driver(self, initial_url: Optional[str] = None) -> None:
         """Setup ChromeDriver and base timeouts/options."""
         try:
             chrome_options = Options()
@@ -55,73 +324,59 @@ class SeleniumHelper:
             chrome_options.add_argument("--disable-blink-features=AutomationControlled")
             chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
             chrome_options.add_experimental_option("useAutomationExtension", False)
-            chrome_options.add_argument("--window-size=1440,900")
-
-            # Allow overriding Chrome binary (optional)
-            chrome_binary = os.getenv("CHROME_BINARY")
-            if chrome_binary and os.path.exists(chrome_binary):
+            if self.settings.chrome_profile == "lean":
+                for argument in self.LEAN_ARGUMENTS:
+                    chrome_options.add_argument(argument)
+            else:
+                chrome_options.add_argument("--window-size=1440,900")
+            # Navigations wait for their own readiness predicate, not for every sub-resource
+            chrome_options.page_load_strategy = self.settings.page_load_strategy
+            if self.settings.artifacts_enabled:
+                # Keep the console log for failure artifacts
+                chrome_options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+
+            # Allow overriding Chrome binary (optional; a local path means nothing to a remote node)
+            chrome_binary = self.settings.chrome_binary
+            if chrome_binary and os.path.exists(chrome_binary) and not self.remote:
                 chrome_options.binary_location = chrome_binary
 
             # Headless control via config (env/.env with precedence)
-            if str(get_config_value("HEADLESS", "false")).lower() == "true":
+            if self.settings.headless:
                 # Use the newer headless mode when available
                 chrome_options.add_argument("--headless=new")
 
-            # Resolve chromedriver path preferring local/system installs
-            driver_path = self._select_best_chromedriver()
-
-            # If we explicitly selected a driver via env, system which, or Homebrew path, disable WDM fallback
-            which_driver_path = shutil.which("chromedriver")
-            forced_selected = (
-                bool(os.getenv("CHROMEDRIVER_PATH"))
-                or (driver_path == which_driver_path and driver_path is not None)
-                or (driver_path == "/opt/homebrew/bin/chromedriver")
-            )
-
-            # If not found or mismatch, optionally use webdriver-manager
-            use_wdm = str(get_config_value("USE_WEBDRIVER_MANAGER", "true")).lower() == "true"
-            if forced_selected:
-                use_wdm = False
-
-            chrome_major = self._detect_chrome_major()
-            drv_major = self._get_major_version_from_path(driver_path) if driver_path else None
-            mismatch = chrome_major is not None and drv_major is not None and chrome_major != drv_major
-
-            if (
-                driver_path is None or not os.path.exists(driver_path) or (mismatch and not forced_selected)
-            ) and use_wdm:
-                logger.info(
-                    "Preparing driver via webdriver-manager (found=%s, mismatch=%s)",
-                    bool(driver_path),
-                    mismatch,
-                )
-                try:
-                    # Let webdriver-manager auto-detect proper driver
-                    driver_path = ChromeDriverManager().install()
-                    logger.info(f"Webdriver-manager installed driver at: {driver_path}")
-                except Exception as e:
-                    logger.error(
-                        "webdriver-manager failed. Set CHROMEDRIVER_PATH to a valid driver matching your Chrome. "
-                        f"Error: {e}"
-                    )
-                    # Fall through to validation below
-
-            if not driver_path or not os.path.exists(driver_path):
-                raise FileNotFoundError(
-                    "Chromedriver not found. Ensure the container image includes a compatible chromedriver, "
-                    "set CHROMEDRIVER_PATH, or enable USE_WEBDRIVER_MANAGER=true with network access."
-                )
-
-            service = Service(driver_path)
-            logger.info(f"Using ChromeDriver at {driver_path}")
-
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            # A bare URL argument replaces chromedriver's default "data:," start page, so the
+            # login page starts loading while the WebDriver session is still being created.
+            if initial_url:
+                chrome_options.add_argument(initial_url)
 
-            implicit_wait = int(str(get_config_value("IMPLICIT_WAIT", "10")))
-            page_load_timeout = int(str(get_config_value("PAGE_LOAD_TIMEOUT", "30")))
-            self.driver.implicitly_wait(implicit_wait)
-            self.driver.set_page_load_timeout(page_load_timeout)
-            self.wait = WebDriverWait(self.driver, implicit_wait)
+            if self.remote:
+                driver = self._start_remote(chrome_options)
+            elif self.settings.driver_backend == "cdp":
+                driver = self._start_cdp(chrome_options)
+            else:
+                if self._driver_path_future is not None:
+                    driver_path = self._driver_path_future.result()
+                else:
+                    driver_path = self._resolve_driver_path()
+
+                service = Service(driver_path)
+                logger.info(f"Using ChromeDriver at {driver_path}")
+
+                driver = webdriver.Chrome(service=service, options=chrome_options)
+
+            implicit_wait = self.settings.implicit_wait
+            page_load_timeout = self.settings.page_load_timeout
+            driver.implicitly_wait(implicit_wait)
+            driver.set_page_load_timeout(page_load_timeout)
+            # Step macros wait in-page for at most one implicit wait
+            driver.set_script_timeout(implicit_wait + 5)
+            self._driver = driver
+            reaper.track(self.driver_pid)
+            self._wait = WebDriverWait(driver, implicit_wait)
+            self._elements.clear()
+            self._frame = "top"
+            self._initial_url = initial_url
 
             logger.info("Chrome driver initialized successfully")
 
@@ -129,6 +384,40 @@ class SeleniumHelper:
             logger.error(f"Failed to setup Chrome driver: {str(e)}")
             raise
 
+    def _start_remote(self, chrome_options: Options) -> webdriver.Remote:
+        """Create the session on the best healthy endpoint, falling through to the next on failure."""
+        from utils import grid
+
+        pool = grid.get_pool(self.settings)
+        errors = []
+        for url in pool.candidates():
+            pool.starting(url)
+            try:
+                driver = webdriver.Remote(command_executor=url, options=chrome_options)
+            except Exception as e:
+                pool.started(url, ok=False)
+                pool.mark_down(url, f"session start failed: {e}")
+                errors.append(f"{url}: {e}")
+                continue
+            pool.started(url, ok=True)
+            self._endpoint = url
+            logger.info(f"Remote WebDriver session {driver.session_id} on {url}")
+            return driver
+        raise WebDriverException("No remote WebDriver endpoint could start a session: " + "; ".join(errors))
+
+    def _start_cdp(self, chrome_options: Options):
+        """Launch Chrome itself and drive it over the DevTools protocol (no chromedriver)."""
+        # Imported here: only the CDP backend needs the WebSocket client
+        from utils.cdp import CdpDriver, find_chrome
+
+        binary = chrome_options.binary_location or find_chrome()
+        return CdpDriver.launch(
+            binary,
+            chrome_options.arguments,
+            page_load_strategy=self.settings.page_load_strategy,
+            startup_timeout=self.deadline.clamp(30.0),
+        )
+
     # ------------------------- Driver discovery ------------------------- #
     @staticmethod
     def _get_major_version_from_cmd(cmd: str) -> Optional[int]:
@@ -160,9 +449,8 @@ class SeleniumHelper:
             return None
 
     @staticmethod
-    def _detect_chrome_major() -> Optional[int]:
+    def _detect_chrome_major(chrome_binary: Optional[str] = None) -> Optional[int]:
         # Prefer explicit binary if provided
-        chrome_binary = os.getenv("CHROME_BINARY")
         if chrome_binary and os.path.exists(chrome_binary):
             ver = SeleniumHelper._get_major_version_from_path(chrome_binary)
             if ver:
@@ -179,7 +467,7 @@ class SeleniumHelper:
 
     def _select_best_chromedriver(self) -> Optional[str]:
         # 1) Honor explicit env
-        explicit = os.getenv("CHROMEDRIVER_PATH")
+        explicit = self.settings.chromedriver_path
         if explicit and os.path.exists(explicit):
             logger.info(f"Using CHROMEDRIVER_PATH from env: {explicit}")
             return explicit
@@ -197,7 +485,7 @@ class SeleniumHelper:
             return homebrew_path
 
         # 2) Detect Chrome major version
-        chrome_major = self._detect_chrome_major()
+        chrome_major = self._detect_chrome_major(self.settings.chrome_binary)
         if chrome_major:
             logger.info(f"Detected Chrome major version: {chrome_major}")
         else:
@@ -229,19 +517,71 @@ class SeleniumHelper:
         return None
 
     # ------------------------- Generic Utils ------------------------- #
-    def navigate_to(self, url: str) -> None:
-        """Navigate the browser to a URL."""
+    def invalidate_elements(self, reason: str = "") -> None:
+        """Drop all cached element handles (the page or its frames changed)."""
+        if self._elements:
+            logger.debug(f"Element cache cleared ({len(self._elements)} entries){': ' + reason if reason else ''}")
+        self._elements.clear()
+
+    def _cached(self, by: str, value: str):
+        return self._elements.get((self._frame, by, value))
+
+    def _remember(self, by: str, value: str, element) -> None:
+        self._elements[(self._frame, by, value)] = element
+
+    def navigate_to(self, url: str, ready: Optional[ReadyPredicate] = None, timeout: Optional[float] = None):
+        """Navigate the browser to a URL.
+
+        With an ``eager``/``none`` page-load strategy ``driver.get`` returns before the page
+        is complete; ``ready`` (a WebDriverWait condition such as
+        ``EC.element_to_be_clickable((By.ID, "userid"))``) is then waited for, up to
+        ``timeout`` (default PAGE_LOAD_TIMEOUT), and its result returned.
+        """
+        return self.run_steps(self.navigate_steps(url, ready, timeout))
+
+    def navigate_steps(
+        self, url: str, ready: Optional[ReadyPredicate] = None, timeout: Optional[float] = None
+    ) -> Steps[Any]:
         logger.info(f"Navigating to: {url}")
-        self.driver.get(url)
+        self.invalidate_elements("navigation")
+        self.deadline.check()
+        shortened = self.deadline.remaining() < self.settings.page_load_timeout
+        if shortened:
+            self.driver.set_page_load_timeout(max(1, int(self.deadline.remaining())))
+        start = time.monotonic()
+        try:
+            self.driver.get(url)
+        finally:
+            # Later navigations get the configured timeout (clamped again if needed)
+            if shortened:
+                try:
+                    self.driver.set_page_load_timeout(self.settings.page_load_timeout)
+                except Exception as e:
+                    # Do not mask the navigation's own error (e.g. a crashed browser)
+                    logger.debug(f"Could not restore the page-load timeout: {e}")
+        self._frame = "top"
+        if ready is None:
+            return None
+        result = yield Until(ready, timeout or self.settings.page_load_timeout, f"{url} not ready")
+        logger.debug(f"Page ready after {time.monotonic() - start:.2f}s ({self.settings.page_load_strategy} load)")
+        return result
 
     def find_element(self, by: By, value: str, timeout: Optional[int] = None):
-        """Find an element with explicit wait."""
-        wait_time = timeout or int(str(get_config_value("IMPLICIT_WAIT", "10")))
+        """Find an element with explicit wait (cached for the current page)."""
+        return self.run_steps(self.find_element_steps(by, value, timeout))
+
+    def find_element_steps(self, by: By, value: str, timeout: Optional[int] = None) -> Steps[Any]:
+        cached = self._cached(by, value)
+        if cached is not None:
+            return cached
+        wait_time = timeout or self.settings.implicit_wait
         try:
-            return WebDriverWait(self.driver, wait_time).until(EC.presence_of_element_located((by, value)))
+            element = yield Until(EC.presence_of_element_located((by, value)), wait_time)
         except TimeoutException:
             logger.error(f"Element not found within {wait_time}s: {by}={value}")
             raise
+        self._remember(by, value, element)
+        return element
 
     def find_dynamic_element(
         self,
@@ -251,22 +591,37 @@ class SeleniumHelper:
         condition=EC.presence_of_element_located,
     ):
         """Try multiple selectors with retries to locate a dynamic element."""
+        return self.run_steps(self.find_dynamic_steps(selectors, element_name, max_retries, condition))
+
+    def find_dynamic_steps(
+        self,
+        selectors: Iterable[Selector],
+        element_name: str,
+        max_retries: int = 3,
+        condition=EC.presence_of_element_located,
+    ) -> Steps[Any]:
+        selectors = list(selectors)
+        for by, locator in selectors:
+            cached = self._cached(by, locator)
+            if cached is not None:
+                logger.debug(f"Using cached {element_name} ({by}: {locator})")
+                return cached
+
         for attempt in range(max_retries):
-            logger.info(f"Attempt {attempt + 1}/{max_retries} to find {element_name}")
+            logger.debug(f"Attempt {attempt + 1}/{max_retries} to find {element_name}")
             for by, locator in selectors:
                 try:
-                    logger.info(f"Trying {element_name} with {by}: {locator}")
-                    element = WebDriverWait(
-                        self.driver,
-                        int(str(get_config_value("IMPLICIT_WAIT", "10"))),
-                    ).until(condition((by, locator)))
+                    logger.debug(f"Trying {element_name} with {by}: {locator}")
+                    element = yield Until(condition((by, locator)), self.settings.implicit_wait)
                     logger.info(f"✅ Found {element_name} using {by}: {locator}")
+                    self._remember(by, locator, element)
                     return element
                 except Exception as e:
                     logger.debug(f"Not found via {by}: {locator} - {e}")
                     continue
             if attempt < max_retries - 1:
-                time.sleep(2)
+                logger.info(f"{element_name} not found (attempt {attempt + 1}/{max_retries}), retrying")
+                yield Sleep(2)
         return None
 
     def robust_click(self, element) -> bool:
@@ -278,12 +633,23 @@ class SeleniumHelper:
             except Exception:
                 self.driver.execute_script("arguments[0].click();", element)
             return True
+        except StaleElementReferenceException:
+            # Let @_retry_on_stale callers look the element up again
+            raise
         except Exception as e:
             logger.error(f"Failed to click element: {e}")
             return False
 
     def wait_for_ajax_and_ready(self, timeout: int = 10) -> None:
-        """Wait for jQuery ajax (if present) and document ready state complete."""
+        """Wait for jQuery ajax (if present) and the document to be ready.
+
+        Under the ``normal`` page-load strategy that means readyState ``complete``; under
+        ``eager``/``none`` an ``interactive`` document (DOM parsed) is enough.
+        """
+        self.run_steps(self.ready_steps(timeout))
+
+    def ready_steps(self, timeout: float = 10) -> Steps[None]:
+        ready_states = ("complete",) if self.settings.page_load_strategy == "normal" else ("interactive", "complete")
 
         def ajax_complete(driver):
             try:
@@ -295,79 +661,264 @@ class SeleniumHelper:
             return True
 
         try:
-            WebDriverWait(self.driver, timeout).until(ajax_complete)
+            yield Until(ajax_complete, timeout)
         except Exception:
             pass
 
-        WebDriverWait(self.driver, timeout).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
+        yield Until(
+            lambda d: d.execute_script("return document.readyState") in ready_states, timeout, "document not ready"
         )
 
+    def run_macro(self, name: str, script: str, *args) -> Optional[dict]:
+        """Run one in-page step macro (see ``utils.macros``).
+
+        Returns the macro's result dict, or None when it failed so the caller can fall
+        back to the element-by-element path.
+        """
+        start = time.monotonic()
+        try:
+            result = self.driver.execute_async_script(script, *args)
+        except Exception as e:
+            logger.warning(f"Macro '{name}' failed, falling back to element-by-element: {e}")
+            return None
+        elapsed_ms = (time.monotonic() - start) * 1000
+        if not isinstance(result, dict) or not result.get("ok"):
+            error = result.get("error") if isinstance(result, dict) else result
+            logger.warning(f"Macro '{name}' failed after {elapsed_ms:.0f}ms ({error}), falling back to element-by-element")
+            return None
+        logger.debug(f"Macro '{name}' finished in {elapsed_ms:.0f}ms: {result}")
+        return result
+
+    def _macro_timeout_ms(self) -> int:
+        self.deadline.check()
+        return int(self.deadline.clamp(self.settings.implicit_wait) * 1000)
+
+    def _bounded_wait(self, timeout: float) -> WebDriverWait:
+        """WebDriverWait limited to the remaining run budget."""
+        self.deadline.check()
+        return WebDriverWait(self.driver, self.deadline.clamp(timeout))
+
+    # ------------------------- Step sequences ------------------------- #
+    def run_steps(self, steps: Steps[T]) -> T:
+        """Run a step sequence (see ``utils.flow``), performing its waits blocking."""
+        value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            done, request = advance(steps, value, error)
+            if done:
+                return request
+            value = error = None
+            try:
+                value = self._perform_wait(request)
+            except Exception as e:
+                error = e
+
+    def _perform_wait(self, request) -> Any:
+        if isinstance(request, Sleep):
+            if request.budget:
+                self.deadline.sleep(request.seconds)
+            else:
+                time.sleep(max(request.seconds, 0.0))
+            return None
+        return self._bounded_wait(request.timeout).until(request.condition, request.message)
+
     def switch_to_default(self) -> None:
         try:
             self.driver.switch_to.default_content()
+            self._frame = "top"
         except Exception:
             pass
 
     def wait_for_body(self, timeout: int = 10) -> None:
-        WebDriverWait(self.driver, timeout).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        self.run_steps(self.body_steps(timeout))
+
+    def body_steps(self, timeout: float = 10) -> Steps[None]:
+        yield Until(EC.presence_of_element_located((By.TAG_NAME, "body")), timeout, "page body not present")
 
     def close(self) -> None:
-        if self.driver:
-            self.driver.quit()
+        if self._driver is not None:
+            pid = self.driver_pid
+            # Snapshot the tree first: after quit(), leftovers are re-parented and untraceable
+            processes = reaper.tree(pid) if pid else []
+            try:
+                self._driver.quit()
+            except Exception as e:
+                logger.warning(f"Browser quit failed: {e}")
+            leftovers = reaper.kill_pids(processes, grace=2.0)
+            if leftovers:
+                logger.info(f"Killed {len(leftovers)} browser processes left after quit")
+            reaper.untrack(pid)
+            if self._endpoint is not None:
+                from utils import grid
+
+                grid.get_pool(self.settings).release(self._endpoint)
+                self._endpoint = None
+            self._driver = None
+            self._wait = None
+            self._elements.clear()
             logger.info("Browser closed")
 
+    # ------------------------- Crash recovery ------------------------- #
+    def session_cookies(self) -> List[dict]:
+        """Cookies of the current portal session (to restore after a browser restart)."""
+        return self.driver.get_cookies()
+
+    def current_url(self) -> str:
+        """URL of the current document (the iframe's own URL when inside a frame)."""
+        return self.driver.execute_script("return document.location.href")
+
+    def restart(self) -> None:
+        """Discard a crashed browser (and whatever is left of its processes) and launch a fresh one."""
+        self.close()
+        self._staged_save = None
+        self._frame = "top"
+        self.start()
+        logger.info("Browser restarted")
+
+    def restore_session(self, cookies: List[dict], url: str, ready_id: str) -> None:
+        """Re-enter the portal at ``url`` with saved session cookies, waiting for ``ready_id``."""
+        self.run_steps(self.restore_session_steps(cookies, url, ready_id))
+
+    def restore_session_steps(self, cookies: List[dict], url: str, ready_id: str) -> Steps[None]:
+        try:
+            # CDP sets cookies for any domain before the first navigation
+            self.driver.execute_cdp_cmd(
+                "Network.setCookies",
+                {"cookies": [self._cdp_cookie(c, url) for c in cookies]},
+            )
+        except Exception as e:
+            logger.debug(f"CDP cookie restore unavailable ({e}); using add_cookie")
+            parsed = urlparse(url)
+            yield from self.navigate_steps(f"{parsed.scheme}://{parsed.netloc}/")
+            for cookie in cookies:
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception as add_error:
+                    logger.debug(f"Could not restore cookie {cookie.get('name')}: {add_error}")
+        yield from self.navigate_steps(url, ready=EC.element_to_be_clickable((By.ID, ready_id)))
+        logger.info(f"Session restored at {url}")
+
+    @staticmethod
+    def _cdp_cookie(cookie: dict, url: str) -> dict:
+        """Convert a WebDriver cookie dict into a CDP ``Network.CookieParam``."""
+        param = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in cookie}
+        if "domain" not in param:
+            param["url"] = url
+        if "expiry" in cookie:
+            param["expires"] = cookie["expiry"]
+        if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+            param["sameSite"] = cookie["sameSite"]
+        return param
+
+    # ------------------------- Failure diagnostics ------------------------- #
+    _PAGE_SOURCES_JS = """
+        var frame = document.querySelector("iframe[src*='TL_WEB_CLOCK']");
+        var clock = null;
+        try { clock = frame && frame.contentDocument ? frame.contentDocument.documentElement.outerHTML : null; }
+        catch (e) { clock = null; }
+        return {url: location.href, top: document.documentElement.outerHTML, clock: clock};
+    """
+
+    def collect_diagnostics(self) -> Dict[str, bytes]:
+        """Raw failure artifacts from the live browser, whatever can still be read.
+
+        Keys: ``screenshot.png``, ``top.html``, ``clock_iframe.html``, ``console.json``.
+        """
+        artifacts: Dict[str, bytes] = {}
+        if self._driver is None:
+            return artifacts
+        driver = self._driver
+        try:
+            artifacts["screenshot.png"] = driver.get_screenshot_as_png()
+        except Exception as e:
+            logger.debug(f"Screenshot unavailable: {e}")
+        try:
+            driver.switch_to.default_content()
+            self._frame = "top"
+            sources = driver.execute_script(self._PAGE_SOURCES_JS) or {}
+            artifacts["top.html"] = f"<!-- {sources.get('url')} -->\n{sources.get('top') or ''}".encode("utf-8")
+            if sources.get("clock"):
+                artifacts["clock_iframe.html"] = sources["clock"].encode("utf-8")
+        except Exception as e:
+            logger.debug(f"Page source unavailable: {e}")
+        try:
+            artifacts["console.json"] = json.dumps(driver.get_log("browser"), ensure_ascii=False).encode("utf-8")
+        except Exception as e:
+            logger.debug(f"Console log unavailable: {e}")
+        return artifacts
+
     # ------------------------- WW-specific Flows ------------------------- #
     def login(self, login_url: str, username: str, password: str) -> None:
         """Perform login to WW HR portal."""
-        self.navigate_to(login_url)
-        self.wait_for_body()
-
-        user_el = self.find_element(By.ID, "userid")
-        user_el.clear()
-        user_el.send_keys(username)
-        pwd_el = self.find_element(By.ID, "pwd")
-        pwd_el.clear()
-        pwd_el.send_keys(password)
-        self.find_element(By.NAME, "Submit").click()
-
-        time.sleep(2)
+        self.start(login_url)
+        self.run_steps(self.login_steps(login_url, username, password))
+
+    def login_steps(self, login_url: str, username: str, password: str) -> Steps[None]:
+        """Login on a started browser (the login page may already be open from launch)."""
+        if self._initial_url != login_url:
+            yield from self.navigate_steps(login_url, ready=EC.element_to_be_clickable((By.ID, "userid")))
+        else:
+            logger.info(f"Login page opened at browser launch: {login_url}")
+        self._initial_url = None
+
+        macro_done = self.settings.step_macros and (
+            self.run_macro("login", macros.LOGIN, username, password, self._macro_timeout_ms()) is not None
+        )
+        if macro_done:
+            logger.info(f"Login form filled {process_elapsed():.2f}s after process start")
+        else:
+            yield from self.body_steps()
+            user_el = yield from self.find_element_steps(By.ID, "userid")
+            logger.info(f"Login form visible {process_elapsed():.2f}s after process start")
+            user_el.clear()
+            user_el.send_keys(username)
+            pwd_el = yield from self.find_element_steps(By.ID, "pwd")
+            pwd_el.clear()
+            pwd_el.send_keys(password)
+            (yield from self.find_element_steps(By.NAME, "Submit")).click()
+        self.invalidate_elements("login submitted")
+
+        yield Sleep(2)
         logger.info("Login submitted")
 
     def click_by_id(self, element_id: str, sleep_after: float = 2.0) -> None:
         """Click an element that is expected to be clickable by id."""
-        el = WebDriverWait(
-            self.driver,
-            int(str(get_config_value("IMPLICIT_WAIT", "10"))),
-        ).until(EC.element_to_be_clickable((By.ID, element_id)))
+        self.run_steps(self.click_by_id_steps(element_id, sleep_after))
+
+    def click_by_id_steps(self, element_id: str, sleep_after: float = 2.0) -> Steps[None]:
+        el = yield Until(
+            EC.element_to_be_clickable((By.ID, element_id)), self.settings.implicit_wait, f"{element_id} not clickable"
+        )
         self.robust_click(el)
-        time.sleep(sleep_after)
+        self.invalidate_elements(f"clicked {element_id}")
+        yield Sleep(sleep_after)
 
     def open_online_checkin_step(self) -> None:
         """Navigate to the '線上打卡' step using robust locators."""
+        self.run_steps(self.open_online_checkin_steps())
+
+    def open_online_checkin_steps(self) -> Steps[None]:
         self.switch_to_default()
-        time.sleep(1)
-
-        step_selectors: List[Selector] = [
-            # Direct role-link with steplabel
-            (By.XPATH, "//div[@role='link' and @steplabel='線上打卡']"),
-            # Container that includes target label text
-            (
-                By.XPATH,
-                "//div[contains(@id,'PTGP_STEP_DVW_PTGP_STEP_BTN_GB')][.//span[normalize-space()='線上打卡']]",
-            ),
-            # From label id to container
-            (
-                By.XPATH,
-                "//*[@id='PTGP_STEP_DVW_PTGP_STEP_LABEL$3']/ancestor::div[contains(@id,'PTGP_STEP_DVW_PTGP_"
-                "STEP_BTN_GB')]",
-            ),
-        ]
+        yield Sleep(1)
 
-        node = self.find_dynamic_element(step_selectors, "online check-in step")
+        node = yield from self.find_dynamic_steps(ONLINE_CHECKIN_SELECTORS, "online check-in step")
         if node is None:
             raise RuntimeError("Unable to locate '線上打卡' step")
+        yield from self.click_step_node_steps(node)
+
+        yield Sleep(2)
+        logger.info("Opened '線上打卡' step")
 
+    def _click_step_node(self, node, label: str = "線上打卡", ready: Optional[ReadyPredicate] = None) -> None:
+        """Click a located step such as '線上打卡' (its inner link if needed, else follow its href).
+
+        ``ready`` tells when the followed href has loaded (default: the clock iframe is there).
+        """
+        self.run_steps(self.click_step_node_steps(node, label, ready))
+
+    def click_step_node_steps(
+        self, node, label: str = "線上打卡", ready: Optional[ReadyPredicate] = None
+    ) -> Steps[None]:
         # If the container isn't the clickable node, try inner role=link
         try:
             if node.get_attribute("role") != "link":
@@ -380,45 +931,67 @@ class SeleniumHelper:
             href = node.get_attribute("href")
             if href:
                 logger.info("Fallback navigating to href: %s", href)
-                self.navigate_to(href)
+                yield from self.navigate_steps(href, ready=ready or EC.presence_of_element_located(CLOCK_IFRAME))
             else:
-                raise RuntimeError("Failed to click '線上打卡'")
-
-        time.sleep(2)
-        logger.info("Opened '線上打卡' step")
+                raise RuntimeError(f"Failed to click '{label}'")
+        self.invalidate_elements(f"opened '{label}'")
 
     def switch_to_clock_iframe(self) -> None:
         """Switch to the TL_WEB_CLOCK iframe."""
+        self.run_steps(self.clock_iframe_steps())
+
+    @_retry_steps_on_stale
+    def clock_iframe_steps(self) -> Steps[None]:
         self.switch_to_default()
-        self.wait_for_ajax_and_ready(10)
-        self.wait_for_body(10)
-        time.sleep(2)
+        yield from self.ready_steps(10)
+        yield from self.body_steps(10)
+        yield Sleep(2)
 
-        iframe = self.find_dynamic_element(
-            selectors=[(By.CSS_SELECTOR, "iframe[src*='TL_WEB_CLOCK']")],
-            element_name="clock iframe",
-        )
+        iframe = yield from self.find_dynamic_steps(selectors=[CLOCK_IFRAME], element_name="clock iframe")
         if iframe is None:
             raise RuntimeError("Failed to locate TL_WEB_CLOCK iframe")
 
-        time.sleep(1)
+        yield Sleep(1)
         self.driver.switch_to.frame(iframe)
-        self.wait_for_body(10)
+        self._frame = "TL_WEB_CLOCK"
+        yield from self.body_steps(10)
         logger.info("Switched to TL_WEB_CLOCK iframe")
 
     def select_punch_type(self, target_option: str) -> None:
         """Select the desired punch type in dropdown."""
-        dropdown = self.find_dynamic_element(
-            selectors=[
-                (By.ID, "TL_RPTD_TIME_PUNCH_TYPE$0"),
-                (By.CSS_SELECTOR, "select[id*='TL_RPTD_TIME_PUNCH_TYPE']"),
-                (By.XPATH, "//select[contains(@id,'TL_RPTD_TIME_PUNCH_TYPE')]"),
-            ],
-            element_name="punch type dropdown",
-        )
+        self.run_steps(self.select_punch_steps(target_option))
+
+    @_retry_steps_on_stale
+    def select_punch_steps(
+        self, target_option: str, save: bool = False, before_save: Optional[Callable[[], None]] = None
+    ) -> Steps[None]:
+        """Select the punch type; with ``save``, click save straight away (no hold in between).
+
+        ``before_save`` is called right before the request that clicks save is issued.
+        """
+        if self.settings.step_macros:
+            name = "select and save" if save else "select punch"
+            # The macro selects and clicks save in one call, so it is the save request
+            if save and before_save is not None:
+                before_save()
+            result = self.run_macro(name, macros.SELECT_PUNCH, target_option, save, self._macro_timeout_ms())
+            if result is not None:
+                logger.info(f"Available punch options: {result.get('options')}")
+                logger.info(f"Selected punch type: {target_option}")
+                if save:
+                    logger.info("Clicked save button")
+                    self.invalidate_elements("saved")
+                return
+
+        dropdown = yield from self.find_dynamic_steps(PUNCH_DROPDOWN_SELECTORS, element_name="punch type dropdown")
         if dropdown is None:
             raise RuntimeError("Could not find punch type dropdown")
+        self._select_option(dropdown, target_option)
+        if save:
+            yield from self.click_save_steps(before_save)
 
+    @staticmethod
+    def _select_option(dropdown, target_option: str) -> None:
         select = Select(dropdown)
         options = [o.text for o in select.options if o.text.strip()]
         logger.info(f"Available punch options: {options}")
@@ -427,152 +1000,191 @@ class SeleniumHelper:
 
     def click_save(self) -> None:
         """Click the save/submit button within the iframe."""
-        btn = self.find_dynamic_element(
-            selectors=[
-                (By.XPATH, "//input[contains(@id,'TL_LINK_WRK_TL_SAVE_PB') or @value='輸入打卡' or @value='Save']"),
-                (By.XPATH, "//button[contains(text(),'輸入打卡') or contains(text(),'Save')]"),
-            ],
-            element_name="save button",
-            condition=EC.element_to_be_clickable,
+        self.run_steps(self.click_save_steps())
+
+    @_retry_steps_on_stale
+    def click_save_steps(self, before_click: Optional[Callable[[], None]] = None) -> Steps[None]:
+        btn = yield from self.find_dynamic_steps(
+            SAVE_BUTTON_SELECTORS, element_name="save button", condition=EC.element_to_be_clickable
         )
         if btn is None:
             raise RuntimeError("Could not find save button")
+        if before_click is not None:
+            before_click()
         if not self.robust_click(btn):
             raise RuntimeError("Failed to click save button")
+        self.invalidate_elements("saved")
         logger.info("Clicked save button")
 
-    def handle_duplicate_clockin_popup(self, timeout: int = 5) -> bool:
+    def select_punch_and_save(self, target_option: str) -> None:
+        """Select the punch type and click save straight away (no hold in between)."""
+        self.run_steps(self.select_punch_steps(target_option, save=True))
+
+    @_retry_on_stale
+    def prestage_save(self):
+        """Locate the save button ahead of time so the timed submit is a single click."""
+        btn = self.find_dynamic_element(
+            SAVE_BUTTON_SELECTORS, element_name="save button", condition=EC.element_to_be_clickable
+        )
+        if btn is None:
+            raise RuntimeError("Could not find save button")
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", btn)
+        self._staged_save = btn
+        logger.info("Save button pre-staged")
+        return btn
+
+    def keepalive(self, timeout: float = 2.0) -> None:
+        """Send one lightweight request so the portal session does not idle out.
+
+        Issues a HEAD request for the current (iframe) document with the session
+        cookies; the page itself is left untouched. The request is aborted after
+        ``timeout`` seconds, so a slow portal cannot hold the driver for the whole
+        script timeout.
         """
-        Detect and handle duplicate clock-in confirmation popup.
+        try:
+            self.driver.execute_async_script(
+                "var done = arguments[arguments.length - 1];"
+                "var controller = new AbortController();"
+                "setTimeout(function () { controller.abort(); }, arguments[0]);"
+                "fetch(window.location.href, {method: 'HEAD', credentials: 'include', cache: 'no-store',"
+                " signal: controller.signal})"
+                ".then(function (r) { done(r.status); }, function () { done(0); });",
+                int(timeout * 1000),
+            )
+        except Exception as e:
+            logger.debug(f"Keepalive ping failed: {e}")
 
-        This function checks if a duplicate clock-in popup appears and clicks the
-        confirmation button if found. The popup typically appears when trying to
-        clock in/out with the same type as the previous entry.
+    def fire_save_at(
+        self,
+        deadline: float,
+        keepalive_interval: float = 60.0,
+        before_click: Optional[Callable[[], None]] = None,
+    ) -> float:
+        """Hold on the pre-staged form and click save at a ``time.monotonic()`` deadline.
 
-        Args:
-            timeout (int): Maximum time to wait for popup detection in seconds
+        Keepalive pings are sent every ``keepalive_interval`` seconds while waiting
+        and stop well before the deadline. The final stretch is spun rather than slept
+        so the click lands within a few milliseconds of the target. ``before_click`` is
+        called right before the click is issued (the flow checkpoints the save there).
 
         Returns:
-            bool: True if popup was found and handled, False if no popup detected
+            float: submit latency in seconds (click completed minus deadline)
         """
+        btn = self._staged_save or self.prestage_save()
+
+        # Never ping inside the last few seconds; a slow HEAD must not delay the click.
+        # A ping is only started when even an aborted one ends before the quiet window.
+        quiet_window = 5.0
+        ping_timeout = 2.0
+        next_ping = time.monotonic() + keepalive_interval
+        while True:
+            now = time.monotonic()
+            remaining = deadline - now
+            if remaining <= quiet_window:
+                break
+            if now >= next_ping and remaining > quiet_window + ping_timeout + 1:
+                self.keepalive(ping_timeout)
+                next_ping = time.monotonic() + keepalive_interval
+                continue
+            time.sleep(min(remaining - quiet_window, 1.0))
+
+        while deadline - time.monotonic() > 0.02:
+            time.sleep(0.005)
+        while time.monotonic() < deadline:
+            pass
+
+        if before_click is not None:
+            before_click()
+        fired = time.monotonic()
         try:
-            # Switch back to default content first to detect modal popup
-            self.switch_to_default()
-
-            # Define selectors for the duplicate clock-in popup elements
-            popup_selectors: List[Selector] = [
-                # Modal container that contains the duplicate message
-                (By.CSS_SELECTOR, "div[role='alertdialog'][aria-modal='true']"),
-                (By.ID, "ptModTable_0"),
-                (By.CSS_SELECTOR, ".ps_modal_container.ps_popup-msg"),
-            ]
-
-            # Define selectors for the confirmation button
-            confirm_button_selectors: List[Selector] = [
-                (By.ID, "#ICOK"),
-                (By.CSS_SELECTOR, "input[id='#ICOK'][value='確定']"),
-                (By.CSS_SELECTOR, "input.PSPUSHBUTTONTBOK[value='確定']"),
-                (By.XPATH, "//input[@type='button' and @value='確定' and contains(@id, 'ICOK')]"),
-            ]
-
-            logger.info("Checking for duplicate clock-in popup...")
-
-            # Try to detect the popup modal
-            popup_element = None
-            try:
-                popup_element = WebDriverWait(self.driver, timeout).until(
-                    EC.any_of(*[EC.presence_of_element_located(selector) for selector in popup_selectors])
-                )
-                logger.info("Duplicate clock-in popup detected")
-            except TimeoutException:
-                logger.info("No duplicate clock-in popup found within timeout")
-                return False
+            btn.click()
+        except Exception:
+            self.driver.execute_script("arguments[0].click();", btn)
+        done = time.monotonic()
+        self._staged_save = None
+        self.invalidate_elements("saved")
+
+        latency = done - deadline
+        logger.info(
+            f"Timed submit: click dispatched {(fired - deadline) * 1000:+.1f}ms, "
+            f"completed {latency * 1000:+.1f}ms relative to deadline"
+        )
+        return latency
 
-            # If popup is found, check if it contains duplicate clock-in message
-            if popup_element:
-                try:
-                    # Try to obtain visible text from popup
-                    popup_text = popup_element.text.strip()
-                    if not popup_text:
-                        try:
-                            popup_text = popup_element.find_element(By.CSS_SELECTOR, ".popupText").text.strip()
-                        except Exception:
-                            pass
-
-                    # Look for specific text patterns that indicate duplicate clock-in
-                    duplicate_indicators = [
-                        "最近的打卡",  # "Recent clock-in"
-                        "也是",  # "is also"
-                        "打卡",  # "clock-in"
-                        "選取「確定」",  # "Select 'Confirm'"
-                    ]
-
-                    is_duplicate_popup = any(indicator in popup_text for indicator in duplicate_indicators)
-
-                    if is_duplicate_popup:
-                        logger.info(f"Duplicate clock-in popup message: {popup_text}")
-                    else:
-                        # First-time or normal success message
-                        logger.info(popup_text)
+    def detect_punch_outcome(self, timeout: float = 10.0, poll_interval: float = 0.2) -> PunchResult:
+        """Watch for the portal's response to save and classify it.
 
-                except Exception as e:
-                    logger.warning(f"Could not read popup text, proceeding with confirmation: {e}")
+        One polling loop checks every signal at once: a popup in the top document
+        (error, duplicate prompt or confirmation message) and PeopleSoft's "Saved"
+        marker in the page or the TL_WEB_CLOCK iframe. A duplicate prompt is confirmed
+        and watching continues for the follow-up; a popup that is still empty or not
+        recognized keeps the loop going. Returns as soon as the outcome is known;
+        UNKNOWN when nothing recognizable shows up within ``timeout`` seconds.
+        """
+        return self.run_steps(self.outcome_steps(timeout, poll_interval))
 
-            # Try to find and click the confirmation button
-            confirm_button = self.find_dynamic_element(
-                selectors=confirm_button_selectors,
-                element_name="duplicate clock-in confirmation button",
-                max_retries=2,
-                condition=EC.element_to_be_clickable,
-            )
+    def outcome_steps(self, timeout: float = 10.0, poll_interval: float = 0.2) -> Steps[PunchResult]:
+        start = time.monotonic()
+        # Bounded by the run budget, but never aborts: the save has already been clicked
+        deadline = start + self.deadline.clamp(timeout)
+        self.switch_to_default()
+        self.last_popup_text = None
+        watch = OutcomeWatch()
 
-            if confirm_button is None:
-                logger.info("No confirmation button found - this might be the first clock-in attempt")
-                return False
+        logger.info("Waiting for punch outcome...")
+        while True:
+            try:
+                signal = self.driver.execute_script(macros.OUTCOME_PROBE, watch.handled_text)
+            except Exception as e:
+                # The page may be mid-transition after save; keep polling
+                logger.debug(f"Outcome probe failed: {e}")
+                signal = None
+
+            outcome = watch.observe(signal)
+            if outcome is None and watch.prompt is not None:
+                logger.info(f"Duplicate clock-in popup message: {watch.prompt}")
+                outcome = watch.confirmed((yield from self.confirm_popup_steps()))
+                if outcome is None:
+                    logger.info("Successfully clicked confirmation button for duplicate clock-in")
+                    continue
+            if outcome is not None:
+                return self._punch_result(outcome, watch, start)
 
-            # Click the confirmation button
-            if self.robust_click(confirm_button):
-                logger.info("Successfully clicked confirmation button for duplicate clock-in")
-                time.sleep(3)  # Wait a moment for the popup to close
+            if time.monotonic() >= deadline:
+                return self._punch_result(watch.timed_out(), watch, start)
+            yield Sleep(poll_interval, budget=False)
 
-                # Check for any subsequent popup or message
-                try:
-                    # Look for any new popup or alert that might appear
-                    subsequent_popup = WebDriverWait(self.driver, 3).until(
-                        EC.any_of(
-                            EC.presence_of_element_located(
-                                (By.CSS_SELECTOR, "div[role='alertdialog'][aria-modal='true']")
-                            ),
-                            EC.presence_of_element_located((By.ID, "ptModTable_0")),
-                            EC.presence_of_element_located((By.CSS_SELECTOR, ".ps_modal_container")),
-                        )
-                    )
-
-                    # Display the message from the subsequent popup
-                    try:
-                        popup_message = subsequent_popup.text.strip()
-                        if popup_message:
-                            logger.info(f"Subsequent popup appeared with message: {popup_message}")
-                        else:
-                            logger.info("Subsequent popup appeared but no readable message found")
-                    except Exception:
-                        logger.info("Subsequent popup appeared")
-
-                except TimeoutException:
-                    logger.info("No subsequent popup appeared after confirmation")
-                except Exception as e:
-                    logger.debug(f"Error checking for subsequent popup: {e}")
+    def _punch_result(self, outcome: PunchOutcome, watch: OutcomeWatch, start: float) -> PunchResult:
+        self.last_popup_text = watch.message or None
+        result = PunchResult(outcome, watch.message, time.monotonic() - start)
+        detail = f": {result.message}" if result.message else ""
+        logger.info(f"Punch outcome {outcome.name} after {result.elapsed:.2f}s{detail}")
+        return result
 
-                return True
-            else:
-                logger.error("Failed to click confirmation button")
-                return False
+    def _confirm_popup(self) -> bool:
+        """Click 確定 on the current popup (top document)."""
+        return self.run_steps(self.confirm_popup_steps())
+
+    def confirm_popup_steps(self) -> Steps[bool]:
+        try:
+            if self.settings.step_macros:
+                result = self.run_macro("confirm popup", macros.POPUP_CONFIRM, 2000, True, None)
+                if result is not None:
+                    return bool(result.get("confirmed"))
 
+            confirm_button = yield from self.find_dynamic_steps(
+                POPUP_OK_SELECTORS,
+                element_name="duplicate clock-in confirmation button",
+                max_retries=1,
+                condition=EC.element_to_be_clickable,
+            )
+            return confirm_button is not None and self.robust_click(confirm_button)
         except Exception as e:
-            logger.error(f"Error handling duplicate clock-in popup: {e}")
+            logger.error(f"Failed to confirm popup: {e}")
             return False
-
         finally:
-            # Ensure we're back in the appropriate context
-            # Note: Caller should handle switching back to iframe if needed
-            pass
+            self.invalidate_elements("popup confirmed")
+
+    def handle_duplicate_clockin_popup(self, timeout: int = 5) -> bool:
+        """Compatibility wrapper: True if a duplicate clock-in prompt was found and confirmed."""
+        return self.detect_punch_outcome(timeout).outcome is PunchOutcome.DUPLICATE_CONFIRMED
@@ -4,36 +4,51 @@ WW Check-in System (refactored)
 
 - Central business flow that delegates all Selenium work to utils.selenium_helper
 - Supports both container and local execution (env-controlled)
+- Heavy modules (selenium, webdriver-manager, asyncio) are imported only on the paths
+  that need them, so --help, preflight skips and misconfigured runs start fast
+  (see tools/check_import_time.py)
 """
+from __future__ import annotations
+
+import argparse
+import contextlib
 import logging
 import os
 import sys
 import datetime
 import time
 import random
-from typing import Optional
-from dotenv import load_dotenv, dotenv_values, find_dotenv
-from utils.config import get_config_value
-
-from utils.selenium_helper import SeleniumHelper
+import sqlite3
+from typing import TYPE_CHECKING, Callable, ContextManager, List, Optional, Tuple
+from utils.checkpoint import Checkpoint, FlowState, is_browser_crash
+from utils.config import SUBMIT_MODES, ConfigError, ConfigWatcher, Settings, get_settings, parse_clock
 
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.flow import check_in_steps, timed_step
+from utils.ledger import RunLedger
+from utils.outcome import PunchOutcome, PunchResult
+from utils.preflight import run_preflight
+from utils.scheduler import load_work_schedule
 
-# Load .env early. Default behavior: do not override existing environment variables.
-# You can force .env to take precedence by setting PREFER_DOTENV=true when running the script.
-_DOTENV_PATH = find_dotenv()
-_DOTENV_MAP = dotenv_values(_DOTENV_PATH) if _DOTENV_PATH else {}
-load_dotenv(dotenv_path=_DOTENV_PATH, override=False)
+if TYPE_CHECKING:
+    from utils.dispatch import Account, FleetDispatcher
+    from utils.selenium_helper import SeleniumHelper
 
 
-def setup_logging() -> None:
-    log_level = str(get_config_value("LOG_LEVEL", "INFO")).upper()
-    log_file = str(get_config_value("LOG_FILE", "logs/ww_check_in.log"))
+def setup_logging(settings: Settings) -> None:
+    # logging.handlers and friends are only loaded once logging is actually set up
+    from utils import logs
 
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
-    logging.basicConfig(
-        level=getattr(logging, log_level, logging.INFO),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[logging.FileHandler(log_file), logging.StreamHandler(sys.stdout)],
+    logs.setup_logging(
+        level=settings.log_level,
+        log_file=settings.log_file,
+        log_format=settings.log_format,
+        stdout=settings.log_stdout,
+        max_bytes=settings.log_max_bytes,
+        backups=settings.log_backups,
+        max_age=settings.log_max_age_days * 86400,
+        run_budget=settings.log_run_budget,
+        repeat_limit=settings.log_repeat_limit,
     )
 
 
@@ -52,12 +67,13 @@ def _map_cli_to_ui_punch(cli_value: str) -> Optional[str]:
     return None
 
 
-def decide_punch_type(explicit_cli: Optional[str]) -> str:
+def decide_punch_type(explicit_cli: Optional[str], settings: Optional[Settings] = None) -> str:
     """Decide the UI punch option to use.
 
     - If CLI provides one of ["check-in", "check-out"], map to ["Time-In", "Time-Out"].
     - Backward compatibility: if CLI already provided ["Time-In", "Time-Out"], keep as is.
-    - Otherwise, decide automatically by local time.
+    - Otherwise, decide from the configured work schedule (before/after the midpoint of
+      WORK_START_TIME..WORK_END_TIME), falling back to fixed local-time windows.
     """
     # New CLI mapping
     mapped = _map_cli_to_ui_punch(explicit_cli) if explicit_cli else None
@@ -68,6 +84,10 @@ def decide_punch_type(explicit_cli: Optional[str]) -> str:
     if explicit_cli in ("Time-In", "Time-Out"):
         return explicit_cli  # type: ignore[return-value]
 
+    schedule = load_work_schedule(settings)
+    if schedule is not None:
+        return schedule.punch_for(datetime.datetime.now())
+
     # Auto decision window
     hour = datetime.datetime.now().time().hour
     if 8 <= hour < 12:
@@ -77,79 +97,644 @@ def decide_punch_type(explicit_cli: Optional[str]) -> str:
     return "Time-In"
 
 
+def choose_submit_delay() -> int:
+    """Pick the random pre-submit delay in seconds (1-10 minutes, whole-minute steps)."""
+    return random.randint(1, 10) * 60
+
+
+def resolve_submit_deadline(submit_at: Optional[str], fallback_delay: int) -> float:
+    """Convert a local HH:MM[:SS] wall-clock target into a ``time.monotonic()`` deadline.
+
+    Without a target, the deadline is ``fallback_delay`` seconds from now. A target that
+    has already passed today fires immediately.
+    """
+    if not submit_at:
+        return time.monotonic() + fallback_delay
+
+    target_time = parse_clock(submit_at)
+    now = datetime.datetime.now()
+    target = datetime.datetime.combine(now.date(), target_time)
+    # Read both clocks back to back so the wall-clock offset maps onto monotonic time
+    return time.monotonic() + max((target - now).total_seconds(), 0.0)
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="WW HR portal check-in")
+    parser.add_argument(
+        "punch",
+        nargs="?",
+        default=None,
+        help="check-in | check-out (or Time-In | Time-Out). Auto-decided by local time when omitted.",
+    )
+    parser.add_argument(
+        "--submit-mode",
+        choices=SUBMIT_MODES,
+        default=None,
+        help=(
+            "hold: open the punch form, then wait the random delay before saving (default). "
+            "deferred: wait the random delay first with no browser running, then punch straight through. "
+            "prestage: open the punch form early, keep the session alive and click save exactly at "
+            "--submit-at (or after the random delay). "
+            "Defaults to SUBMIT_MODE from env/.env."
+        ),
+    )
+    parser.add_argument(
+        "--submit-at",
+        default=None,
+        metavar="HH:MM[:SS]",
+        help="Local time at which prestage mode clicks save. Defaults to SUBMIT_AT from env/.env.",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help=(
+            "Stay running and punch on the WORK_DAYS / WORK_START_TIME / WORK_END_TIME schedule, "
+            "skipping dates listed in SKIP_DATES_FILE. Replaces crontab triggers."
+        ),
+    )
+    parser.add_argument(
+        "--batch",
+        default=None,
+        metavar="ACCOUNTS_FILE",
+        help=(
+            "Punch for every account in a JSON list ([{\"username\", \"password\" | \"password_env\", "
+            "\"punch\"?}]) with staggered, rate-limited logins. Defaults to ACCOUNTS_FILE from env/.env."
+        ),
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Punch even if the run ledger shows this punch already completed today.",
+    )
+    parser.add_argument(
+        "--export",
+        default=None,
+        metavar="FROM[:TO]",
+        help=(
+            "Instead of punching, export reported punches between two YYYY-MM-DD dates (TO defaults "
+            "to today), streaming each page of the portal's reported time to --export-to. "
+            "Honours --batch."
+        ),
+    )
+    parser.add_argument(
+        "--export-to",
+        default=None,
+        metavar="PATH",
+        help="Export file (default: exports/punches_FROM_TO.<format>, .csv without --export-format).",
+    )
+    parser.add_argument(
+        "--export-format",
+        choices=("csv", "jsonl", "sqlite"),
+        default=None,
+        help="csv | jsonl | sqlite (default: from the --export-to extension, else csv).",
+    )
+    return parser.parse_args(argv)
+
+
+def run_check_in_flow(
+    helper: SeleniumHelper,
+    login_url: str,
+    username: str,
+    password: str,
+    target_punch: str,
+    delay_seconds: int = 0,
+    submit_deadline: Optional[float] = None,
+    timings: Optional[List[Tuple[str, float]]] = None,
+    state: Optional[FlowState] = None,
+) -> PunchResult:
+    """Drive the portal from login to the punch confirmation.
+
+    ``delay_seconds`` is slept between selecting the punch type and clicking save
+    (hold mode). Deferred mode passes 0 so the browser lives only as long as the
+    navigation itself. Prestage mode passes ``submit_deadline`` (``time.monotonic()``)
+    and the save click is fired at that instant instead. Per-step durations are
+    appended to ``timings`` when given. Steps run against ``helper.deadline``; the
+    planned hold before save is excluded from it.
+
+    Progress is checkpointed in ``state``. Called again with the same ``state`` after
+    :meth:`SeleniumHelper.restart`, the flow restores the session cookies and resumes
+    from the last checkpoint instead of logging in again.
+
+    Returns the classified portal response to the save click. The steps themselves are
+    ``utils.flow.check_in_steps``, shared with the async helper.
+    """
+    return helper.run_steps(
+        check_in_steps(
+            helper, login_url, username, password, target_punch, delay_seconds, submit_deadline, timings, state
+        )
+    )
+
+
+def run_with_recovery(
+    helper: SeleniumHelper,
+    login_url: str,
+    username: str,
+    password: str,
+    target_punch: str,
+    delay_seconds: int = 0,
+    submit_deadline: Optional[float] = None,
+    timings: Optional[List[Tuple[str, float]]] = None,
+    max_recoveries: int = 2,
+) -> PunchResult:
+    """Run the flow; when Chrome or chromedriver dies, restart it and resume from the last checkpoint.
+
+    A crash after the save was sent is never retried: the result is UNKNOWN, which
+    the ledger treats as done.
+    """
+    logger = logging.getLogger(__name__)
+    state = FlowState()
+    while True:
+        try:
+            return run_check_in_flow(
+                helper,
+                login_url,
+                username,
+                password,
+                target_punch,
+                delay_seconds=delay_seconds,
+                submit_deadline=submit_deadline,
+                timings=timings,
+                state=state,
+            )
+        except Exception as e:
+            # Also covers the watchdog killing the browser once the budget is gone
+            if not is_browser_crash(e) or helper.deadline.expired:
+                raise
+            if state.checkpoint >= Checkpoint.SAVE_SENT:
+                logger.error(f"Browser crashed after save was sent; not repeating the save: {e}")
+                return PunchResult(PunchOutcome.UNKNOWN, f"browser crashed after save was sent: {e}")
+            if state.recoveries >= max_recoveries:
+                raise
+            state.recoveries += 1
+            logger.warning(
+                f"Browser crashed during {helper.deadline.step}: {e}. Restarting and resuming from "
+                f"{state.checkpoint.name} (recovery {state.recoveries}/{max_recoveries})"
+            )
+            with timed_step("Browser restart", timings, helper.deadline):
+                helper.restart()
+
+
+def _session_watchdog(
+    helper: SeleniumHelper,
+    settings: Settings,
+    delay_seconds: int,
+    submit_deadline: Optional[float],
+    name: str,
+) -> ContextManager:
+    """Hard wall-clock limit for one browser session: planned hold + run budget + grace.
+
+    Disabled together with the run budget (RUN_DEADLINE_SECONDS=0).
+    """
+    if not settings.run_deadline:
+        return contextlib.nullcontext()
+    from utils.reaper import Watchdog
+
+    planned = delay_seconds + (max(submit_deadline - time.monotonic(), 0.0) if submit_deadline is not None else 0.0)
+    limit = planned + settings.run_deadline + settings.watchdog_grace
+    return Watchdog(limit, lambda: helper.driver_pid, name=name)
+
+
+def _capture_failure(helper: SeleniumHelper, settings: Settings, account: str, run_id: str, reason: str) -> None:
+    """Save failure artifacts (screenshot, page sources, console log) before the browser closes."""
+    if not settings.artifacts_enabled:
+        return
+    from utils.artifacts import ArtifactStore, capture_failure
+
+    store = ArtifactStore(settings.artifact_dir, int(settings.artifact_max_mb * 1024 * 1024))
+    capture_failure(
+        helper,
+        store,
+        account,
+        reason,
+        run_id=run_id,
+        step=helper.deadline.step,
+        timeout=settings.artifact_capture_timeout,
+    )
+
+
+def _resource_columns(sampler) -> dict:
+    """Ledger keyword arguments for what a ResourceSampler recorded (empty without one)."""
+    if sampler is None or not sampler.steps:
+        return {}
+    return {
+        "peak_rss_mb": sampler.peak_rss_mb,
+        "step_resources": {u.step: (u.peak_rss_mb, u.cpu_seconds) for u in sampler.summary()},
+    }
+
+
+def check_in(
+    target_punch: str,
+    submit_mode: str,
+    login_url: str,
+    username: str,
+    password: str,
+    submit_at: Optional[str] = None,
+    delay_seconds: Optional[int] = None,
+    session: Optional[Callable[[], ContextManager]] = None,
+    ledger: Optional[RunLedger] = None,
+    force: bool = False,
+    settings: Optional[Settings] = None,
+    start_delay: float = 0.0,
+) -> bool:
+    """Run one complete punch, including the submit-mode delay. Returns True on success.
+
+    ``delay_seconds`` overrides the random pre-submit delay. ``start_delay`` is slept
+    before the session slot is taken and the browser starts (batch runs pass their
+    staggered offset there, so no browser idles through it). ``session`` is entered
+    right before the browser starts and held until it closes; the fleet dispatcher uses
+    it for rate and concurrency limits, and the session's peak RSS is reported back to
+    it for memory-aware admission.
+    Browser-free preflight checks (schedule, skip dates, ledger, concurrent runs) run
+    first, so no-op runs return before any delay or Chrome start; ``force`` bypasses
+    the schedule and ledger checks. ``settings`` defaults to the current config snapshot.
+    """
+    from utils import logs
+
+    logger = logging.getLogger(__name__)
+    settings = settings or get_settings()
+
+    with logs.run_context(username) as log_run_id:
+        # Randomize submit time between 60-600 seconds (in 60s intervals). The delay is chosen
+        # up front; in deferred mode it is slept below, before any browser process exists.
+        if delay_seconds is None:
+            delay_seconds = choose_submit_delay()
+        submit_deadline: Optional[float] = None
+        if submit_mode == "prestage":
+            try:
+                submit_deadline = resolve_submit_deadline(submit_at, delay_seconds)
+            except ValueError as e:
+                logger.error(str(e))
+                return False
+            delay_seconds = 0
+
+        pre = run_preflight(username, password, target_punch, ledger=ledger, force=force, settings=settings)
+        if not pre.proceed:
+            if pre.skip:
+                logger.info(f"Skipping {target_punch} for {username}: {pre.reason} (preflight {pre.elapsed_ms:.1f}ms)")
+                if ledger is not None:
+                    ledger.record_skip(username, target_punch, pre.reason)
+                return True
+            logger.error(f"Preflight failed for {username}: {pre.reason}")
+            return False
+        logger.debug(f"Preflight passed in {pre.elapsed_ms:.1f}ms")
+
+        with pre.lock:
+            logger.info("=" * 60)
+            logger.info("WW Check-in start")
+            logger.info(f"Timestamp: {datetime.datetime.now()}")
+            logger.info(f"Account: {username}")
+            logger.info(f"UI punch option: {target_punch}")
+            logger.info(f"Submit mode: {submit_mode}")
+            logger.info("=" * 60)
+
+            if start_delay > 0:
+                logger.info(f"Staggered start: sleeping {start_delay:.0f}s before starting the browser")
+                time.sleep(start_delay)
+
+            if submit_deadline is not None:
+                logger.info(f"Prestage submit: save fires in {submit_deadline - time.monotonic():.1f}s")
+            elif submit_mode == "deferred":
+                logger.info(
+                    f"Deferred submit: sleeping {delay_seconds // 60}m({delay_seconds}s) before starting the browser"
+                )
+                time.sleep(delay_seconds)
+                delay_seconds = 0
+
+            # Deferred import: selenium is only loaded once a browser is actually needed
+            from utils.selenium_helper import SeleniumHelper
+
+            deadline = Deadline(settings.run_deadline)
+            helper: Optional[SeleniumHelper] = None
+            run_id: Optional[int] = None
+            timings: List[Tuple[str, float]] = []
+            sampler = None
+            try:
+                # Driver discovery and DNS/TLS warm-up to the portal overlap with the remaining
+                # bookkeeping and any wait for a session slot; Chrome itself starts inside the slot.
+                helper = SeleniumHelper(settings, deadline)
+                helper.warm_up(login_url)
+                if ledger is not None:
+                    run_id = ledger.start_run(username, target_punch)
+                if settings.resource_sampling:
+                    from utils.resources import ResourceSampler
+
+                    sampler = ResourceSampler(lambda: helper.driver_pid, lambda: deadline.step)
+
+                with (session() if session is not None else contextlib.nullcontext()) as slot:
+                    # The budget starts once a session slot is held
+                    deadline.restart()
+                    with _session_watchdog(helper, settings, delay_seconds, submit_deadline, username):
+                        try:
+                            with sampler if sampler is not None else contextlib.nullcontext():
+                                with timed_step("Browser start", timings, deadline):
+                                    helper.start(login_url)
+                                result = run_with_recovery(
+                                    helper,
+                                    login_url,
+                                    username,
+                                    password,
+                                    target_punch,
+                                    delay_seconds=delay_seconds,
+                                    submit_deadline=submit_deadline,
+                                    timings=timings,
+                                    max_recoveries=settings.crash_retries,
+                                )
+                            if not result.ok:
+                                _capture_failure(helper, settings, username, log_run_id, result.message)
+                        except Exception as e:
+                            # A dead browser has nothing left to capture
+                            if not is_browser_crash(e):
+                                _capture_failure(helper, settings, username, log_run_id, str(e))
+                            raise
+                        finally:
+                            helper.close()
+                            if sampler is not None:
+                                sampler.log_summary()
+                                if hasattr(slot, "observe") and sampler.peak_rss_mb:
+                                    slot.observe(sampler.peak_rss_mb)
+
+                if ledger is not None and run_id is not None:
+                    ledger.finish_run(
+                        run_id,
+                        result.outcome.ledger_outcome,
+                        timings,
+                        popup_text=result.message or None,
+                        error=result.message if not result.ok else None,
+                        **_resource_columns(sampler),
+                    )
+                if result.outcome is PunchOutcome.UNKNOWN:
+                    detail = f" ({result.message})" if result.message else ""
+                    logger.error(f"Check-in unverified: save was sent but no confirmation was recognized{detail}")
+                    return False
+                if not result.ok:
+                    logger.error(f"Check-in failed: portal reported an error: {result.message}")
+                    return False
+                logger.info("=" * 60)
+                logger.info("WW Check-in completed successfully")
+                logger.info("=" * 60)
+                return True
+
+            except Exception as e:
+                # A wait cut short by the budget surfaces as its own timeout; report the budget instead
+                if deadline.expired and not isinstance(e, DeadlineExceeded):
+                    e = deadline.exceeded()
+                outcome = "timeout" if isinstance(e, DeadlineExceeded) else "failed"
+                logger.error(f"Check-in {'aborted' if outcome == 'timeout' else 'failed'}: {e}")
+                if ledger is not None and run_id is not None:
+                    try:
+                        ledger.finish_run(
+                            run_id,
+                            outcome,
+                            timings,
+                            popup_text=helper.last_popup_text if helper is not None else None,
+                            error=str(e),
+                            **_resource_columns(sampler),
+                        )
+                    except Exception as ledger_error:
+                        logger.error(f"Could not record the run in the ledger: {ledger_error}")
+                return False
+
+
+def run_batch(
+    accounts: List[Account],
+    punch_arg: Optional[str],
+    submit_mode: str,
+    login_url: str,
+    submit_at: Optional[str] = None,
+    dispatcher: Optional[FleetDispatcher] = None,
+    ledger: Optional[RunLedger] = None,
+    force: bool = False,
+    settings: Optional[Settings] = None,
+) -> bool:
+    """Punch for every account with staggered, rate-limited starts. Returns True if all succeeded."""
+    from utils.dispatch import FleetDispatcher
+
+    settings = settings or get_settings()
+    dispatcher = dispatcher or FleetDispatcher.from_config(settings)
+    # Offsets count from here; admission serves the account due soonest first
+    dispatch_start = time.monotonic()
+
+    def _run_account(account: Account, offset: float) -> bool:
+        target_punch = decide_punch_type(account.punch or punch_arg, settings)
+        # The offset delays the login itself; the hold before save is then skipped. Prestage
+        # holds its session until the fire time by design, so there the offset stays the
+        # submit delay (used when SUBMIT_AT is not set).
+        prestage = submit_mode == "prestage"
+        return check_in(
+            target_punch,
+            submit_mode,
+            login_url,
+            account.username,
+            account.password,
+            submit_at=submit_at,
+            delay_seconds=int(offset) if prestage else 0,
+            session=lambda: dispatcher.session(account.username, deadline=dispatch_start + offset),
+            ledger=ledger,
+            force=force,
+            settings=settings,
+            start_delay=0.0 if prestage else offset,
+        )
+
+    results = dispatcher.run(accounts, _run_account)
+    return all(results.values())
+
+
+def run_export(
+    accounts: List[Account],
+    start: datetime.date,
+    end: datetime.date,
+    output: str,
+    fmt: Optional[str],
+    login_url: str,
+    settings: Optional[Settings] = None,
+    dispatcher: Optional[FleetDispatcher] = None,
+) -> bool:
+    """Export every account's reported punches into one file. Returns True if all succeeded.
+
+    Accounts go through the fleet dispatcher (session and login-rate limits) without a
+    start stagger; rows reach the file page by page, so a failed account keeps what it
+    exported so far. Export sessions are admitted at background priority, so on a
+    ``dispatcher`` shared with punch runs they wait behind due punches.
+    """
+    import dataclasses
+
+    from utils import logs
+    from utils.admission import BACKGROUND
+    from utils.dispatch import FleetDispatcher
+    from utils.export import export_account, open_sink
+    from utils.selenium_helper import SeleniumHelper
+
+    logger = logging.getLogger(__name__)
+    settings = settings or get_settings()
+    dispatcher = dispatcher or FleetDispatcher.from_config(dataclasses.replace(settings, stagger_window=0))
+
+    with open_sink(output, fmt) as sink:
+        logger.info(f"Exporting punches {start} to {end} for {len(accounts)} account(s) into {output}")
+
+        def _export_account(account: Account, offset: float) -> bool:
+            with logs.run_context(account.username):
+                helper = SeleniumHelper(settings, Deadline(settings.run_deadline))
+                helper.warm_up(login_url)
+                try:
+                    with dispatcher.session(account.username, priority=BACKGROUND):
+                        helper.deadline.restart()
+                        try:
+                            export_account(helper, login_url, account.username, account.password, start, end, sink)
+                        finally:
+                            helper.close()
+                except Exception as e:
+                    logger.error(f"[{account.username}] Export failed: {e}")
+                    return False
+                return True
+
+        results = dispatcher.run(accounts, _export_account)
+        logger.info(f"Export finished: {sink.rows} rows written to {output}")
+    return all(results.values())
+
+
 def main() -> None:
-    setup_logging()
+    args = parse_args()
+    try:
+        settings = get_settings()
+    except ConfigError as e:
+        logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+        logging.getLogger(__name__).error(str(e))
+        sys.exit(1)
+    setup_logging(settings)
     logger = logging.getLogger(__name__)
 
-    login_url = str(get_config_value("LOGIN_URL", "https://hr.wiwynn.com/psc/hcmprd/?cmd=login&languageCd=ZHT"))
-    username = get_config_value("WW_USERNAME")
-    password = get_config_value("WW_PASSWORD")
-    if not username or not password:
+    accounts_file = args.batch or settings.accounts_file
+    accounts: List[Account] = []
+    if accounts_file:
+        from utils.dispatch import load_accounts
+
+        try:
+            accounts = load_accounts(accounts_file)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load accounts from {accounts_file}: {e}")
+            sys.exit(1)
+    elif not settings.username or not settings.password:
         logger.error("Missing WW_USERNAME or WW_PASSWORD in environment")
         sys.exit(1)
 
+    ledger: Optional[RunLedger] = None
+    if settings.ledger_enabled:
+        try:
+            ledger = RunLedger(settings.ledger_path)
+        except sqlite3.Error as e:
+            logger.warning(f"Run ledger unavailable, continuing without it: {e}")
+
+    if accounts:
+        logger.info(f"Batch mode: {len(accounts)} accounts from {accounts_file}")
+
+    def reap() -> None:
+        if get_settings().reap_on_start:
+            from utils.reaper import reap_stale
+
+            reap_stale()
+
+    if args.export:
+        from utils.dispatch import Account
+        from utils.export import parse_date_range
+
+        try:
+            start, end = parse_date_range(args.export)
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(2)
+        reap()
+        # Format names double as their file extensions
+        extension = args.export_format or "csv"
+        output = args.export_to or os.path.join("exports", f"punches_{start}_{end}.{extension}")
+        ok = run_export(
+            accounts or [Account(settings.username, settings.password)],
+            start,
+            end,
+            output,
+            args.export_format,
+            settings.login_url,
+            settings=settings,
+        )
+        sys.exit(0 if ok else 1)
+
+    if args.daemon:
+        logger.info("Starting scheduler daemon (WORK_DAYS / WORK_START_TIME / WORK_END_TIME)")
+        # Each event picks up the latest snapshot; .env edits apply without a restart
+        watcher = ConfigWatcher().start()
+
+        def run_punch(punch: str) -> bool:
+            # Long-lived container: clean up after any earlier punch that died badly
+            reap()
+            current = get_settings()
+            submit_mode = args.submit_mode or current.submit_mode
+            if accounts:
+                return run_batch(
+                    accounts, punch, submit_mode, current.login_url, ledger=ledger, force=args.force, settings=current
+                )
+            return check_in(
+                punch,
+                submit_mode,
+                current.login_url,
+                current.username,
+                current.password,
+                ledger=ledger,
+                force=args.force,
+                settings=current,
+            )
+
+        import asyncio
+
+        from utils.scheduler import run_schedule
+
+        try:
+            asyncio.run(run_schedule(run_punch, lambda: load_work_schedule(get_settings())))
+        except KeyboardInterrupt:
+            logger.info("Scheduler daemon stopped")
+        except (RuntimeError, ValueError) as e:
+            logger.error(f"Scheduler daemon failed: {e}")
+            sys.exit(1)
+        finally:
+            watcher.stop()
+        return
+
+    reap()
+    submit_mode = args.submit_mode or settings.submit_mode
+    submit_at = args.submit_at or settings.submit_at
+
     # Optional: override punch via CLI arg
-    punch_arg = None
-    if len(sys.argv) > 1:
-        punch_arg = sys.argv[1]
-
-    target_punch = decide_punch_type(punch_arg)
-    logger.info("=" * 60)
-    logger.info("WW Check-in start")
-    logger.info(f"Timestamp: {datetime.datetime.now()}")
+    punch_arg = args.punch
+    if accounts:
+        if not run_batch(
+            accounts,
+            punch_arg,
+            submit_mode,
+            settings.login_url,
+            submit_at=submit_at,
+            ledger=ledger,
+            force=args.force,
+            settings=settings,
+        ):
+            sys.exit(1)
+        return
+
+    target_punch = decide_punch_type(punch_arg, settings)
     if punch_arg:
         logger.info(f"CLI punch arg: {punch_arg} -> UI option: {target_punch}")
     else:
         logger.info(f"Auto-decided UI punch option: {target_punch}")
-    logger.info("=" * 60)
 
-    helper: Optional[SeleniumHelper] = None
-    try:
-        helper = SeleniumHelper()
-
-        # Step 1: login
-        logger.info("Step 1: login")
-        helper.login(login_url=login_url, username=username, password=password)
-        logger.info("Login submitted. Waiting for page to stabilize...")
-        helper.wait_for_ajax_and_ready(10)
-
-        # Step 2: 我的出勤/工時
-        logger.info("Step 2: 我的出勤/工時")
-        helper.click_by_id("win0groupletPTNUI_LAND_REC_GROUPLET$1", sleep_after=2)
-
-        # Step 3: 工時回報
-        logger.info("Step 3: 工時回報")
-        helper.click_by_id("Z_ESS_TIMEREPORTED$2", sleep_after=2)
-
-        # Step 4: 線上打卡
-        logger.info("Step 4: 線上打卡")
-        helper.open_online_checkin_step()
-
-        # Step 5: Iframe and form
-        logger.info("Step 5: Iframe and form")
-        helper.switch_to_clock_iframe()
-        helper.select_punch_type(target_punch)
-        # Randomize submit time between 60-600 seconds (in 60s intervals)
-        random_delay_minutes = random.randint(1, 10)  # 1-10 minutes
-        random_delay_seconds = random_delay_minutes * 60
-        logger.info(f"Random delay before click save button: {random_delay_minutes}m({random_delay_seconds}s)")
-        time.sleep(random_delay_seconds)
-        # logger.info("Disabled auto-submit button for temporary use")
-        helper.click_save()
-
-        # Handle duplicate clock-in popup if it appears
-        helper.handle_duplicate_clockin_popup()
-
-        logger.info("=" * 60)
-        logger.info("WW Check-in completed successfully")
-        logger.info("=" * 60)
-
-    except Exception as e:
-        logger.error(f"Check-in failed: {e}")
+    if not check_in(
+        target_punch,
+        submit_mode,
+        settings.login_url,
+        settings.username,
+        settings.password,
+        submit_at=submit_at,
+        ledger=ledger,
+        force=args.force,
+        settings=settings,
+    ):
         sys.exit(1)
-    finally:
-        if helper is not None:
-            helper.close()
 
 
 if __name__ == "__main__":